@@ -10,6 +10,16 @@ from tanulmanyi_versenyek.kir_downloader.kir_scraper import download_latest_kir_
 log = logging.getLogger(__name__.split('.')[-1])
 
 
+def run(cfg):
+    """
+    Download the latest KIR database.
+
+    Args:
+        cfg: Configuration dictionary
+    """
+    download_latest_kir_data(cfg)
+
+
 def main():
     setup_logging()
     log.info("Script starting: 03_download_helper_data.py")
@@ -17,7 +27,7 @@ def main():
     config = get_config()
 
     try:
-        download_latest_kir_data(config)
+        run(config)
         log.info("Script completed successfully")
     except Exception as e:
         log.error(f"Script failed: {e}")
@@ -1,27 +1,50 @@
 import logging
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import pandas as pd
 from tanulmanyi_versenyek.common import config
 from tanulmanyi_versenyek.common import logger
+from tanulmanyi_versenyek.common import kir_table
+from tanulmanyi_versenyek.common import schema
+from tanulmanyi_versenyek.common.stage_cache import StageCache
+from tanulmanyi_versenyek.merger import data_merger
 from tanulmanyi_versenyek.merger.data_merger import (
     merge_processed_data,
+    iter_year_batches,
     generate_validation_report,
-    generate_excel_report
+    write_validation_report,
+    generate_excel_report,
+    generate_excel_report_from_csv
+)
+from tanulmanyi_versenyek.validation import (
+    candidate_index,
+    city_checker,
+    name_canonicalizer,
+    ngram_index,
+    school_matcher,
+    scorers
 )
 from tanulmanyi_versenyek.validation.city_checker import (
     load_city_mapping,
     apply_city_mapping
 )
 from tanulmanyi_versenyek.validation.school_matcher import (
+    MatchCache,
     load_kir_database,
     load_school_mapping,
     match_all_schools,
     apply_matches,
-    generate_audit_file
+    generate_audit_file,
+    generate_review_file
 )
+from tanulmanyi_versenyek.validation.threshold_sweep import save_match_scores
 
 log = logging.getLogger('04_merger_and_excel')
 
+# Modules whose code determines the KIR candidates and the school match results
+MATCHING_CODE = [school_matcher, kir_table, name_canonicalizer, scorers, candidate_index, ngram_index]
+
 
 def validate_kir_file_exists(cfg):
     """Validate KIR file exists before proceeding."""
@@ -33,72 +56,290 @@ def validate_kir_file_exists(cfg):
         )
 
 
-def main():
+def save_master_csv(master_df, cfg):
+    """Save the master DataFrame as the Kaggle CSV."""
+    master_csv_path = Path(cfg['paths']['master_csv'])
+    master_df.to_csv(master_csv_path, sep=';', encoding='utf-8', index=False)
+    log.info(f"Master CSV saved to {master_csv_path}")
+
+
+def write_outputs(master_df, match_results, cfg, duplicates_removed, city_corrections):
+    """Write the audit and review files, match scores, master CSV, validation report and Excel report concurrently."""
+    run_writers({
+        'audit file': lambda: generate_audit_file(match_results, Path(cfg['paths']['audit_file'])),
+        'match scores': lambda: save_match_scores(match_results, Path(cfg['paths']['match_scores_file']), cfg),
+        'review file': lambda: generate_review_file(match_results, Path(cfg['paths']['review_file'])),
+        'master CSV': lambda: save_master_csv(master_df, cfg),
+        'validation report': lambda: generate_validation_report(
+            master_df, cfg, duplicates_removed, city_corrections, match_results
+        ),
+        'Excel report': lambda: generate_excel_report(master_df, cfg)
+    })
+
+
+def run_writers(writers):
     """
-    Main function for the merger and Excel report generation script.
-    Sets up logging and loads configuration.
+    Run output writers on separate threads.
+
+    The writers only read their inputs, so they can run concurrently.
+    The first failure is re-raised after all writers have finished.
+
+    Args:
+        writers: Dict of output name -> zero-argument callable
     """
-    logger.setup_logging()
-    log.info("Script starting: 04_merger_and_excel.py")
-    try:
-        cfg = config.get_config()
-        log.info("Configuration loaded successfully.")
+    log.info(f"Writing outputs: {', '.join(writers)}")
+    with ThreadPoolExecutor(max_workers=len(writers)) as executor:
+        futures = {name: executor.submit(write) for name, write in writers.items()}
+    for name, future in futures.items():
+        error = future.exception()
+        if error is not None:
+            log.error(f"Failed to write {name}: {error}")
+            raise error
+
 
-        validate_kir_file_exists(cfg)
-        log.info("KIR file validation passed")
+def load_city_rules(cfg, cache):
+    """Load the compiled city mapping, reusing the cached rules while the mapping CSV is unchanged."""
+    rules_key = cache.key('city_rules', inputs=[Path(cfg['validation']['city_mapping_file'])], code=[city_checker])
+    return cache.get_or_compute('city_rules', rules_key, lambda: load_city_mapping(cfg))
 
-        kaggle_template_dir = Path(cfg['paths']['kaggle_template_dir'])
-        kaggle_output_dir = Path(cfg['paths']['kaggle_dir'])
 
-        if kaggle_output_dir.exists():
-            shutil.rmtree(kaggle_output_dir)
-            log.info(f"Cleaned up existing Kaggle directory: {kaggle_output_dir}")
+def matching_key_config(cfg):
+    """Matching settings that affect the results; the worker count does not."""
+    return {key: value for key, value in cfg['matching'].items() if key != 'workers'}
 
-        kaggle_output_dir.mkdir(parents=True, exist_ok=True)
-        log.info(f"Created Kaggle directory: {kaggle_output_dir}")
 
-        if kaggle_template_dir.exists():
-            for item in kaggle_template_dir.iterdir():
-                if item.is_file():
-                    shutil.copy(item, kaggle_output_dir / item.name)
-                    log.info(f"Copied {item.name} to Kaggle directory")
-        else:
-            log.warning(f"Kaggle template directory not found: {kaggle_template_dir}")
+def open_match_cache(cfg, cache):
+    """Per-pair school match cache for this KIR release and matching settings, or None if caching is off."""
+    if not cache.enabled:
+        return None
+    fingerprint = cache.key(
+        'school_matches',
+        inputs=[Path(cfg['kir']['locations_file'])],
+        config_section=matching_key_config(cfg),
+        code=MATCHING_CODE
+    )
+    return MatchCache(Path(cfg['paths']['cache_dir']) / 'school_matches.pkl', fingerprint)
 
-        master_df, duplicates_removed = merge_processed_data(cfg)
-        if master_df.empty:
-            log.error("Master DataFrame is empty, cannot proceed")
-            return
 
-        log.info("Applying city corrections...")
-        city_mapping = load_city_mapping(cfg)
-        master_df, city_corrections = apply_city_mapping(master_df, city_mapping)
+def match_schools(schools_df, cfg, cache):
+    """Match the unique schools of schools_df to KIR, reusing pairs matched in earlier runs."""
+    log.info("Loading KIR database...")
+    kir_df = load_kir_database(cfg)
 
-        log.info("Loading KIR database...")
-        kir_df = load_kir_database(cfg)
+    log.info("Loading manual school mappings...")
+    school_mapping = load_school_mapping(cfg)
 
-        log.info("Loading manual school mappings...")
-        school_mapping = load_school_mapping(cfg)
+    log.info("Matching schools to KIR database...")
+    match_cache = open_match_cache(cfg, cache)
+    match_results = match_all_schools(schools_df, kir_df, school_mapping, cfg, match_cache)
+    if match_cache is not None:
+        match_cache.save()
+    return match_results
 
-        log.info("Matching schools to KIR database...")
-        match_results = match_all_schools(master_df, kir_df, school_mapping, cfg)
 
-        log.info("Applying school matches...")
-        original_count = len(master_df)
-        master_df = apply_matches(master_df, match_results)
-        final_count = len(master_df)
-        log.info(f"Records: {original_count} → {final_count} (dropped {original_count - final_count})")
+def prepare_kaggle_dir(cfg):
+    """Recreate the Kaggle output directory from its template files."""
+    kaggle_template_dir = Path(cfg['paths']['kaggle_template_dir'])
+    kaggle_output_dir = Path(cfg['paths']['kaggle_dir'])
+
+    if kaggle_output_dir.exists():
+        shutil.rmtree(kaggle_output_dir)
+        log.info(f"Cleaned up existing Kaggle directory: {kaggle_output_dir}")
+
+    kaggle_output_dir.mkdir(parents=True, exist_ok=True)
+    log.info(f"Created Kaggle directory: {kaggle_output_dir}")
+
+    if kaggle_template_dir.exists():
+        for item in kaggle_template_dir.iterdir():
+            if item.is_file():
+                shutil.copy(item, kaggle_output_dir / item.name)
+                log.info(f"Copied {item.name} to Kaggle directory")
+    else:
+        log.warning(f"Kaggle template directory not found: {kaggle_template_dir}")
+
+
+def merge_in_memory(cfg, cache):
+    """
+    Merge, validate and write all outputs with the whole master data in memory.
+
+    Args:
+        cfg: Configuration dictionary
+        cache: StageCache for the intermediate steps
+    """
+    processed_files = Path(cfg['paths']['processed_csv_dir']).glob('*.csv')
+    merge_key = cache.key('merge', inputs=processed_files, code=[data_merger, schema])
+    master_df, duplicates_removed = cache.get_or_compute(
+        'merge', merge_key, lambda: merge_processed_data(cfg)
+    )
+    if master_df.empty:
+        log.error("Master DataFrame is empty, cannot proceed")
+        return
+
+    log.info("Applying city corrections...")
+    city_key = cache.key(
+        'city_mapping',
+        inputs=[Path(cfg['validation']['city_mapping_file'])],
+        config_section=cfg['validation'],
+        code=[city_checker],
+        upstream=[merge_key]
+    )
+    master_df, city_corrections = cache.get_or_compute(
+        'city_mapping', city_key, lambda: apply_city_mapping(master_df, load_city_rules(cfg, cache), copy=False)
+    )
+
+    kir_key = cache.key('kir', inputs=[Path(cfg['kir']['locations_file'])], code=MATCHING_CODE)
+    match_key = cache.key(
+        'matching',
+        inputs=[Path(cfg['validation']['school_mapping_file'])],
+        config_section=matching_key_config(cfg),
+        code=MATCHING_CODE,
+        upstream=[city_key, kir_key]
+    )
+
+    match_results = cache.get_or_compute('matching', match_key, lambda: match_schools(master_df, cfg, cache))
+
+    log.info("Applying school matches...")
+    original_count = len(master_df)
+    apply_key = cache.key('apply_matches', code=[school_matcher], upstream=[city_key, match_key])
+    master_df = cache.get_or_compute('apply_matches', apply_key, lambda: apply_matches(master_df, match_results))
+    final_count = len(master_df)
+    log.info(f"Records: {original_count} → {final_count} (dropped {original_count - final_count})")
+
+    write_outputs(master_df, match_results, cfg, duplicates_removed, city_corrections)
+
+
+def merge_batched(cfg, cache):
+    """
+    Merge, validate and write all outputs one competition year at a time.
 
-        log.info("Generating audit file...")
-        audit_path = Path(cfg['paths']['audit_file'])
-        generate_audit_file(match_results, audit_path)
+    The first pass collects the unique (school, city) pairs, which are
+    matched once. The second pass applies city corrections and matches to
+    each year and appends it to the master CSV, and the Excel report is then
+    streamed from that CSV. Memory use is bounded by the largest year and
+    the number of distinct schools instead of the whole dataset.
 
-        master_csv_path = Path(cfg['paths']['master_csv'])
-        master_df.to_csv(master_csv_path, sep=';', encoding='utf-8', index=False)
-        log.info(f"Master CSV saved to {master_csv_path}")
+    Args:
+        cfg: Configuration dictionary
+        cache: StageCache for the school list and the matching step
+    """
+    city_mapping = load_city_rules(cfg, cache)
+    processed_files = list(Path(cfg['paths']['processed_csv_dir']).glob('*.csv'))
+
+    def collect_schools():
+        duplicates_removed = 0
+        city_corrections = {'corrected': 0, 'dropped': 0}
+        school_frames = []
+        for _, batch_df, removed in iter_year_batches(cfg):
+            duplicates_removed += removed
+            batch_df, corrections = apply_city_mapping(batch_df, city_mapping, copy=False)
+            for key in city_corrections:
+                city_corrections[key] += corrections[key]
+            school_frames.append(batch_df[['iskola_nev', 'varos']].astype(object).drop_duplicates())
+        if not school_frames:
+            return pd.DataFrame(), duplicates_removed, city_corrections
+        unique_schools = pd.concat(school_frames, ignore_index=True).drop_duplicates(ignore_index=True)
+        return unique_schools, duplicates_removed, city_corrections
+
+    schools_key = cache.key(
+        'batched_schools',
+        inputs=processed_files + [Path(cfg['validation']['city_mapping_file'])],
+        config_section=cfg['validation'],
+        code=[data_merger, schema, city_checker]
+    )
+    unique_schools, duplicates_removed, city_corrections = cache.get_or_compute(
+        'batched_schools', schools_key, collect_schools
+    )
+    if unique_schools.empty:
+        log.error("No competition data found, cannot proceed")
+        return
+    log.info(f"Collected {len(unique_schools)} unique schools")
+
+    kir_key = cache.key('kir', inputs=[Path(cfg['kir']['locations_file'])], code=MATCHING_CODE)
+    match_key = cache.key(
+        'batched_matching',
+        inputs=[Path(cfg['validation']['school_mapping_file'])],
+        config_section=matching_key_config(cfg),
+        code=MATCHING_CODE,
+        upstream=[schools_key, kir_key]
+    )
+
+    match_results = cache.get_or_compute('batched_matching', match_key, lambda: match_schools(unique_schools, cfg, cache))
+
+    shard_column = cfg.get('report', {}).get('shard_column', 'ev')
+    master_csv_path = Path(cfg['paths']['master_csv'])
+    total_rows = 0
+    null_counts = {}
+    school_names = set()
+    group_sizes = []
+
+    with open(master_csv_path, 'w', encoding='utf-8', newline='') as f:
+        for number, (year, batch_df, _) in enumerate(iter_year_batches(cfg)):
+            batch_df, _ = apply_city_mapping(batch_df, city_mapping, copy=False)
+            batch_df = apply_matches(batch_df, match_results)
+            batch_df = batch_df.sort_values(shard_column, kind='stable')
+            batch_df.to_csv(f, sep=';', index=False, header=number == 0)
+
+            total_rows += len(batch_df)
+            for col, count in batch_df.isnull().sum().items():
+                null_counts[col] = null_counts.get(col, 0) + int(count)
+            school_names.update(batch_df['iskola_nev'].dropna().unique())
+            sizes = batch_df.groupby(shard_column, sort=True, dropna=False, observed=True).size()
+            group_sizes.extend((value, int(size)) for value, size in sizes.items())
+            log.info(f"Year {year}: appended {len(batch_df)} rows to master CSV")
+
+    log.info(f"Master CSV saved to {master_csv_path} ({total_rows} rows)")
+
+    run_writers({
+        'audit file': lambda: generate_audit_file(match_results, Path(cfg['paths']['audit_file'])),
+        'match scores': lambda: save_match_scores(match_results, Path(cfg['paths']['match_scores_file']), cfg),
+        'review file': lambda: generate_review_file(match_results, Path(cfg['paths']['review_file'])),
+        'validation report': lambda: write_validation_report(
+            cfg, total_rows, null_counts, len(school_names), duplicates_removed, city_corrections, match_results
+        ),
+        'Excel report': lambda: generate_excel_report_from_csv(
+            master_csv_path, cfg, group_sizes, cfg.get('merge', {}).get('csv_chunk_rows', 100000)
+        )
+    })
+
+
+def run(cfg, cache=None):
+    """
+    Merge processed CSVs, validate cities and schools, and write all outputs.
+    With merge.batched enabled, the data is processed one year at a time.
+
+    Args:
+        cfg: Configuration dictionary
+        cache: Optional StageCache; created from the configuration when omitted
+    """
+    validate_kir_file_exists(cfg)
+    log.info("KIR file validation passed")
+
+    prepare_kaggle_dir(cfg)
+
+    if cache is None:
+        cache = StageCache(Path(cfg['paths']['cache_dir']), enabled=cfg.get('cache', {}).get('enabled', True))
+
+    if cfg.get('merge', {}).get('batched', False):
+        log.info("Running in batched mode")
+        merge_batched(cfg, cache)
+    else:
+        merge_in_memory(cfg, cache)
+
+    cache.log_summary()
+
+
+def main():
+    """
+    Main function for the merger and Excel report generation script.
+    Sets up logging and loads configuration.
+    """
+    logger.setup_logging()
+    log.info("Script starting: 04_merger_and_excel.py")
+    try:
+        cfg = config.get_config()
+        log.info("Configuration loaded successfully.")
 
-        generate_validation_report(master_df, cfg, duplicates_removed, city_corrections, match_results)
-        generate_excel_report(master_df, cfg)
+        run(cfg)
 
         log.info("Script completed successfully")
     except FileNotFoundError as e:
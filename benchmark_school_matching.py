@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark the facility name score cutoff of the school matcher."""
+
+import time
+
+import numpy as np
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.merger.data_merger import merge_processed_data
+from tanulmanyi_versenyek.validation.city_checker import apply_city_mapping, load_city_mapping
+from tanulmanyi_versenyek.validation.school_matcher import (
+    count_facility_comparisons,
+    load_kir_database,
+    normalize_city,
+    score_candidates
+)
+from tanulmanyi_versenyek.validation.scorers import get_scorer
+
+
+def load_city_groups(cfg):
+    """Unique competition school names per normalized city, with their KIR candidates."""
+    master_df, _ = merge_processed_data(cfg)
+    master_df, _ = apply_city_mapping(master_df, load_city_mapping(cfg))
+    kir_dict = load_kir_database(cfg)
+
+    schools = master_df[['iskola_nev', 'varos']].drop_duplicates()
+    groups = []
+    for city, city_schools in schools.groupby(schools['varos'].map(normalize_city), observed=True):
+        if city in kir_dict:
+            groups.append((city_schools['iskola_nev'].tolist(), kir_dict[city]))
+    return groups
+
+
+def run_benchmark():
+    """Time score_candidates with and without the cutoff and report the pruning ratio."""
+    cfg = get_config()
+    groups = load_city_groups(cfg)
+    scorer = get_scorer(cfg['matching'].get('algorithm'))
+
+    timings = {}
+    for score_cutoff in (False, True):
+        start = time.perf_counter()
+        results = [score_candidates(names, candidates_df, scorer, score_cutoff) for names, candidates_df in groups]
+        timings[score_cutoff] = (time.perf_counter() - start, results)
+
+    for full, cut in zip(timings[False][1], timings[True][1]):
+        assert np.array_equal(full.max(axis=1), cut.max(axis=1)), "Best scores differ"
+        assert np.array_equal(full.argmax(axis=1), cut.argmax(axis=1)), "Best candidates differ"
+
+    total, skipped, pruned = np.sum(
+        [count_facility_comparisons(names, candidates_df, scorer) for names, candidates_df in groups], axis=0
+    )
+
+    school_count = sum(len(names) for names, _ in groups)
+    print("=" * 80)
+    print(f"Scorer: {scorer.name}")
+    print(f"Schools: {school_count} in {len(groups)} cities")
+    print(f"Facility name comparisons: {total}")
+    print(f"  skipped after a perfect score: {skipped} ({100 * skipped / max(total, 1):.1f}%)")
+    print(f"  pruned in total (skipped or below cutoff): {pruned} ({100 * pruned / max(total, 1):.1f}%)")
+    print(f"Scoring time without cutoff: {timings[False][0]:.3f}s")
+    print(f"Scoring time with cutoff:    {timings[True][0]:.3f}s")
+    print("Best scores and candidates identical: yes")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Re-classify matched schools under other confidence thresholds, without rescoring."""
+
+import argparse
+import time
+from pathlib import Path
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.validation.threshold_sweep import (
+    MATCH_METHODS,
+    classify,
+    load_match_scores,
+    sweep
+)
+
+
+def print_sweep(rows, baseline):
+    """Print method counts per threshold pair, with the change from the stored run."""
+    header = f"{'high':>6} {'medium':>6} " + ' '.join(f"{method:>16}" for method in MATCH_METHODS)
+    print(header + f" {'changed':>8} {'rerun':>6}")
+    for row in rows:
+        cells = []
+        for method in MATCH_METHODS:
+            delta = row[method] - baseline[method]
+            cells.append(f"{row[method]:>16}" if delta == 0 else f"{f'{row[method]} ({delta:+d})':>16}")
+        print(f"{row['high']:>6g} {row['medium']:>6g} " + ' '.join(cells) + f" {row['changed']:>8} {row['rerun_needed']:>6}")
+
+
+def print_changes(scores, high, medium):
+    """List the schools whose method changes under the given thresholds."""
+    methods = classify(scores, high, medium)
+    for position in (methods != scores['methods']).nonzero()[0]:
+        print(
+            f"{scores['school_names'][position]} ({scores['cities'][position]}): "
+            f"{MATCH_METHODS[scores['methods'][position]]} -> {MATCH_METHODS[methods[position]]} "
+            f"(score {scores['scores'][position]:.1f})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--high', type=float, nargs='+', help="High confidence threshold(s) (default: from config)")
+    parser.add_argument('--medium', type=float, nargs='+', help="Medium confidence threshold(s) (default: from config)")
+    parser.add_argument('--list', action='store_true', help="List the schools changing method (single threshold pair)")
+    args = parser.parse_args()
+
+    cfg = get_config()
+    scores = load_match_scores(Path(cfg['paths']['match_scores_file']))
+    stored_high, stored_medium = scores['thresholds']
+    highs = args.high or [cfg['matching']['high_confidence_threshold']]
+    mediums = args.medium or [cfg['matching']['medium_confidence_threshold']]
+
+    start = time.perf_counter()
+    baseline = sweep(scores, [stored_high], [stored_medium])[0]
+    rows = sweep(scores, highs, mediums)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(scores['methods'])} schools, stored run: high {stored_high:g}, medium {stored_medium:g}")
+    print_sweep([baseline] + rows, baseline)
+    print(f"Re-classified {len(rows)} threshold pair(s) in {1000 * elapsed:.1f} ms")
+    if any(row['rerun_needed'] for row in rows):
+        print("'rerun': Budapest schools with a district hint crossing the medium threshold; "
+              "rerun 04_merger_and_excel.py for their exact result")
+
+    if args.list:
+        if len(rows) != 1:
+            parser.error("--list needs a single --high and --medium value")
+        print_changes(scores, rows[0]['high'], rows[0]['medium'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Run the whole pipeline, rebuilding only the stale stages."""
+
+import argparse
+import logging
+import sys
+from importlib import import_module
+from pathlib import Path
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.common.logger import setup_logging
+from tanulmanyi_versenyek.pipeline.dag import PipelineRunner, Stage
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+log = logging.getLogger('run_pipeline')
+
+
+def build_stages(cfg):
+    """
+    Declare the pipeline stages with their inputs, outputs and dependencies.
+
+    The KIR download does not depend on the competition data, so it runs
+    alongside the crawl and the HTML parsing. Both downloads run every time:
+    they skip existing result pages and unchanged KIR releases themselves,
+    and later stages rebuild only if a download changed their inputs.
+    """
+    paths = cfg['paths']
+    report_file = Path(paths['report_dir']) / 'Bolyai_Analysis_Report.xlsx'
+
+    return [
+        Stage(
+            'download_results',
+            run=import_module('01_raw_downloader').run,
+            outputs=[paths['raw_html_dir']],
+            always_run=True
+        ),
+        Stage(
+            'parse_html',
+            run=import_module('02_html_parser').run,
+            inputs=[paths['raw_html_dir']],
+            outputs=[paths['processed_csv_dir']],
+            depends_on=['download_results']
+        ),
+        Stage(
+            'download_kir',
+            run=import_module('03_download_helper_data').run,
+            outputs=[cfg['kir']['locations_file']],
+            always_run=True
+        ),
+        Stage(
+            'merge_and_report',
+            run=import_module('04_merger_and_excel').run,
+            inputs=[
+                paths['processed_csv_dir'],
+                cfg['kir']['locations_file'],
+                cfg['validation']['city_mapping_file'],
+                cfg['validation']['school_mapping_file'],
+                paths['template_file'],
+                'config.yaml'
+            ],
+            outputs=[
+                paths['master_csv'], paths['audit_file'], paths['match_scores_file'], paths['review_file'],
+                paths['validation_report'], report_file
+            ],
+            depends_on=['parse_html', 'download_kir']
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--force', nargs='*', metavar='STAGE',
+                        help="Rebuild these stages (all stages when no name is given)")
+    parser.add_argument('--dry-run', action='store_true', help="Only show which stages would run")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum number of stages running at once")
+    args = parser.parse_args()
+
+    setup_logging()
+    log.info("Script starting: run_pipeline.py")
+
+    cfg = get_config()
+    runner = PipelineRunner(build_stages(cfg), max_workers=args.workers)
+    force = runner.topological_order() if args.force == [] else args.force or []
+
+    status = runner.run(cfg, force=force, dry_run=args.dry_run)
+    if 'failed' in status.values():
+        log.error("Pipeline failed")
+        return 1
+
+    log.info("Script completed successfully")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,90 @@
+"""Memory-mapped columnar storage for text tables."""
+
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+_MANIFEST = 'columns.json'
+
+
+def _entry_dir(directory: Path, key: str) -> Path:
+    return directory / key[:16]
+
+
+def save_columns(df: pd.DataFrame, directory: Path, key: str) -> None:
+    """
+    Store a DataFrame as one dictionary-encoded column per file.
+
+    Each column is written as an int32 code array (.npy, memory-mappable)
+    and its distinct values go to a JSON manifest; missing values get code
+    -1. Entries stored under other keys in the directory are removed.
+
+    Args:
+        df: DataFrame of text columns
+        directory: Directory holding the store
+        key: Content key of the stored table, e.g. a source file digest
+    """
+    entry = _entry_dir(directory, key)
+    tmp_entry = entry.with_name(entry.name + '.tmp')
+    shutil.rmtree(tmp_entry, ignore_errors=True)
+    tmp_entry.mkdir(parents=True)
+
+    columns = []
+    for position, column in enumerate(df.columns):
+        categorical = df[column].astype('category')
+        np.save(tmp_entry / f"{position}.npy", categorical.cat.codes.to_numpy(dtype=np.int32))
+        columns.append({'name': column, 'values': categorical.cat.categories.tolist()})
+
+    with open(tmp_entry / _MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'rows': len(df), 'columns': columns}, f, ensure_ascii=False)
+
+    for stale in directory.iterdir():
+        if stale != tmp_entry:
+            shutil.rmtree(stale, ignore_errors=True)
+    tmp_entry.rename(entry)
+    log.info(f"Stored {len(df)} rows in columnar cache {entry}")
+
+
+def load_columns(directory: Path, key: str) -> Optional[pd.DataFrame]:
+    """
+    Load a table stored by save_columns, or None if no entry exists for key.
+
+    The code arrays are memory-mapped, so loading costs little more than
+    reading the manifest. Columns come back as category dtype.
+
+    Args:
+        directory: Directory holding the store
+        key: Content key the table was stored under
+
+    Returns:
+        pd.DataFrame or None
+    """
+    entry = _entry_dir(directory, key)
+    manifest_path = entry / _MANIFEST
+    if not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['key'] != key:
+            return None
+
+        data = {}
+        for position, column in enumerate(manifest['columns']):
+            codes = np.load(entry / f"{position}.npy", mmap_mode='r')
+            data[column['name']] = pd.Categorical.from_codes(codes, categories=column['values'])
+        df = pd.DataFrame(data)
+    except Exception as e:
+        log.warning(f"Failed to read columnar cache {entry}, rebuilding: {e}")
+        return None
+
+    log.info(f"Loaded {len(df)} rows from columnar cache {entry}")
+    return df
@@ -0,0 +1,156 @@
+"""Loading of the KIR spreadsheet into a normalized table, cached in columnar form."""
+
+import logging
+import re
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from tanulmanyi_versenyek.common.columnar_store import load_columns, save_columns
+from tanulmanyi_versenyek.common.stage_cache import file_digest
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+REQUIRED_KIR_COLUMNS = [
+    'Intézmény megnevezése',
+    'A feladatellátási hely települése',
+    'A feladatellátási hely vármegyéje',
+    'A feladatellátási hely régiója',
+    'A feladatellátási hely megnevezése'
+]
+
+# Bump when _normalize_case_if_uppercase or _read_kir_excel changes, to rebuild cached KIR tables
+KIR_NORMALIZATION_VERSION = 1
+
+NAME_COLUMNS = ['Intézmény megnevezése', 'A feladatellátási hely megnevezése']
+
+
+def _normalize_case_if_uppercase(text: str) -> str:
+    """Convert FULL UPPERCASE to normal case with exceptions."""
+    if pd.isna(text):
+        return text
+    
+    # Only transform if ENTIRE string is uppercase
+    if text != text.upper():
+        return text
+    
+    # Hardcoded lowercase words (common Hungarian conjunctions/articles)
+    lowercase_words = {'és', 'a', 'az', 'de', 'vagy'}
+    
+    words = text.split()
+    normalized = []
+    
+    for i, word in enumerate(words):
+        # Check for Roman numeral with dot (e.g., "XII.")
+        if re.match(r'^[IVX]+\.$', word):
+            # Keep uppercase: "XII."
+            normalized.append(word)
+        # Check if word is lowercase exception
+        elif word.lower() in lowercase_words:
+            normalized.append(word.lower())
+        else:
+            normalized.append(word.title())
+    
+    return ' '.join(normalized)
+
+
+def _read_kir_excel(filepath: Path) -> pd.DataFrame:
+    """
+    Read the KIR spreadsheet, validate its columns and normalize the school names.
+
+    The first worksheet is streamed row by row in read-only mode and only
+    REQUIRED_KIR_COLUMNS are kept, so the whole workbook is never in memory.
+    """
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+
+        missing_columns = [col for col in REQUIRED_KIR_COLUMNS if col not in header]
+
+        if missing_columns:
+            raise ValueError(
+                f"KIR database missing required columns.\n"
+                f"Expected: {REQUIRED_KIR_COLUMNS}\n"
+                f"Missing: {missing_columns}\n"
+                f"Found: {header}"
+            )
+
+        column_positions = [header.index(col) for col in REQUIRED_KIR_COLUMNS]
+        data = [
+            [row[position] if position < len(row) else None for position in column_positions]
+            for row in rows
+            if any(value is not None for value in row)
+        ]
+    finally:
+        workbook.close()
+
+    kir_df = pd.DataFrame(data, columns=REQUIRED_KIR_COLUMNS).fillna(np.nan)
+
+    # Normalize FULL UPPERCASE names
+    kir_df['Intézmény megnevezése'] = kir_df['Intézmény megnevezése'].apply(_normalize_case_if_uppercase)
+    kir_df['A feladatellátási hely megnevezése'] = kir_df['A feladatellátási hely megnevezése'].apply(_normalize_case_if_uppercase)
+
+    return kir_df
+
+
+def _kir_table_location(filepath: Path, config) -> Tuple[Path, str]:
+    """Columnar cache directory and key of a KIR spreadsheet."""
+    cache_dir = Path(config['paths']['cache_dir']) / 'kir_table'
+    return cache_dir, f"{file_digest(filepath)}-v{KIR_NORMALIZATION_VERSION}"
+
+
+def _store_kir_table(kir_df: pd.DataFrame, cache_dir: Path, key: str) -> None:
+    try:
+        save_columns(kir_df, cache_dir, key)
+    except Exception as e:
+        log.warning(f"Failed to store KIR columnar cache: {e}")
+
+
+def convert_kir_file(config) -> None:
+    """
+    Convert the downloaded KIR spreadsheet into its columnar cache entry.
+
+    Called right after a download, so the spreadsheet is parsed once per
+    KIR release instead of on the first merge run. Does nothing when the
+    cache is disabled or the entry already exists.
+
+    Args:
+        config: Configuration dictionary
+    """
+    if not config.get('cache', {}).get('enabled', True):
+        return
+
+    filepath = Path(config['kir']['locations_file'])
+    cache_dir, key = _kir_table_location(filepath, config)
+    if load_columns(cache_dir, key) is not None:
+        log.info("KIR columnar cache is up to date")
+        return
+
+    log.info(f"Converting {filepath} to columnar cache")
+    _store_kir_table(_read_kir_excel(filepath), cache_dir, key)
+
+
+def load_kir_table(filepath: Path, config) -> pd.DataFrame:
+    """
+    Load the normalized KIR table, from the columnar cache when possible.
+
+    The cache entry is keyed by the spreadsheet's content hash and
+    KIR_NORMALIZATION_VERSION, so a new KIR download or a change to the name
+    normalization rebuilds it.
+    """
+    if not config.get('cache', {}).get('enabled', True):
+        return _read_kir_excel(filepath)
+
+    cache_dir, key = _kir_table_location(filepath, config)
+
+    kir_df = load_columns(cache_dir, key)
+    if kir_df is not None:
+        return kir_df.astype({col: object for col in NAME_COLUMNS})
+
+    kir_df = _read_kir_excel(filepath)
+    _store_kir_table(kir_df, cache_dir, key)
+    return kir_df
@@ -0,0 +1,77 @@
+"""Shared column dtypes for competition DataFrames."""
+
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+# Low-cardinality text columns: a few years, one subject, hundreds of cities
+# and schools against tens of thousands of rows.
+CATEGORY_COLUMNS = ['ev', 'targy', 'iskola_nev', 'varos', 'varmegye', 'regio']
+
+INTEGER_COLUMNS = {
+    'helyezes': 'int16',
+    'evfolyam': 'int8',
+}
+
+MASTER_DTYPES = {**{col: 'category' for col in CATEGORY_COLUMNS}, **INTEGER_COLUMNS}
+
+KIR_CATEGORY_COLUMNS = [
+    'A feladatellátási hely települése',
+    'A feladatellátási hely vármegyéje',
+    'A feladatellátási hely régiója'
+]
+
+MATCH_RESULT_CATEGORY_COLUMNS = ['match_method', 'status']
+
+
+def _nullable(dtype: str) -> str:
+    """Nullable counterpart of a numpy integer dtype, e.g. int16 -> Int16."""
+    return dtype[0].upper() + dtype[1:]
+
+
+def apply_schema(df: pd.DataFrame, category_columns=None, integer_columns=None) -> pd.DataFrame:
+    """
+    Cast the known columns of a DataFrame to their compact dtypes.
+
+    Columns missing from df are ignored. Integer columns holding missing
+    values get the nullable integer dtype of the same width.
+
+    Args:
+        df: DataFrame to convert
+        category_columns: Columns stored as category (default: CATEGORY_COLUMNS)
+        integer_columns: Column -> integer dtype (default: INTEGER_COLUMNS)
+
+    Returns:
+        pd.DataFrame: A new DataFrame with converted columns
+    """
+    if category_columns is None:
+        category_columns = CATEGORY_COLUMNS
+    if integer_columns is None:
+        integer_columns = INTEGER_COLUMNS
+
+    dtypes = {col: 'category' for col in category_columns if col in df.columns}
+    for col, dtype in integer_columns.items():
+        if col in df.columns:
+            dtypes[col] = _nullable(dtype) if df[col].isna().any() else dtype
+
+    return df.astype(dtypes)
+
+
+def iter_master_csv(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the master CSV chunk by chunk, closing the file when done or closed early.
+
+    Text columns stay plain objects: categories built per chunk would differ
+    between chunks, so apply_schema belongs to the combined rows.
+
+    Args:
+        path: Path to the semicolon-separated master CSV
+        chunk_rows: Number of rows per chunk
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the master data
+    """
+    dtype = {col: object for col in CATEGORY_COLUMNS}
+    with pd.read_csv(path, sep=';', encoding='utf-8', dtype=dtype, chunksize=chunk_rows) as reader:
+        yield from reader
@@ -0,0 +1,137 @@
+"""Content-addressed cache for pipeline step outputs."""
+
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Iterable, Optional
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's content, or a marker if the file does not exist."""
+    if not path.exists():
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_digest(module: ModuleType) -> str:
+    """SHA-256 of a module's source file, used as the code version of a step."""
+    return file_digest(Path(inspect.getsourcefile(module)))
+
+
+class StageCache:
+    """
+    Caches the output of pipeline steps under a key derived from their inputs.
+
+    A step's key covers the content of its input files, the config section it
+    reads, the source code of the modules implementing it and the keys of the
+    upstream steps it consumes. Unchanged steps are reloaded from disk instead
+    of being recomputed.
+    """
+
+    def __init__(self, cache_dir: Path, enabled: bool = True):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding one pickle file per cached step
+            enabled: When False, every step is recomputed and nothing is stored
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.hits = []
+        self.misses = []
+
+    def key(
+        self,
+        step: str,
+        inputs: Iterable[Path] = (),
+        config_section: Optional[dict] = None,
+        code: Iterable[ModuleType] = (),
+        upstream: Iterable[str] = ()
+    ) -> str:
+        """
+        Compute the content-addressed key of a step.
+
+        Args:
+            step: Step name
+            inputs: Input files whose content the step reads
+            config_section: Configuration values the step depends on
+            code: Modules implementing the step
+            upstream: Keys of the steps whose output this step consumes
+
+        Returns:
+            Hex digest identifying the step's output
+        """
+        parts = {
+            'step': step,
+            'inputs': {str(path): file_digest(Path(path)) for path in sorted(inputs)},
+            'config': config_section,
+            'code': {module.__name__: code_digest(module) for module in code},
+            'upstream': list(upstream)
+        }
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, step: str, key: str) -> Path:
+        return self.cache_dir / f"{step}-{key[:16]}.pkl"
+
+    def get_or_compute(self, step: str, key: str, compute: Callable):
+        """
+        Return the cached output of a step, computing and storing it on a miss.
+
+        Args:
+            step: Step name
+            key: Key from key()
+            compute: Zero-argument callable producing the step's output
+
+        Returns:
+            The step's output
+        """
+        if not self.enabled:
+            return compute()
+
+        path = self._path(step, key)
+        if path.exists():
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                self.hits.append(step)
+                log.info(f"Cache hit: {step} ({key[:12]})")
+                return value
+            except Exception as e:
+                log.warning(f"Failed to read cache entry {path.name}, recomputing: {e}")
+
+        self.misses.append(step)
+        log.info(f"Cache miss: {step} ({key[:12]})")
+        value = compute()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.glob(f"{step}-*.pkl"):
+            stale.unlink()
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        return value
+
+    def log_summary(self) -> None:
+        """Log cache hit and miss counts for the run."""
+        if not self.enabled:
+            log.info("Stage cache disabled")
+            return
+        log.info(
+            f"Stage cache: {len(self.hits)} hit(s) {self.hits}, "
+            f"{len(self.misses)} miss(es) {self.misses}"
+        )
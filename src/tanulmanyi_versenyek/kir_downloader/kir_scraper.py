@@ -1,4 +1,6 @@
+import json
 import logging
+import os
 import re
 from pathlib import Path
 from datetime import datetime
@@ -7,14 +9,26 @@ import requests
 from bs4 import BeautifulSoup
 import urllib3
 
+from tanulmanyi_versenyek.common.kir_table import convert_kir_file
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 log = logging.getLogger(__name__.split('.')[-1])
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def create_session():
+    """HTTP session reusing one keep-alive connection for the index page and the file."""
+    session = requests.Session()
+    session.verify = False
+    return session
+
 
-def get_latest_kir_url(index_url, pattern):
+def get_latest_kir_url(index_url, pattern, session=None):
     log.info(f"Fetching KIR index page: {index_url}")
-    response = requests.get(index_url, timeout=30, verify=False)
+    http = session or requests
+    response = http.get(index_url, timeout=30, verify=False)
     response.raise_for_status()
 
     soup = BeautifulSoup(response.content, 'html.parser')
@@ -37,27 +51,135 @@ def get_latest_kir_url(index_url, pattern):
     return matching_links[0]
 
 
-def download_kir_file(url, output_path):
-    log.info(f"Downloading KIR file from: {url}")
-    response = requests.get(url, stream=True, timeout=60, verify=False)
-    response.raise_for_status()
+def _metadata_path(path):
+    return path.with_name(path.name + '.meta.json')
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+def _read_metadata(path):
+    """Download metadata (url, etag, last_modified) stored next to a file; empty if absent."""
+    try:
+        with open(_metadata_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_metadata(path, metadata):
+    with open(_metadata_path(path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+
+def _remove_metadata(path):
+    _metadata_path(path).unlink(missing_ok=True)
+
+
+def _request_headers(url, output_path, part_path, offset):
+    headers = {}
+
+    current = _read_metadata(output_path)
+    if output_path.exists() and current.get('url') == url:
+        if current.get('etag'):
+            headers['If-None-Match'] = current['etag']
+        if current.get('last_modified'):
+            headers['If-Modified-Since'] = current['last_modified']
 
-    file_size = output_path.stat().st_size
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        partial = _read_metadata(part_path)
+        validator = partial.get('etag') or partial.get('last_modified')
+        if validator:
+            headers['If-Range'] = validator
+
+    return headers
+
+
+def _expected_size(response, offset):
+    """Total file size announced by the server, or None if unknown."""
+    content_range = response.headers.get('Content-Range')
+    if content_range:
+        match = re.match(r'bytes (\d+)-\d+/(\d+)', content_range)
+        if not match or int(match.group(1)) != offset:
+            raise IOError(f"Unexpected Content-Range for resumed download: {content_range}")
+        return int(match.group(2))
+
+    content_length = response.headers.get('Content-Length')
+    return int(content_length) if content_length is not None else None
+
+
+def download_kir_file(url, output_path, session=None):
+    """
+    Download the KIR file unless the local copy is already current.
+
+    The file is fetched into a .part file next to output_path, which only
+    replaces output_path after its size matches the size announced by the
+    server. A .part file left by an interrupted download of the same URL is
+    resumed with an HTTP Range request. The ETag and Last-Modified headers
+    of the installed file are kept in a .meta.json file and sent back as
+    conditional headers, so an unchanged release is not transferred again.
+
+    Args:
+        url: URL of the KIR spreadsheet
+        output_path: Final location of the spreadsheet
+        session: Optional requests session to reuse
+
+    Returns:
+        bool: True if a new file was installed, False if the local copy is current
+    """
+    session = session or create_session()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = output_path.with_name(output_path.name + '.part')
+
+    offset = 0
+    if part_path.exists() and _read_metadata(part_path).get('url') == url:
+        offset = part_path.stat().st_size
+
+    headers = _request_headers(url, output_path, part_path, offset)
+    log.info(f"Downloading KIR file from: {url}" + (f" (resuming at byte {offset:,})" if offset else ""))
+
+    with session.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 304:
+            log.info(f"KIR file unchanged since last download: {output_path}")
+            return False
+        if response.status_code == 416 and offset:
+            log.warning(f"Cannot resume from {part_path}, restarting the download")
+            part_path.unlink()
+            _remove_metadata(part_path)
+            return download_kir_file(url, output_path, session)
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            offset = 0
+        expected_size = _expected_size(response, offset)
+
+        _write_metadata(part_path, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        })
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+
+    file_size = part_path.stat().st_size
+    if expected_size is not None and file_size != expected_size:
+        raise IOError(
+            f"Incomplete KIR download: {file_size:,} of {expected_size:,} bytes, "
+            f"kept {part_path} to resume"
+        )
+
+    os.replace(part_path, output_path)
+    os.replace(_metadata_path(part_path), _metadata_path(output_path))
     log.info(f"Downloaded {file_size:,} bytes to {output_path}")
+    return True
 
 
-def clear_helper_data_dir(dir_path):
+def clear_helper_data_dir(dir_path, keep=()):
     if not dir_path.exists():
         log.info(f"Directory does not exist: {dir_path}")
         return
 
-    files = [f for f in dir_path.iterdir() if f.is_file()]
+    keep = {Path(path).resolve() for path in keep}
+    files = [f for f in dir_path.iterdir() if f.is_file() and f.resolve() not in keep]
     for file in files:
         file.unlink()
 
@@ -65,15 +187,27 @@ def clear_helper_data_dir(dir_path):
 
 
 def download_latest_kir_data(config):
+    """
+    Download the latest KIR release, keeping the current file if it is unchanged.
+
+    Older files in the helper data directory are removed only after the new
+    release has been installed, so a failed download never leaves the
+    pipeline without KIR data.
+    """
     helper_dir = Path(config['paths']['helper_data_dir'])
-    clear_helper_data_dir(helper_dir)
+    session = create_session()
 
     url = get_latest_kir_url(
         config['kir']['index_url'],
-        config['kir']['locations_filename_pattern']
+        config['kir']['locations_filename_pattern'],
+        session
     )
 
     output_path = Path(config['kir']['locations_file'])
-    download_kir_file(url, output_path)
+    if download_kir_file(url, output_path, session):
+        clear_helper_data_dir(helper_dir, keep=[output_path, _metadata_path(output_path)])
+
+    if config['kir'].get('convert_on_download', False):
+        convert_kir_file(config)
 
     return output_path
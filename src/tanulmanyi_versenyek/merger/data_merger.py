@@ -1,33 +1,30 @@
 import logging
 import json
+from itertools import islice
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+from tanulmanyi_versenyek.common.schema import apply_schema, iter_master_csv
+from tanulmanyi_versenyek.merger.excel_writer import EXCEL_MAX_ROWS, ROWS_PER_FLUSH, TemplateWorkbookWriter
+from tanulmanyi_versenyek.merger.rankings import build_ranking_sheets
+
 log = logging.getLogger(__name__.split('.')[-1])
 
 
-def merge_processed_data(cfg):
+DEDUP_COLUMNS = ['ev', 'evfolyam', 'iskola_nev', 'helyezes']
+
+
+def _load_file_data(csv_files):
     """
-    Merge all processed CSV files into a single master DataFrame.
-    Performs deduplication based on (ev, evfolyam, iskola_nev, helyezes).
-    Handles Írásbeli/Szóbeli merge: when both rounds exist for same year+grade,
-    drops top N rows from Írásbeli (where N = Szóbeli row count).
+    Load processed CSV files keyed by (year, grade) and round.
 
     Args:
-        cfg: Configuration dictionary
+        csv_files: Processed CSV paths named {subject}_{year}_{grade}_{round}.csv
 
     Returns:
-        tuple: (pd.DataFrame, int) - The merged DataFrame and number of duplicates removed
+        dict: {(year, grade): {round_type: DataFrame}}
     """
-    processed_dir = Path(cfg['paths']['processed_csv_dir'])
-
-    csv_files = list(processed_dir.glob('*.csv'))
-    if not csv_files:
-        log.warning(f"No CSV files found in {processed_dir}")
-        return pd.DataFrame(), 0
-
-    log.info(f"Found {len(csv_files)} CSV files to merge")
-
     file_data = {}
     for csv_file in csv_files:
         try:
@@ -46,11 +43,14 @@ def merge_processed_data(cfg):
             log.debug(f"Loaded {csv_file.name}: {len(df)} rows")
         except Exception as e:
             log.error(f"Failed to load {csv_file.name}: {e}")
+    return file_data
 
-    if not file_data:
-        log.error("No dataframes loaded successfully")
-        return pd.DataFrame(), 0
 
+def _combine_rounds(file_data):
+    """
+    Combine the rounds of each year and grade into one list of DataFrames.
+    When both rounds exist, drops top N rows from Írásbeli (N = Szóbeli row count).
+    """
     dataframes = []
     for key, rounds in file_data.items():
         year, grade = key
@@ -67,19 +67,121 @@ def merge_processed_data(cfg):
             for round_type, df in rounds.items():
                 dataframes.append(df)
                 log.debug(f"{year} {grade} {round_type}: {len(df)} rows (no merge needed)")
+    return dataframes
+
 
-    master_df = pd.concat(dataframes, ignore_index=True)
+def _deduplicate(df):
+    """Drop duplicate placements, keeping the first. Returns (DataFrame, removed count)."""
+    initial_count = len(df)
+    df = df.drop_duplicates(subset=DEDUP_COLUMNS, keep='first')
+    return apply_schema(df), initial_count - len(df)
+
+
+def merge_processed_data(cfg):
+    """
+    Merge all processed CSV files into a single master DataFrame.
+    Performs deduplication based on (ev, evfolyam, iskola_nev, helyezes).
+    Handles Írásbeli/Szóbeli merge: when both rounds exist for same year+grade,
+    drops top N rows from Írásbeli (where N = Szóbeli row count).
+
+    Args:
+        cfg: Configuration dictionary
+
+    Returns:
+        tuple: (pd.DataFrame, int) - The merged DataFrame and number of duplicates removed
+    """
+    processed_dir = Path(cfg['paths']['processed_csv_dir'])
+
+    csv_files = list(processed_dir.glob('*.csv'))
+    if not csv_files:
+        log.warning(f"No CSV files found in {processed_dir}")
+        return pd.DataFrame(), 0
+
+    log.info(f"Found {len(csv_files)} CSV files to merge")
+
+    file_data = _load_file_data(csv_files)
+    if not file_data:
+        log.error("No dataframes loaded successfully")
+        return pd.DataFrame(), 0
+
+    master_df = pd.concat(_combine_rounds(file_data), ignore_index=True)
     log.info(f"Concatenated all files: {len(master_df)} total rows")
 
-    initial_count = len(master_df)
-    master_df = master_df.drop_duplicates(subset=['ev', 'evfolyam', 'iskola_nev', 'helyezes'], keep='first')
+    master_df, duplicates_removed = _deduplicate(master_df)
     final_count = len(master_df)
-    duplicates_removed = initial_count - final_count
 
     log.info(f"Deduplication complete: removed {duplicates_removed} duplicates, {final_count} rows remaining")
 
     return master_df, duplicates_removed
 
+
+def _scan_years(file_groups):
+    """
+    Find the (year, grade) file groups holding rows of each competition year.
+
+    Args:
+        file_groups: {(year, grade): [csv_file, ...]} in merge order
+
+    Returns:
+        dict: {ev value or None for missing: [(year, grade), ...]}
+    """
+    years = {}
+    for key, csv_files in file_groups.items():
+        for csv_file in csv_files:
+            try:
+                values = pd.read_csv(csv_file, sep=';', encoding='utf-8', usecols=['ev'], dtype=str)['ev'].unique()
+            except Exception as e:
+                log.error(f"Failed to scan {csv_file.name}: {e}")
+                continue
+            for value in values:
+                group_keys = years.setdefault(None if pd.isna(value) else value, [])
+                if key not in group_keys:
+                    group_keys.append(key)
+    return years
+
+
+def iter_year_batches(cfg):
+    """
+    Yield the merged data one competition year (ev value) at a time.
+
+    The deduplication key contains the year, so deduplicating each year on
+    its own gives the same rows as merge_processed_data() while only the
+    files holding that year are in memory. Files are first scanned for the
+    years they contain, so rows filed under another year are still merged
+    with their own year.
+
+    Args:
+        cfg: Configuration dictionary
+
+    Yields:
+        tuple: (year, pd.DataFrame, int) - year, its merged rows and duplicates removed
+    """
+    processed_dir = Path(cfg['paths']['processed_csv_dir'])
+
+    file_groups = {}
+    for csv_file in processed_dir.glob('*.csv'):
+        parts = csv_file.stem.split('_')
+        file_groups.setdefault((parts[1], parts[2]), []).append(csv_file)
+
+    if not file_groups:
+        log.warning(f"No CSV files found in {processed_dir}")
+        return
+
+    years = _scan_years(file_groups)
+    log.info(f"Found {sum(len(files) for files in file_groups.values())} CSV files with {len(years)} years")
+
+    for year in sorted(years, key=lambda value: (value is None, value or '')):
+        csv_files = [csv_file for key in years[year] for csv_file in file_groups[key]]
+        file_data = _load_file_data(csv_files)
+        if not file_data:
+            continue
+        batch_df = pd.concat(_combine_rounds(file_data), ignore_index=True)
+        in_year = batch_df['ev'].isna() if year is None else batch_df['ev'].astype(str) == year
+        batch_df, duplicates_removed = _deduplicate(batch_df[in_year])
+        log.info(f"Year {year}: {len(batch_df)} rows, removed {duplicates_removed} duplicates")
+        yield year, batch_df, duplicates_removed
+
+
 def generate_validation_report(df, cfg, duplicates_removed=0, city_corrections=None, match_results=None):
     """
     Generate a validation report with data quality metrics.
@@ -91,16 +193,34 @@ def generate_validation_report(df, cfg, duplicates_removed=0, city_corrections=N
         city_corrections: Dict with 'corrected' and 'dropped' counts (or None)
         match_results: Optional DataFrame with school matching results
     """
+    unique_schools = df['iskola_nev'].nunique() if 'iskola_nev' in df.columns else 0
+    write_validation_report(
+        cfg, len(df), df.isnull().sum().to_dict(), unique_schools,
+        duplicates_removed, city_corrections, match_results
+    )
+
+
+def write_validation_report(cfg, total_rows, null_counts, unique_schools, duplicates_removed=0,
+                            city_corrections=None, match_results=None):
+    """
+    Write the validation report from precomputed data quality metrics.
+
+    Args:
+        cfg: Configuration dictionary
+        total_rows: Number of rows in the master data
+        null_counts: Dict of column -> number of missing values
+        unique_schools: Number of distinct school names
+        duplicates_removed: Number of duplicate rows removed during merge
+        city_corrections: Dict with 'corrected' and 'dropped' counts (or None)
+        match_results: Optional DataFrame with school matching results
+    """
     report_path = Path(cfg['paths']['validation_report'])
     
     if city_corrections is None:
         city_corrections = {'corrected': 0, 'dropped': 0}
 
-    total_rows = len(df)
-    null_counts = df.isnull().sum().to_dict()
     null_percentages = {col: (count / total_rows * 100) if total_rows > 0 else 0
                        for col, count in null_counts.items()}
-    unique_schools = df['iskola_nev'].nunique() if 'iskola_nev' in df.columns else 0
 
     report = {
         'total_rows': total_rows,
@@ -118,6 +238,7 @@ def generate_validation_report(df, cfg, duplicates_removed=0, city_corrections=N
             'manual_drop': len(match_results[match_results['match_method'] == 'MANUAL_DROP']),
             'auto_high_confidence': len(match_results[match_results['match_method'] == 'AUTO_HIGH']),
             'auto_medium_confidence': len(match_results[match_results['match_method'] == 'AUTO_MEDIUM']),
+            'auto_global': len(match_results[match_results['match_method'] == 'AUTO_GLOBAL']),
             'dropped_low_confidence': len(match_results[match_results['match_method'] == 'DROPPED']),
             'no_match': len(match_results[match_results['match_method'] == 'NO_MATCH']),
             'records_kept': len(match_results[match_results['status'] == 'APPLIED']),
@@ -130,19 +251,73 @@ def generate_validation_report(df, cfg, duplicates_removed=0, city_corrections=N
     log.info(f"Validation report saved to {report_path}")
     log.info(f"Total rows: {total_rows}, Unique schools: {unique_schools}, Duplicates removed: {duplicates_removed}")
 
-def generate_excel_report(df, cfg):
+def _plan_data_shards(group_sizes, max_rows):
     """
-    Generate Excel report by populating template with data.
-    Template contains pivot tables that work with the populated data.
+    Split consecutive row groups into sheet-sized shards, keeping each group
+    in one shard unless that group alone exceeds the sheet capacity.
 
     Args:
-        df: Master DataFrame
-        cfg: Configuration dictionary
+        group_sizes: (value, row count) tuples in the order the rows are written
+        max_rows: Maximum number of rows per sheet, header included
+
+    Returns:
+        list: (values, row count) tuples - group values and number of rows per shard
     """
-    from pathlib import Path
-    from openpyxl import load_workbook
-    import shutil
+    capacity = max_rows - 1
+    shards = []
+    shard_values, shard_size = [], 0
+
+    for value, size in group_sizes:
+        for start in range(0, size, capacity):
+            chunk_size = min(capacity, size - start)
+            if shard_size + chunk_size > capacity:
+                shards.append((shard_values, shard_size))
+                shard_values, shard_size = [], 0
+            if not shard_values or shard_values[-1] != value:
+                shard_values.append(value)
+            shard_size += chunk_size
+
+    if shard_size:
+        shards.append((shard_values, shard_size))
+    return shards
+
+
+def _write_data_shards(writer, rows, group_sizes, column_count, max_rows, shard_column):
+    """Write rows across Data, Data_2, ... sheets and list the shards in a Data_Index sheet."""
+    shards = _plan_data_shards(group_sizes, max_rows)
+    rows = iter(rows)
+    index_rows = []
+
+    for number, (values, size) in enumerate(shards, start=1):
+        sheet_name = 'Data' if number == 1 else f'Data_{number}'
+        shard_rows = islice(rows, size)
+        if number == 1:
+            row_count = writer.fill_sheet(sheet_name, shard_rows, column_count)
+        else:
+            row_count = writer.add_sheet(sheet_name, shard_rows, column_count, like='Data')
+        index_rows.append((sheet_name, values[0], values[-1], row_count))
+        log.info(f"Wrote {row_count} rows to {sheet_name} sheet ({shard_column} {values[0]} - {values[-1]})")
+
+    writer.add_sheet(
+        'Data_Index', index_rows, 4,
+        header=['sheet', f'first_{shard_column}', f'last_{shard_column}', 'rows']
+    )
+    log.info(f"Data split into {len(shards)} sheets by {shard_column}, see Data_Index sheet")
+
 
+def _write_excel_report(cfg, rows, row_count, column_count, group_sizes, ranking_sheets):
+    """
+    Stream data rows and ranking sheets into a copy of the report template.
+
+    Args:
+        cfg: Configuration dictionary
+        rows: Iterable of data row tuples, grouped by report.shard_column
+        row_count: Total number of data rows
+        column_count: Number of data columns
+        group_sizes: Callable returning (value, row count) tuples in row order;
+            only called when the rows do not fit into one sheet
+        ranking_sheets: (sheet_name, header, DataFrame) tuples from build_ranking_sheets()
+    """
     template_path = Path(cfg['paths']['template_file'])
     report_dir = Path(cfg['paths']['report_dir'])
     report_dir.mkdir(parents=True, exist_ok=True)
@@ -152,22 +327,87 @@ def generate_excel_report(df, cfg):
         log.error(f"Template file not found: {template_path}")
         return
 
-    shutil.copy(template_path, output_path)
-    log.info(f"Copied template to {output_path}")
+    report_cfg = cfg.get('report', {})
+    max_rows = min(report_cfg.get('max_rows_per_sheet', EXCEL_MAX_ROWS), EXCEL_MAX_ROWS)
+    shard_column = report_cfg.get('shard_column', 'ev')
 
-    wb = load_workbook(output_path)
-    ws_data = wb['Data']
+    with TemplateWorkbookWriter(template_path, output_path) as writer:
+        if row_count + 1 <= max_rows:
+            written = writer.fill_sheet('Data', rows, column_count)
+            log.info(f"Wrote {written} rows to Data sheet")
+        else:
+            _write_data_shards(writer, rows, group_sizes(), column_count, max_rows, shard_column)
 
-    if ws_data.max_row > 1:
-        ws_data.delete_rows(2, ws_data.max_row)
-        log.debug(f"Cleared existing data rows")
+        for sheet_name, header, ranking in ranking_sheets:
+            ranking_rows = ranking.itertuples(index=False, name=None)
+            writer.add_sheet(sheet_name, ranking_rows, len(header), header=header)
+        log.info(f"Wrote {len(ranking_sheets)} ranking sheets")
 
-    for r_idx, row in enumerate(df.itertuples(index=False), start=2):
-        for c_idx, value in enumerate(row, start=1):
-            ws_data.cell(row=r_idx, column=c_idx, value=value)
+    log.info(f"Excel report saved to {output_path}")
 
-    log.info(f"Wrote {len(df)} rows to Data sheet")
 
-    wb.save(output_path)
-    log.info(f"Excel report saved to {output_path}")
-    wb.close()
+def _iter_positions(df, positions, chunk_rows=ROWS_PER_FLUSH):
+    """Yield row tuples of df in the given positional order, copying a chunk at a time."""
+    for start in range(0, len(positions), chunk_rows):
+        yield from df.iloc[positions[start:start + chunk_rows]].itertuples(index=False, name=None)
+
+
+def generate_excel_report(df, cfg):
+    """
+    Generate Excel report by populating template with data.
+    Template contains pivot tables that work with the populated data.
+    Rows are streamed into the Data sheet, so memory use stays flat
+    regardless of the number of rows. When the data does not fit into one
+    sheet, it is split by report.shard_column into Data, Data_2, ... sheets.
+    School, city, county and region rankings (count and weighted, for
+    report.ranking_top_x) are aggregated with pandas and written as static sheets.
+
+    Args:
+        df: Master DataFrame
+        cfg: Configuration dictionary
+    """
+    report_cfg = cfg.get('report', {})
+    max_rows = min(report_cfg.get('max_rows_per_sheet', EXCEL_MAX_ROWS), EXCEL_MAX_ROWS)
+    shard_column = report_cfg.get('shard_column', 'ev')
+    ranking_sheets = build_ranking_sheets(df, report_cfg.get('ranking_top_x', 6))
+
+    if len(df) + 1 <= max_rows:
+        rows = df.itertuples(index=False, name=None)
+        group_sizes = None
+    else:
+        groups = df.groupby(shard_column, sort=True, dropna=False, observed=True).indices
+        rows = _iter_positions(df, np.concatenate(list(groups.values())))
+        group_sizes = lambda: [(value, len(positions)) for value, positions in groups.items()]
+
+    _write_excel_report(cfg, rows, len(df), len(df.columns), group_sizes, ranking_sheets)
+
+
+def generate_excel_report_from_csv(csv_path, cfg, group_sizes, chunk_rows=100000):
+    """
+    Generate the Excel report from the master CSV without loading it whole.
+
+    Data rows are read and written chunk by chunk; the rankings are computed
+    from the rows placed within report.ranking_top_x, which are the only rows
+    they count.
+
+    Args:
+        csv_path: Path to the master CSV, its rows grouped by report.shard_column
+        cfg: Configuration dictionary
+        group_sizes: (value, row count) tuples of report.shard_column in CSV row order
+        chunk_rows: Number of CSV rows read at a time
+    """
+    top_x = cfg.get('report', {}).get('ranking_top_x', 6)
+
+    top_chunks = [chunk[chunk['helyezes'] <= top_x] for chunk in iter_master_csv(csv_path, chunk_rows)]
+    ranking_sheets = build_ranking_sheets(apply_schema(pd.concat(top_chunks, ignore_index=True)), top_x)
+
+    column_count = len(top_chunks[0].columns)
+    row_count = sum(size for _, size in group_sizes)
+
+    # The writer may stop before the last row, so close the reader explicitly
+    chunks = iter_master_csv(csv_path, chunk_rows)
+    rows = (row for chunk in chunks for row in chunk.itertuples(index=False, name=None))
+    try:
+        _write_excel_report(cfg, rows, row_count, column_count, lambda: group_sizes, ranking_sheets)
+    finally:
+        chunks.close()
@@ -0,0 +1,354 @@
+"""Streaming xlsx writer that fills template sheets without loading the workbook."""
+
+import logging
+import numbers
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path, PurePosixPath
+from typing import Iterable, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+EXCEL_MAX_ROWS = 1048576
+ROWS_PER_FLUSH = 1000
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_WORKSHEET_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+_WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+_PLAIN_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheetData>'
+)
+_PLAIN_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def column_letter(index: int) -> str:
+    """Convert 1-based column index to Excel column letters (1 -> A, 27 -> AA)."""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(ref: str, value) -> str:
+    """Render a single cell, empty string for missing values."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ''
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Number):
+        if value != value:
+            return ''
+        return f'<c r="{ref}"><v>{value}</v></c>'
+
+    text = ILLEGAL_CHARACTERS_RE.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _row_xml(row_number: int, values: Sequence, letters: Sequence[str]) -> str:
+    """Render one worksheet row."""
+    cells = ''.join(
+        _cell_xml(f'{letter}{row_number}', value)
+        for letter, value in zip(letters, values)
+    )
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+def _split_sheet_xml(sheet_xml: str) -> tuple[str, str, str]:
+    """Split worksheet XML into (head, header row, tail) around the sheetData rows."""
+    sheet_xml = re.sub(r'<dimension [^>]*/>', '', sheet_xml)
+    empty = re.search(r'<sheetData\s*/>', sheet_xml)
+    if empty:
+        return sheet_xml[:empty.start()] + '<sheetData>', '', '</sheetData>' + sheet_xml[empty.end():]
+
+    start = sheet_xml.index('<sheetData>') + len('<sheetData>')
+    end = sheet_xml.index('</sheetData>')
+    header = re.match(r'<row [^>]*\br="1"[^>]*?(?:/>|>.*?</row>)', sheet_xml[start:end], re.DOTALL)
+    header_xml = header.group(0) if header else ''
+    return sheet_xml[:start], header_xml, sheet_xml[end:]
+
+
+def _sheet_range_pattern(sheet_name: str) -> re.Pattern:
+    """Match absolute A1-style ranges on the given sheet, e.g. Data!$A$1:$H$3233."""
+    quoted = re.escape(f"'{sheet_name}'")
+    plain = re.escape(sheet_name)
+    return re.compile(rf"((?:{quoted}|{plain})!\$A\$1:\$[A-Z]+\$)\d+")
+
+
+def _references_sheet_range(part_name: str) -> bool:
+    """Whether a package part may hold absolute references to worksheet data ranges."""
+    return part_name == 'xl/workbook.xml' or part_name.startswith('xl/pivotCache/pivotCacheDefinition')
+
+
+def _retarget_ranges(xml: str, sheet_name: str, last_row: int) -> str:
+    """Point workbook-level references to the sheet (filters, pivot sources) at the new last row."""
+    xml = _sheet_range_pattern(sheet_name).sub(rf'\g<1>{last_row}', xml)
+    source = re.compile(rf'(<worksheetSource ref="A1:[A-Z]+)\d+("\s+sheet="{re.escape(escape(sheet_name))}")')
+    return source.sub(rf'\g<1>{last_row}\g<2>', xml)
+
+
+def _retarget_autofilter(tail: str, last_row: int) -> str:
+    return re.sub(r'(<autoFilter ref="A1:[A-Z]+)\d+"', rf'\g<1>{last_row}"', tail)
+
+
+class TemplateWorkbookWriter:
+    """
+    Writes a copy of an xlsx template, streaming rows into one worksheet at a time.
+
+    Template sheets can be filled below their header row, and new sheets can be
+    appended either with the layout of an existing template sheet or as plain
+    sheets with a header row. Parts of the template that are not touched
+    (styles, pivot tables, other sheets) are copied byte-for-byte on close.
+    Only one worksheet is generated at a time, so memory use does not grow
+    with the number of rows.
+    """
+
+    def __init__(self, template_path: Path, output_path: Path):
+        """
+        Open the template and create the output package.
+
+        Args:
+            template_path: Path to the xlsx template
+            output_path: Path of the workbook to create
+        """
+        self.template_path = template_path
+        self.output_path = output_path
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._zin = zipfile.ZipFile(template_path)
+        self._zout = zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED)
+        self._written_parts = set()
+        self._last_rows = {}
+        self._new_sheets = []
+        self._sheet_parts = self._find_sheet_parts()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._zout.close()
+            self._zin.close()
+
+    def _find_sheet_parts(self) -> dict:
+        """Map sheet names to their worksheet part paths inside the package."""
+        workbook = ET.fromstring(self._zin.read('xl/workbook.xml'))
+        rels = ET.fromstring(self._zin.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall(f'{{{_PKG_REL_NS}}}Relationship')}
+
+        parts = {}
+        for sheet in workbook.iter(f'{{{_MAIN_NS}}}sheet'):
+            target = targets[sheet.get(f'{{{_REL_NS}}}id')]
+            if target.startswith('/'):
+                parts[sheet.get('name')] = target.lstrip('/')
+            else:
+                parts[sheet.get('name')] = str(PurePosixPath('xl') / target)
+        return parts
+
+    def _template_sheet_xml(self, sheet_name: str) -> str:
+        if sheet_name not in self._sheet_parts:
+            raise ValueError(f"Sheet '{sheet_name}' not found in template {self.template_path}")
+        return self._zin.read(self._sheet_parts[sheet_name]).decode('utf-8')
+
+    def _stream_sheet(self, part_name, head, header_row, tail, rows, column_count) -> int:
+        """Write one worksheet part, returning the number of data rows."""
+        letters = [column_letter(i) for i in range(1, column_count + 1)]
+        row_count = 0
+        with self._zout.open(part_name, 'w', force_zip64=True) as sheet_out:
+            sheet_out.write(head.encode('utf-8'))
+            sheet_out.write(header_row.encode('utf-8'))
+
+            buffer = []
+            for row_count, values in enumerate(rows, start=1):
+                if row_count >= EXCEL_MAX_ROWS:
+                    raise ValueError(f"Worksheet {part_name} exceeds Excel's limit of {EXCEL_MAX_ROWS} rows")
+                buffer.append(_row_xml(row_count + 1, values, letters))
+                if len(buffer) >= ROWS_PER_FLUSH:
+                    sheet_out.write(''.join(buffer).encode('utf-8'))
+                    buffer = []
+            sheet_out.write(''.join(buffer).encode('utf-8'))
+            sheet_out.write(_retarget_autofilter(tail, row_count + 1).encode('utf-8'))
+
+        self._written_parts.add(part_name)
+        return row_count
+
+    def fill_sheet(self, sheet_name: str, rows: Iterable[Sequence], column_count: int) -> int:
+        """
+        Replace the data rows of a template sheet, keeping its header row and layout.
+
+        Args:
+            sheet_name: Name of the template sheet to fill
+            rows: Iterable of row value sequences (header excluded)
+            column_count: Number of columns per row
+
+        Returns:
+            Number of data rows written
+        """
+        head, header_row, tail = _split_sheet_xml(self._template_sheet_xml(sheet_name))
+        row_count = self._stream_sheet(self._sheet_parts[sheet_name], head, header_row, tail, rows, column_count)
+        self._last_rows[sheet_name] = row_count + 1
+        log.debug(f"Streamed {row_count} rows into sheet '{sheet_name}'")
+        return row_count
+
+    def add_sheet(
+        self,
+        sheet_name: str,
+        rows: Iterable[Sequence],
+        column_count: int,
+        header: Optional[Sequence[str]] = None,
+        like: Optional[str] = None
+    ) -> int:
+        """
+        Append a new sheet after the template sheets.
+
+        Args:
+            sheet_name: Name of the new sheet (max 31 characters)
+            rows: Iterable of row value sequences (header excluded)
+            column_count: Number of columns per row
+            header: Header row values; defaults to the header of the `like` sheet
+            like: Template sheet whose layout (column widths, header style, filter) is reused
+
+        Returns:
+            Number of data rows written
+        """
+        if sheet_name in self._sheet_parts or len(sheet_name) > 31:
+            raise ValueError(f"Invalid or duplicate sheet name: '{sheet_name}'")
+
+        if like is not None:
+            head, header_row, tail = _split_sheet_xml(self._template_sheet_xml(like))
+            head = re.sub(r' xr:uid="[^"]*"', '', head).replace(' tabSelected="1"', '')
+            tail = re.sub(r' xr:uid="[^"]*"', '', tail)
+        else:
+            head, header_row, tail = _PLAIN_SHEET_HEAD, '', _PLAIN_SHEET_TAIL
+        if header is not None:
+            header_row = _row_xml(1, header, [column_letter(i) for i in range(1, len(header) + 1)])
+
+        part_name = self._next_worksheet_part()
+        row_count = self._stream_sheet(part_name, head, header_row, tail, rows, column_count)
+        has_filter = '<autoFilter ' in tail
+        self._new_sheets.append((sheet_name, part_name, row_count + 1, column_letter(column_count), has_filter))
+        self._sheet_parts[sheet_name] = part_name
+        log.debug(f"Streamed {row_count} rows into new sheet '{sheet_name}'")
+        return row_count
+
+    def _next_worksheet_part(self) -> str:
+        existing = set(self._zin.namelist()) | self._written_parts
+        index = 1
+        while f'xl/worksheets/sheet{index}.xml' in existing:
+            index += 1
+        return f'xl/worksheets/sheet{index}.xml'
+
+    def _new_rel_id(self, offset: int) -> str:
+        rels = self._zin.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        used = [int(rel_id) for rel_id in re.findall(r'Id="rId(\d+)"', rels)]
+        return f'rId{max(used, default=0) + 1 + offset}'
+
+    def _workbook_xml(self) -> str:
+        xml = self._zin.read('xl/workbook.xml').decode('utf-8')
+        for sheet_name, last_row in self._last_rows.items():
+            xml = _retarget_ranges(xml, sheet_name, last_row)
+        if not self._new_sheets:
+            return xml
+
+        sheet_ids = [int(sheet_id) for sheet_id in re.findall(r'<sheet [^>]*\bsheetId="(\d+)"', xml)]
+        first_index = len(sheet_ids)
+        next_sheet_id = max(sheet_ids, default=0) + 1
+
+        sheets_xml = ''
+        names_xml = ''
+        for offset, (sheet_name, _, last_row, last_col, has_filter) in enumerate(self._new_sheets):
+            sheets_xml += (
+                f'<sheet name={quoteattr(sheet_name)} sheetId="{next_sheet_id + offset}" '
+                f'r:id="{self._new_rel_id(offset)}"/>'
+            )
+            if has_filter:
+                quoted_name = escape("'" + sheet_name.replace("'", "''") + "'")
+                names_xml += (
+                    f'<definedName name="_xlnm._FilterDatabase" localSheetId="{first_index + offset}" hidden="1">'
+                    f'{quoted_name}!$A$1:${last_col}${last_row}</definedName>'
+                )
+
+        xml = xml.replace('</sheets>', sheets_xml + '</sheets>', 1)
+        if names_xml:
+            if '</definedNames>' in xml:
+                xml = xml.replace('</definedNames>', names_xml + '</definedNames>', 1)
+            else:
+                xml = xml.replace('</sheets>', '</sheets><definedNames>' + names_xml + '</definedNames>', 1)
+        return xml
+
+    def _workbook_rels_xml(self) -> str:
+        xml = self._zin.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        rels_xml = ''.join(
+            f'<Relationship Id="{self._new_rel_id(offset)}" Type="{_WORKSHEET_REL_TYPE}" '
+            f'Target="/{part_name}"/>'
+            for offset, (_, part_name, _, _, _) in enumerate(self._new_sheets)
+        )
+        return xml.replace('</Relationships>', rels_xml + '</Relationships>', 1)
+
+    def _content_types_xml(self) -> str:
+        xml = self._zin.read('[Content_Types].xml').decode('utf-8')
+        overrides_xml = ''.join(
+            f'<Override PartName="/{part_name}" ContentType="{_WORKSHEET_CONTENT_TYPE}"/>'
+            for _, part_name, _, _, _ in self._new_sheets
+        )
+        return xml.replace('</Types>', overrides_xml + '</Types>', 1)
+
+    def close(self) -> None:
+        """Copy untouched template parts, update workbook metadata and finish the package."""
+        for item in self._zin.infolist():
+            name = item.filename
+            if name in self._written_parts:
+                continue
+            if name == 'xl/workbook.xml':
+                data = self._workbook_xml()
+            elif name == 'xl/_rels/workbook.xml.rels':
+                data = self._workbook_rels_xml()
+            elif name == '[Content_Types].xml':
+                data = self._content_types_xml()
+            elif _references_sheet_range(name):
+                data = self._zin.read(name).decode('utf-8')
+                for sheet_name, last_row in self._last_rows.items():
+                    data = _retarget_ranges(data, sheet_name, last_row)
+            else:
+                self._zout.writestr(item, self._zin.read(name), compress_type=zipfile.ZIP_DEFLATED)
+                continue
+            self._zout.writestr(item, data.encode('utf-8'), compress_type=zipfile.ZIP_DEFLATED)
+
+        self._zout.close()
+        self._zin.close()
+
+
+def write_sheet_rows(
+    template_path: Path,
+    output_path: Path,
+    sheet_name: str,
+    rows: Iterable[Sequence],
+    column_count: int
+) -> int:
+    """Copy template to output, streaming rows into sheet_name below its header row.
+
+    Args:
+        template_path: Path to the xlsx template
+        output_path: Path of the workbook to create
+        sheet_name: Name of the template sheet to fill
+        rows: Iterable of row value sequences (header excluded)
+        column_count: Number of columns per row
+
+    Returns:
+        Number of data rows written
+    """
+    with TemplateWorkbookWriter(template_path, output_path) as writer:
+        return writer.fill_sheet(sheet_name, rows, column_count)
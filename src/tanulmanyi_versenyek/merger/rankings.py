@@ -0,0 +1,95 @@
+"""Pre-aggregated school, city, county and region rankings for the Excel report."""
+
+import logging
+
+import pandas as pd
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+HUNGARIAN_SORT_MAP = str.maketrans(
+    'aáeéiíoóöőuúüűAÁEÉIÍOÓÖŐUÚÜŰ',
+    'aaeeiioooouuuuAAEEIIOOOOUUUU'
+)
+
+RANKING_GROUPS = {
+    'iskola_nev': ('Iskolák', 'Iskola'),
+    'varos': ('Városok', 'Város'),
+    'varmegye': ('Vármegyék', 'Vármegye'),
+    'regio': ('Régiók', 'Régió'),
+}
+
+RANKING_KINDS = {
+    'count': ('darabszám', 'Darabszám'),
+    'weighted': ('súlyozott', 'Súlyozott pontszám'),
+}
+
+
+def hungarian_sort_key(text):
+    """Convert Hungarian text to sortable form by normalizing accented characters."""
+    if not isinstance(text, str):
+        return text
+    return text.translate(HUNGARIAN_SORT_MAP)
+
+
+def _most_common_city(df: pd.DataFrame) -> pd.Series:
+    """Most common city per school; ties resolved alphabetically like Series.mode()."""
+    counts = df.groupby(['iskola_nev', 'varos'], observed=True).size().reset_index(name='n')
+    counts = counts.sort_values(['iskola_nev', 'n', 'varos'], ascending=[True, False, True])
+    return counts.drop_duplicates('iskola_nev').set_index('iskola_nev')['varos']
+
+
+def _finish_ranking(scores: pd.Series, source_df: pd.DataFrame, group_by: str, value_name: str) -> pd.DataFrame:
+    result = scores.reset_index(name=value_name)
+    # Categorical group labels would sort by category order instead of the Hungarian sort key
+    result[group_by] = result[group_by].astype(object)
+    if group_by == 'iskola_nev':
+        result['varos'] = result['iskola_nev'].map(_most_common_city(source_df))
+        result = result[['iskola_nev', 'varos', value_name]]
+    return result.sort_values(
+        [value_name, group_by],
+        ascending=[False, True],
+        key=lambda col: col.map(hungarian_sort_key) if col.name == group_by else col
+    ).reset_index(drop=True)
+
+
+def calculate_count_ranking(df: pd.DataFrame, top_x: int, group_by: str) -> pd.DataFrame:
+    """Count appearances in top X positions per group."""
+    top_df = df[df['helyezes'] <= top_x]
+    counts = top_df.groupby(group_by, observed=True).size()
+    return _finish_ranking(counts, top_df, group_by, 'Count')
+
+
+def calculate_weighted_ranking(df: pd.DataFrame, top_x: int, group_by: str) -> pd.DataFrame:
+    """Sum placement points per group: 1st place gets top_x points, top_x-th place gets 1."""
+    points = (top_x - df['helyezes'] + 1).clip(lower=0)
+    scored_df = df.assign(points=points)[points > 0]
+    scores = scored_df.groupby(group_by, observed=True)['points'].sum()
+    return _finish_ranking(scores, scored_df, group_by, 'Weighted Score')
+
+
+def build_ranking_sheets(df: pd.DataFrame, top_x: int) -> list:
+    """
+    Compute all count and weighted rankings for the report.
+
+    Args:
+        df: Master DataFrame
+        top_x: Placements up to and including this rank are counted
+
+    Returns:
+        list: (sheet_name, header, DataFrame) tuples, one per group and ranking kind
+    """
+    sheets = []
+    for group_by, (group_label, name_header) in RANKING_GROUPS.items():
+        if group_by not in df.columns:
+            continue
+        for kind, (kind_label, value_header) in RANKING_KINDS.items():
+            if kind == 'count':
+                ranking = calculate_count_ranking(df, top_x, group_by)
+            else:
+                ranking = calculate_weighted_ranking(df, top_x, group_by)
+            header = [name_header, 'Város', value_header] if group_by == 'iskola_nev' else [name_header, value_header]
+            sheet_name = f'{group_label} - {kind_label} TOP{top_x}'
+            sheets.append((sheet_name, header, ranking))
+
+    log.info(f"Computed {len(sheets)} rankings for TOP {top_x}")
+    return sheets
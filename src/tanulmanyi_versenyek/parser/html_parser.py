@@ -4,6 +4,8 @@ from pathlib import Path
 import pandas as pd
 from bs4 import BeautifulSoup
 
+from tanulmanyi_versenyek.common.schema import apply_schema
+
 log = logging.getLogger(__name__.split('.')[-1])
 
 
@@ -160,7 +162,7 @@ class HtmlTableParser:
         
         log.info(f"Cleaned data: {len(result_df)} rows")
         
-        return result_df
+        return apply_schema(result_df)
 
     def _normalize_helyezes(self, helyezes_str: str) -> int:
         """
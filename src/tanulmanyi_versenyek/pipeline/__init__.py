@@ -0,0 +1 @@
+"""Pipeline stage orchestration."""
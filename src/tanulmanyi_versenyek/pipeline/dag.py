@@ -0,0 +1,181 @@
+"""Minimal DAG runner: rebuilds stale stages, running independent ones concurrently."""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+
+def newest_mtime(path: Path) -> Optional[float]:
+    """Modification time of a file, or of the newest file below a directory; None if absent or empty."""
+    if path.is_file():
+        return path.stat().st_mtime
+    if path.is_dir():
+        mtimes = [f.stat().st_mtime for f in path.rglob('*') if f.is_file()]
+        return max(mtimes) if mtimes else None
+    return None
+
+
+class Stage:
+    """A pipeline stage: a callable with declared input/output paths and dependencies."""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[dict], None],
+        inputs: Iterable[Path] = (),
+        outputs: Iterable[Path] = (),
+        depends_on: Iterable[str] = (),
+        always_run: bool = False
+    ):
+        """
+        Args:
+            name: Unique stage name
+            run: Callable receiving the configuration dictionary
+            inputs: Files or directories the stage reads
+            outputs: Files or directories the stage produces
+            depends_on: Names of stages that must finish first
+            always_run: Run on every pipeline run, for stages that decide
+                themselves whether there is anything new (e.g. downloads)
+        """
+        self.name = name
+        self.run = run
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.depends_on = list(depends_on)
+        self.always_run = always_run
+
+    def stale_reason(self) -> Optional[str]:
+        """Why the stage needs rebuilding based on its files, or None if it is up to date."""
+        if self.always_run:
+            return "always runs"
+
+        output_mtimes = [newest_mtime(path) for path in self.outputs]
+        missing = [str(path) for path, mtime in zip(self.outputs, output_mtimes) if mtime is None]
+        if missing:
+            return f"missing outputs: {missing}"
+
+        input_mtimes = [mtime for mtime in (newest_mtime(path) for path in self.inputs) if mtime is not None]
+        if input_mtimes and output_mtimes and max(input_mtimes) > min(output_mtimes):
+            return "inputs newer than outputs"
+        return None
+
+
+class PipelineRunner:
+    """
+    Runs stages in dependency order, rebuilding only the stale ones.
+
+    A stage is rebuilt when it is forced, when any output is missing or older
+    than its newest input, or when a stage it depends on was rebuilt in the
+    same run. Stages marked always_run run every time; unless forced, their
+    dependents are judged by their files only, so a download that fetched
+    nothing new does not rebuild the rest of the pipeline. Stages whose dependencies are
+    satisfied run concurrently.
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names in pipeline")
+        self._validate()
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            unknown = [dep for dep in stage.depends_on if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {unknown}")
+        self.topological_order()
+
+    def topological_order(self) -> List[str]:
+        """Stage names in dependency order; raises ValueError on cycles."""
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle involving stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def run(self, cfg: dict, force: Iterable[str] = (), dry_run: bool = False) -> Dict[str, str]:
+        """
+        Execute the pipeline.
+
+        Args:
+            cfg: Configuration dictionary passed to every stage
+            force: Stage names to rebuild regardless of their files
+            dry_run: Only log which stages would run
+
+        Returns:
+            dict: stage name -> 'built', 'up-to-date', 'failed' or 'skipped'
+        """
+        force = set(force)
+        unknown = force - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+
+        status = {}
+        pending = list(self.topological_order())
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    dep_status = [status.get(dep) for dep in stage.depends_on]
+                    if any(s is None for s in dep_status):
+                        continue
+                    pending.remove(name)
+
+                    if any(s in ('failed', 'skipped') for s in dep_status):
+                        status[name] = 'skipped'
+                        log.warning(f"Skipping stage {name}: a dependency did not complete")
+                        continue
+
+                    reason = self._rebuild_reason(stage, force, status)
+                    if reason is None:
+                        status[name] = 'up-to-date'
+                        log.info(f"Stage {name} is up to date")
+                    elif dry_run:
+                        status[name] = 'built'
+                        log.info(f"Stage {name} would run ({reason})")
+                    else:
+                        log.info(f"Starting stage {name} ({reason})")
+                        running[executor.submit(stage.run, cfg)] = name
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                        status[name] = 'built'
+                        log.info(f"Finished stage {name}")
+                    except Exception as e:
+                        status[name] = 'failed'
+                        log.error(f"Stage {name} failed: {e}", exc_info=True)
+
+        log.info("Pipeline summary: " + ", ".join(f"{name}={status[name]}" for name in self.topological_order()))
+        return status
+
+    def _rebuild_reason(self, stage: Stage, force: set, status: Dict[str, str]) -> Optional[str]:
+        if stage.name in force:
+            return "forced"
+        rebuilt = [dep for dep in stage.depends_on if status[dep] == 'built']
+        if any(dep in force or not self.stages[dep].always_run for dep in rebuilt):
+            return "dependency rebuilt"
+        return stage.stale_reason()
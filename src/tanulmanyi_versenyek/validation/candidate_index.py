@@ -0,0 +1,118 @@
+"""Token index for pruning KIR candidates before fuzzy scoring."""
+
+import math
+from typing import List, Optional, Set
+
+import numpy as np
+
+def _tokens(text: Optional[str]) -> Set[str]:
+    """Distinct whitespace-separated tokens, as fuzz.token_set_ratio splits them."""
+    return set(text.split()) if isinstance(text, str) else set()
+
+
+def _code_points(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+class CandidateIndex:
+    """
+    Inverted token index over the names of one candidate set.
+
+    shortlist() returns the names sharing the query's rarest tokens, which
+    usually contain the best match. upper_bounds() bounds the
+    token_set_ratio of the query with every name, using only token and
+    character counts: the token_set_ratio formula is evaluated exactly
+    except for the Indel distance of the differing tokens, which is bounded
+    by the character histograms. A name whose bound is below a score
+    already reached cannot be the best match and need not be scored.
+    """
+
+    def __init__(self, names: List[Optional[str]]):
+        """
+        Args:
+            names: Candidate names; missing names (None/NaN) never match
+        """
+        token_sets = [_tokens(name) for name in names]
+        self.size = len(names)
+        self.token_count = np.array([len(tokens) for tokens in token_sets], dtype=np.int64)
+        self.token_length = np.array([sum(map(len, tokens)) for tokens in token_sets], dtype=np.int64)
+
+        postings = {}
+        for position, tokens in enumerate(token_sets):
+            for token in tokens:
+                postings.setdefault(token, []).append(position)
+        self.postings = {token: np.array(positions) for token, positions in postings.items()}
+
+        # Character histogram of each name's distinct tokens, without spaces
+        joined = [''.join(tokens) for tokens in token_sets]
+        codes = _code_points(''.join(joined))
+        self.alphabet, char_ids = np.unique(codes, return_inverse=True)
+        rows = np.repeat(np.arange(self.size), [len(text) for text in joined])
+        self.char_counts = np.bincount(
+            rows * len(self.alphabet) + char_ids, minlength=self.size * len(self.alphabet)
+        ).reshape(self.size, len(self.alphabet)).astype(np.int32)
+
+    def shortlist(self, query: str, size: int) -> np.ndarray:
+        """
+        Positions of at most size names sharing the query's rarest tokens.
+
+        Names are ranked by the summed inverse document frequency of the
+        tokens they share with the query.
+        """
+        weights = np.zeros(self.size)
+        for token in _tokens(query):
+            positions = self.postings.get(token)
+            if positions is not None:
+                weights[positions] += math.log(self.size / len(positions))
+
+        matching = np.flatnonzero(weights > 0)
+        if len(matching) <= size:
+            return matching
+        return matching[np.argpartition(-weights[matching], size - 1)[:size]]
+
+    def upper_bounds(self, query: str) -> np.ndarray:
+        """Upper bound of fuzz.token_set_ratio(query, name) for every name."""
+        query_tokens = _tokens(query)
+        if not query_tokens:
+            return np.zeros(self.size)
+
+        shared_count = np.zeros(self.size, dtype=np.int64)
+        shared_length = np.zeros(self.size, dtype=np.int64)
+        for token in query_tokens:
+            positions = self.postings.get(token)
+            if positions is not None:
+                shared_count[positions] += 1
+                shared_length[positions] += len(token)
+
+        query_count = len(query_tokens)
+        query_length = sum(map(len, query_tokens))
+        only_query = query_count - shared_count
+        only_name = self.token_count - shared_count
+
+        # Joined lengths of the shared and differing token groups, as in token_set_ratio
+        sect_len = shared_length + np.maximum(shared_count - 1, 0)
+        ab_len = query_length - shared_length + np.maximum(only_query - 1, 0)
+        ba_len = self.token_length - shared_length + np.maximum(only_name - 1, 0)
+        has_sect = (sect_len > 0).astype(np.int64)
+
+        # Longest common subsequence of the differing groups is bounded by their common characters
+        query_codes = _code_points(''.join(query_tokens))
+        query_codes = query_codes[np.isin(query_codes, self.alphabet)]
+        query_counts = np.bincount(np.searchsorted(self.alphabet, query_codes), minlength=len(self.alphabet))
+        common_chars = np.minimum(self.char_counts, query_counts).sum(axis=1) - shared_length
+        common_spaces = np.minimum(np.maximum(only_query - 1, 0), np.maximum(only_name - 1, 0))
+        lcs = np.minimum(common_chars + common_spaces, np.minimum(ab_len, ba_len))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff_ratio = 100 - 100 * (ab_len + ba_len - 2 * lcs) / (2 * sect_len + 2 * has_sect + ab_len + ba_len)
+            sect_ab_ratio = 100 - 100 * (has_sect + ab_len) / (2 * sect_len + has_sect + ab_len)
+            sect_ba_ratio = 100 - 100 * (has_sect + ba_len) / (2 * sect_len + has_sect + ba_len)
+        bounds = np.where(
+            has_sect > 0,
+            np.maximum(diff_ratio, np.maximum(sect_ab_ratio, sect_ba_ratio)),
+            diff_ratio
+        )
+
+        subset = (shared_count > 0) & ((only_query == 0) | (only_name == 0))
+        bounds = np.where(subset, 100.0, bounds)
+        return np.where(self.token_count == 0, 0.0, bounds)
@@ -1,102 +1,234 @@
 """City name validation and mapping functionality."""
 
 import logging
+import re
+import unicodedata
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import pandas as pd
 
 log = logging.getLogger(__name__.split('.')[-1])
 
+MATCH_TYPES = ['exact', 'normalized', 'prefix', 'regex']
 
-def _parse_mapping_csv(filepath: Path) -> Dict[str, str]:
-    """Parse city mapping CSV file into dictionary.
+
+def normalize_city_name(city: str) -> str:
+    """Normalize a city spelling for rule matching: case, whitespace and spacing around punctuation."""
+    normalized = unicodedata.normalize('NFKC', str(city)).casefold()
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return re.sub(r'\s*([.,()\-])\s*', r'\1', normalized)
+
+
+class CityMapping(dict):
+    """
+    City corrections compiled from exact, normalized, prefix and regex rules.
+
+    The dict itself holds the exact rules, so exact-only mappings behave like
+    the plain {original_city: corrected_city} dictionary. get() resolves a
+    city through the rules in order: exact, normalized, longest prefix,
+    then the first matching regex in file order. Prefix rules are compared
+    on normalized names and compiled into one alternation. Regex rules are
+    matched in full against the original name and may use group references
+    (e.g. \\1) in the corrected name; those without groups share one
+    alternation too, while rules with groups or backreferences are matched
+    one by one, as their group numbers would shift inside an alternation.
+    """
+
+    def __init__(self, exact=None, normalized=None, prefixes=None, regexes=None):
+        """
+        Args:
+            exact: {original_city: corrected_city}
+            normalized: {normalized original_city: corrected_city}
+            prefixes: [(prefix, corrected_city)]
+            regexes: [(pattern, corrected_city)]
+        """
+        super().__init__(exact or {})
+        self.normalized = {normalize_city_name(key): value for key, value in (normalized or {}).items()}
+        self.prefixes = sorted(
+            ((normalize_city_name(prefix), corrected) for prefix, corrected in (prefixes or [])),
+            key=lambda rule: -len(rule[0])
+        )
+        self.regexes = [(re.compile(pattern), corrected) for pattern, corrected in (regexes or [])]
+
+        self._prefix_pattern = self._alternation(enumerate(re.escape(prefix) for prefix, _ in self.prefixes))
+        self._regex_pattern = self._alternation(
+            (i, rule.pattern) for i, (rule, _) in enumerate(self.regexes) if rule.groups == 0
+        )
+        self._grouped_regexes = [i for i, (rule, _) in enumerate(self.regexes) if rule.groups > 0]
+
+    @staticmethod
+    def _alternation(patterns) -> Optional[re.Pattern]:
+        """One pattern matching any of the (rule index, pattern) pairs; the group r<index> tells which."""
+        alternatives = [f'(?P<r{i}>{pattern})' for i, pattern in patterns]
+        return re.compile('|'.join(alternatives)) if alternatives else None
+
+    def __bool__(self) -> bool:
+        return self.rule_count() > 0
+
+    def rule_count(self) -> int:
+        """Number of rules of all match types."""
+        return len(self.keys()) + len(self.normalized) + len(self.prefixes) + len(self.regexes)
+
+    def get(self, city, default=None):
+        """Corrected name for a city, or default when no rule matches."""
+        if pd.isna(city):
+            return default
+        if city in self:
+            return self[city]
+
+        normalized = normalize_city_name(city)
+        if normalized in self.normalized:
+            return self.normalized[normalized]
+
+        if self._prefix_pattern is not None:
+            match = self._prefix_pattern.match(normalized)
+            if match:
+                return self.prefixes[int(match.lastgroup[1:])][1]
+
+        first = None
+        if self._regex_pattern is not None:
+            match = self._regex_pattern.fullmatch(city)
+            if match:
+                first = int(match.lastgroup[1:])
+        for i in self._grouped_regexes:
+            if first is not None and i > first:
+                break
+            if self.regexes[i][0].fullmatch(city):
+                first = i
+                break
+        if first is not None:
+            rule, corrected = self.regexes[first]
+            return rule.fullmatch(city).expand(corrected)
+
+        return default
+
+
+def _parse_mapping_csv(filepath: Path) -> CityMapping:
+    """Parse city mapping CSV file into a compiled mapping.
+
+    The optional match_type column selects how original_city is matched:
+    exact (default), normalized, prefix or regex.
 
     Args:
         filepath: Path to city_mapping.csv
 
     Returns:
-        Dictionary: {original_city: corrected_city}
+        CityMapping: {original_city: corrected_city} for exact rules, plus the pattern rules
     """
     try:
-        df = pd.read_csv(filepath, sep=';', encoding='utf-8')
+        df = pd.read_csv(filepath, sep=';', encoding='utf-8', dtype=str)
     except Exception as e:
         log.error(f"Failed to read mapping CSV: {e}")
-        return {}
+        return CityMapping()
 
     required_columns = ['original_city', 'corrected_city']
     if not all(col in df.columns for col in required_columns):
         log.error(f"Missing required columns. Expected: {required_columns}, Found: {list(df.columns)}")
-        return {}
-
-    mapping = {}
-    for _, row in df.iterrows():
-        if pd.notna(row['corrected_city']) and row['corrected_city']:
-            mapping[row['original_city']] = row['corrected_city']
-        else:
-            log.warning(f"Skipping row with empty corrected_city: original_city=\"{row['original_city']}\"")
-
-    return mapping
-
-
-def load_city_mapping(config: dict) -> Dict[str, str]:
+        return CityMapping()
+
+    match_types = df['match_type'].fillna('exact').str.strip().str.lower() if 'match_type' in df.columns \
+        else pd.Series('exact', index=df.index)
+
+    rules = {match_type: [] for match_type in MATCH_TYPES}
+    for original, corrected, match_type in zip(df['original_city'], df['corrected_city'], match_types):
+        if pd.isna(corrected) or not corrected:
+            log.warning(f"Skipping row with empty corrected_city: original_city=\"{original}\"")
+            continue
+        if match_type not in rules:
+            log.warning(f"Skipping row with unknown match_type \"{match_type}\": original_city=\"{original}\"")
+            continue
+        if match_type == 'regex':
+            try:
+                re.compile(original)
+            except re.error as e:
+                log.warning(f"Skipping row with invalid regex \"{original}\": {e}")
+                continue
+        rules[match_type].append((original, corrected))
+
+    return CityMapping(
+        exact=dict(rules['exact']),
+        normalized=dict(rules['normalized']),
+        prefixes=rules['prefix'],
+        regexes=rules['regex']
+    )
+
+
+def load_city_mapping(config: dict) -> CityMapping:
     """Load city mapping configuration from CSV file.
 
     Args:
         config: Configuration dictionary
 
     Returns:
-        Dictionary of city mappings, empty dict if file missing or error
+        CityMapping of city corrections, empty if file missing or error
     """
     mapping_file = config.get('validation', {}).get('city_mapping_file')
     if not mapping_file:
         log.info("No city mapping file configured")
-        return {}
+        return CityMapping()
 
     filepath = Path(mapping_file)
     if not filepath.exists():
         log.info(f"No city mapping file found at {filepath}, skipping corrections")
-        return {}
+        return CityMapping()
 
     mapping = _parse_mapping_csv(filepath)
     if mapping:
-        log.info(f"Loaded {len(mapping)} city mappings from {filepath}")
+        log.info(f"Loaded {mapping.rule_count()} city mappings from {filepath}")
     return mapping
 
 
-def apply_city_mapping(df: pd.DataFrame, mapping: Dict[str, str]) -> tuple[pd.DataFrame, dict]:
+def apply_city_mapping(df: pd.DataFrame, mapping: Dict[str, str], copy: bool = True) -> tuple[pd.DataFrame, dict]:
     """Apply city name corrections to DataFrame.
 
+    The mapping is resolved once per distinct city value, so pattern rules
+    run once per city name, and applied to all rows with a single
+    vectorized map and mask.
+
     Args:
         df: DataFrame with 'varos' column
-        mapping: City mapping dictionary from load_city_mapping()
+        mapping: CityMapping from load_city_mapping() or a plain {original: corrected} dict
+        copy: When False, the 'varos' column of df is replaced in place
+            instead of copying the whole frame first
 
     Returns:
         Tuple of (corrected DataFrame, dict with 'corrected' and 'dropped' counts)
     """
-    corrected_df = df.copy()
+    corrected_df = df.copy() if copy else df
     corrected_count = 0
     dropped_count = 0
 
     if mapping:
-        rows_to_drop = []
-        for idx, row in corrected_df.iterrows():
-            if row['varos'] in mapping:
-                original = row['varos']
-                corrected = mapping[original]
-                
-                if corrected == 'DROP':
-                    log.debug(f"Marked for drop: \"{original}\"")
-                    rows_to_drop.append(idx)
-                    dropped_count += 1
-                else:
-                    log.debug(f"Applied: \"{original}\" → \"{corrected}\"")
-                    corrected_df.at[idx, 'varos'] = corrected
-                    corrected_count += 1
-        
-        if rows_to_drop:
-            corrected_df = corrected_df.drop(rows_to_drop)
-        
+        cities = corrected_df['varos']
+        city_counts = cities.value_counts()
+        replacements = {}
+        dropped_cities = []
+        for original, count in city_counts[city_counts > 0].items():
+            corrected = mapping.get(original)
+            if corrected is None:
+                continue
+            if corrected == 'DROP':
+                log.debug(f"Marked for drop: \"{original}\" ({count} rows)")
+                dropped_cities.append(original)
+                dropped_count += count
+            else:
+                log.debug(f"Applied: \"{original}\" → \"{corrected}\" ({count} rows)")
+                replacements[original] = corrected
+                corrected_count += count
+
+        keep = ~cities.isin(dropped_cities)
+        if isinstance(cities.dtype, pd.CategoricalDtype):
+            # Map the distinct categories rather than every row
+            cities = cities.cat.remove_categories(dropped_cities)
+            cities = cities.map(lambda city: replacements.get(city, city)).astype('category')
+            corrected_df['varos'] = cities.cat.remove_unused_categories()
+        elif replacements:
+            corrected_df['varos'] = cities.where(~cities.isin(list(replacements)), cities.map(replacements))
+
+        if dropped_cities:
+            corrected_df = corrected_df[keep]
+
         log.info(f"Applied {corrected_count} city corrections, dropped {dropped_count} schools from excluded cities")
 
-    return corrected_df, {'corrected': corrected_count, 'dropped': dropped_count}
+    return corrected_df, {'corrected': int(corrected_count), 'dropped': int(dropped_count)}
@@ -0,0 +1,55 @@
+"""Canonical school name keys for exact matching."""
+
+import re
+import unicodedata
+from typing import Optional
+
+# Abbreviations common in competition data, as lowercase tokens without the dot
+SCHOOL_ABBREVIATIONS = {
+    'ált': 'általános',
+    'isk': 'iskola',
+    'gimn': 'gimnázium',
+    'ref': 'református',
+    'kat': 'katolikus',
+    'ev': 'evangélikus',
+    'ami': 'alapfokú művészeti iskola',
+    'ker': 'kerületi',
+    'sz': 'számú',
+    'tagisk': 'tagiskola',
+    'közp': 'központ',
+}
+
+STOPWORDS = {'és', 'a', 'az'}
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _fold_accents(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def canonicalize_school_name(name: Optional[str]) -> str:
+    """
+    Canonical key of a school name, equal for names differing only in form.
+
+    Case, punctuation, whitespace and accents are ignored, the
+    abbreviations in SCHOOL_ABBREVIATIONS are expanded and the words in
+    STOPWORDS are dropped, e.g. "Petőfi Ált. Isk. és Gimn." and
+    "PETŐFI ÁLTALÁNOS ISKOLA, GIMNÁZIUM" share the key
+    "petofi altalanos iskola gimnazium".
+
+    Args:
+        name: School name; missing names give an empty key
+
+    Returns:
+        str: Canonical key, empty if the name has no words
+    """
+    if not isinstance(name, str):
+        return ''
+    words = []
+    for token in _TOKEN_RE.findall(name.lower()):
+        for word in SCHOOL_ABBREVIATIONS.get(token, token).split():
+            if word not in STOPWORDS:
+                words.append(word)
+    return _fold_accents(' '.join(words))
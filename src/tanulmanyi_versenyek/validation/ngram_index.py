@@ -0,0 +1,108 @@
+"""Character n-gram TF-IDF index for nationwide school name lookups."""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from tanulmanyi_versenyek.validation.name_canonicalizer import canonicalize_school_name
+
+NGRAM_SIZE = 3
+
+# Code points of canonical keys stay far below 2**21, so an n-gram packs into one int64
+_CODE_BITS = 21
+
+
+def _code_points(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def _padded(name: Optional[str]) -> str:
+    """Canonical key padded with spaces, so word starts and ends form n-grams too."""
+    return f" {canonicalize_school_name(name)} "
+
+
+def _ngram_keys(codes: np.ndarray) -> np.ndarray:
+    """Packed keys of all n-grams in a code point array."""
+    keys = np.zeros(max(len(codes) - NGRAM_SIZE + 1, 0), dtype=np.int64)
+    for offset in range(NGRAM_SIZE):
+        keys = (keys << _CODE_BITS) | codes[offset:len(codes) - NGRAM_SIZE + 1 + offset]
+    return keys
+
+
+class NgramIndex:
+    """
+    Sparse TF-IDF vectors of character n-grams over a list of names.
+
+    Names are reduced to their canonical keys and split into overlapping
+    character trigrams. Each name becomes an L2-normalized vector of
+    sublinear term frequency times inverse document frequency, stored term
+    by term (the columns of a sparse matrix). A query's cosine similarity
+    with every name is then a sparse matrix-vector product: only the
+    postings of the query's own n-grams are touched, so a lookup against
+    tens of thousands of names takes milliseconds.
+    """
+
+    def __init__(self, names: List[Optional[str]]):
+        """
+        Args:
+            names: Names to index; missing names never match
+        """
+        self.size = len(names)
+        texts = [_padded(name) for name in names]
+
+        # N-grams of all names at once: positions where a window stays within one name
+        codes = _code_points(''.join(texts))
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        keys = _ngram_keys(codes)
+        doc_of_position = np.repeat(np.arange(self.size), lengths)[:len(keys)]
+        within_name = np.arange(len(keys)) <= (starts + lengths - NGRAM_SIZE)[doc_of_position]
+        keys = keys[within_name]
+        docs = doc_of_position[within_name]
+
+        # Term ids, and counts of each distinct (term, name) pair
+        self.terms, term_ids = np.unique(keys, return_inverse=True)
+        pairs, counts = np.unique(term_ids * self.size + docs, return_counts=True)
+        pair_terms, pair_docs = np.divmod(pairs, self.size)
+
+        document_frequency = np.bincount(pair_terms, minlength=len(self.terms))
+        self.idf = np.log((1 + self.size) / (1 + document_frequency)) + 1
+        weights = (1 + np.log(counts)) * self.idf[pair_terms]
+        norms = np.sqrt(np.bincount(pair_docs, weights=weights ** 2, minlength=self.size))
+        weights = weights / norms[pair_docs]
+
+        # pairs are sorted by term, so the postings of a term are one slice
+        self.indptr = np.concatenate([[0], np.cumsum(document_frequency)])
+        self.docs = pair_docs
+        self.weights = weights
+
+    def similarities(self, query: Optional[str]) -> np.ndarray:
+        """Cosine similarity (0-1) of the query with every indexed name."""
+        keys = _ngram_keys(_code_points(_padded(query)))
+        query_terms, counts = np.unique(keys, return_counts=True)
+        positions = np.searchsorted(self.terms, query_terms)
+        known = (positions < len(self.terms)) & (self.terms[np.minimum(positions, len(self.terms) - 1)] == query_terms)
+        if not known.any():
+            return np.zeros(self.size)
+
+        term_ids = positions[known]
+        query_weights = (1 + np.log(counts[known])) * self.idf[term_ids]
+        query_weights /= np.linalg.norm(query_weights)
+
+        slices = [slice(self.indptr[term], self.indptr[term + 1]) for term in term_ids]
+        docs = np.concatenate([self.docs[part] for part in slices])
+        products = np.concatenate([self.weights[part] * weight for part, weight in zip(slices, query_weights)])
+        return np.bincount(docs, weights=products, minlength=self.size)
+
+    def nearest(self, query: Optional[str], count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and similarities of the count most similar names, best first.
+
+        Names sharing no n-gram with the query are never returned.
+        """
+        similarities = self.similarities(query)
+        matching = np.flatnonzero(similarities > 0)
+        if len(matching) > count:
+            matching = matching[np.argpartition(-similarities[matching], count - 1)[:count]]
+        order = np.lexsort((matching, -similarities[matching]))
+        return matching[order], similarities[matching[order]]
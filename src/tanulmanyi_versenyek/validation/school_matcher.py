@@ -1,85 +1,176 @@
 """School name matching against KIR database."""
 
 import logging
+import pickle
 import re
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+from tanulmanyi_versenyek.common.kir_table import NAME_COLUMNS, load_kir_table
+from tanulmanyi_versenyek.common.schema import (
+    KIR_CATEGORY_COLUMNS,
+    MATCH_RESULT_CATEGORY_COLUMNS,
+    apply_schema
+)
+from tanulmanyi_versenyek.validation.candidate_index import CandidateIndex
+from tanulmanyi_versenyek.validation.name_canonicalizer import canonicalize_school_name
+from tanulmanyi_versenyek.validation.ngram_index import NgramIndex
+from tanulmanyi_versenyek.validation.scorers import DEFAULT_ALGORITHM, Scorer, get_scorer
 
 log = logging.getLogger(__name__.split('.')[-1])
 
-REQUIRED_KIR_COLUMNS = [
-    'Intézmény megnevezése',
-    'A feladatellátási hely települése',
-    'A feladatellátási hely vármegyéje',
-    'A feladatellátási hely régiója',
-    'A feladatellátási hely megnevezése'
+BUDAPEST = 'budapest'
+
+BUDAPEST_DISTRICTS = [
+    'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI', 'XII',
+    'XIII', 'XIV', 'XV', 'XVI', 'XVII', 'XVIII', 'XIX', 'XX', 'XXI', 'XXII', 'XXIII'
 ]
 
+# "Budapest XII. ...", "Bp. XII.", "XII. kerületi", "XII. ker."
+_DISTRICT_HINT_RE = re.compile(r'(?:\b(?:Budapest|Bp\.)\s*([IVX]+)\.|\b([IVX]+)\.\s*(?i:ker))')
+
+CANONICAL_MATCH_COMMENT = 'Exact match after name normalization'
+
+GLOBAL_MATCH_COMMENT = 'Suggested by nationwide name search, not applied - add it to the school mapping if correct'
+
+NO_CITY_MATCH_COMMENT = 'No schools found in this city in KIR database'
+
+# Match methods whose KIR school replaces the competition data's name and city
+APPLIED_METHODS = ['MANUAL', 'AUTO_HIGH', 'AUTO_MEDIUM']
+
+# Match methods whose schools are listed with their best candidates in the review file
+REVIEW_METHODS = ['AUTO_MEDIUM', 'DROPPED', 'NO_MATCH', 'AUTO_GLOBAL']
+
+# KIR schools found by n-gram similarity that are scored for the nationwide fallback
+GLOBAL_SHORTLIST_SIZE = 20
+
+# Names scored first from the token index, to find a score that prunes the rest
+SHORTLIST_SIZE = 20
+
+# Margin for float rounding when comparing upper bounds with scores
+_BOUND_TOLERANCE = 1e-6
+
+# Margin below score_cutoff, as rapidfuzz may reject a score within rounding of the cutoff
+_SCORE_CUTOFF_MARGIN = 0.01
+
+
+def build_name_index(kir_dict: Dict[str, pd.DataFrame]) -> Dict[str, dict]:
+    """
+    Map each institution name to its first KIR row, in city order.
+
+    Args:
+        kir_dict: City-indexed KIR DataFrames
+
+    Returns:
+        dict: Institution name -> KIR row as a {column: value} dict
+    """
+    name_index = {}
+    for city_df in kir_dict.values():
+        for row in city_df.to_dict('records'):
+            name = row['Intézmény megnevezése']
+            if not pd.isna(name):
+                name_index.setdefault(name, row)
+    return name_index
+
+
+class KirDatabase(dict):
+    """
+    City-indexed KIR DataFrames, as returned by load_kir_database.
+
+    The dict maps normalized city names to their KIR rows; name_index maps
+    institution names to rows across all cities, so manual mappings are
+    resolved without scanning every city. global_candidates and ngram_index
+    serve the nationwide search for schools of cities missing from KIR.
+    """
+
+    def __init__(self, city_frames: Dict[str, pd.DataFrame]):
+        super().__init__(city_frames)
+        self.name_index = build_name_index(self)
+        self._global_candidates = None
+        self._ngram_index = None
+
+    @property
+    def global_candidates(self) -> pd.DataFrame:
+        """KIR rows of all cities, one per distinct (institution, city) pair, built on first use."""
+        if self._global_candidates is None:
+            self._global_candidates = build_global_candidates(self)
+        return self._global_candidates
+
+    @property
+    def ngram_index(self) -> NgramIndex:
+        """N-gram index over the institution names of global_candidates, built on first use."""
+        if self._ngram_index is None:
+            self._ngram_index = NgramIndex(self.global_candidates['Intézmény megnevezése'].tolist())
+        return self._ngram_index
 
-def _normalize_case_if_uppercase(text: str) -> str:
-    """Convert FULL UPPERCASE to normal case with exceptions."""
-    if pd.isna(text):
-        return text
-    
-    # Only transform if ENTIRE string is uppercase
-    if text != text.upper():
-        return text
-    
-    # Hardcoded lowercase words (common Hungarian conjunctions/articles)
-    lowercase_words = {'és', 'a', 'az', 'de', 'vagy'}
-    
-    words = text.split()
-    normalized = []
-    
-    for i, word in enumerate(words):
-        # Check for Roman numeral with dot (e.g., "XII.")
-        if re.match(r'^[IVX]+\.$', word):
-            # Keep uppercase: "XII."
-            normalized.append(word)
-        # Check if word is lowercase exception
-        elif word.lower() in lowercase_words:
-            normalized.append(word.lower())
-        else:
-            normalized.append(word.title())
-    
-    return ' '.join(normalized)
 
+def _name_index(kir_dict: Dict[str, pd.DataFrame]) -> Dict[str, dict]:
+    if isinstance(kir_dict, KirDatabase):
+        return kir_dict.name_index
+    return build_name_index(kir_dict)
 
-def load_kir_database(config) -> Dict[str, pd.DataFrame]:
-    """Load and validate KIR facility locations Excel file, return city-indexed dict."""
+
+def build_global_candidates(kir_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    KIR rows of all cities, keeping the first row of each (institution, city) pair.
+
+    Unlike name_index, schools of the same name in different cities stay
+    separate candidates. The merged Budapest entry is skipped, as its rows
+    are those of the districts.
+    """
+    frames = [city_df for city, city_df in kir_dict.items() if city != BUDAPEST]
+    if not frames:
+        return pd.DataFrame(columns=['Intézmény megnevezése', 'A feladatellátási hely települése'])
+    candidates_df = pd.concat(frames, ignore_index=True)
+    candidates_df = candidates_df[candidates_df['Intézmény megnevezése'].notna().to_numpy()]
+    distinct = ~candidates_df.duplicated(subset=['Intézmény megnevezése', 'A feladatellátási hely települése'])
+    return candidates_df[distinct.to_numpy()].reset_index(drop=True)
+
+
+def _global_index(kir_dict: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, NgramIndex]:
+    """Nationwide candidates and the n-gram index of their institution names."""
+    if isinstance(kir_dict, KirDatabase):
+        return kir_dict.global_candidates, kir_dict.ngram_index
+    candidates_df = build_global_candidates(kir_dict)
+    return candidates_df, NgramIndex(candidates_df['Intézmény megnevezése'].tolist())
+
+
+def _distinct_names(candidates_df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the first row of each distinct (institution, facility) name pair."""
+    return candidates_df[~candidates_df.duplicated(subset=NAME_COLUMNS).to_numpy()].reset_index(drop=True)
+
+
+def load_kir_database(config) -> KirDatabase:
+    """
+    Load and validate KIR facility locations Excel file, return city-indexed dict.
+
+    KIR has a row per facility, and many facilities of a city share both
+    names. Each city group keeps only the first row of every distinct
+    (institution, facility) name pair, which stands for its location data,
+    so matching work grows with the number of distinct names. The first
+    row is also the one a tie would have picked, so results are unchanged.
+    """
     filepath = Path(config['kir']['locations_file'])
 
     if not filepath.exists():
         raise FileNotFoundError(f"KIR database file not found: {filepath}")
 
-    kir_df = pd.read_excel(filepath)
+    # Location columns as categories shared by all city groups
+    kir_df = apply_schema(load_kir_table(filepath, config), KIR_CATEGORY_COLUMNS, {})
 
-    missing_columns = [col for col in REQUIRED_KIR_COLUMNS if col not in kir_df.columns]
+    # Group by normalized city, one row per distinct name pair
+    normalized_cities = kir_df['A feladatellátási hely települése'].map(normalize_city)
+    distinct = ~pd.concat([normalized_cities, kir_df[NAME_COLUMNS]], axis=1).duplicated()
+    candidates_df = kir_df[distinct.to_numpy()]
+    normalized_cities = normalized_cities[distinct]
 
-    if missing_columns:
-        raise ValueError(
-            f"KIR database missing required columns.\n"
-            f"Expected: {REQUIRED_KIR_COLUMNS}\n"
-            f"Missing: {missing_columns}\n"
-            f"Found: {list(kir_df.columns)}"
-        )
-
-    # Normalize FULL UPPERCASE names
-    kir_df['Intézmény megnevezése'] = kir_df['Intézmény megnevezése'].apply(_normalize_case_if_uppercase)
-    kir_df['A feladatellátási hely megnevezése'] = kir_df['A feladatellátási hely megnevezése'].apply(_normalize_case_if_uppercase)
-
-    # Keep only required columns
-    kir_df = kir_df[REQUIRED_KIR_COLUMNS]
-
-    # Group by normalized city
-    kir_df['_normalized_city'] = kir_df['A feladatellátási hely települése'].apply(normalize_city)
-    
     kir_dict = {}
-    for city, group in kir_df.groupby('_normalized_city'):
-        kir_dict[city] = group.drop(columns=['_normalized_city']).reset_index(drop=True)
+    for city, positions in normalized_cities.groupby(normalized_cities, observed=True).indices.items():
+        kir_dict[city] = candidates_df.take(positions).reset_index(drop=True)
     
     # Create special "budapest" entry by merging all Budapest districts
     budapest_dfs = []
@@ -88,13 +179,16 @@ def load_kir_database(config) -> Dict[str, pd.DataFrame]:
             budapest_dfs.append(kir_dict[city_key])
     
     if budapest_dfs:
-        kir_dict['budapest'] = pd.concat(budapest_dfs, ignore_index=True)
+        kir_dict['budapest'] = _distinct_names(pd.concat(budapest_dfs, ignore_index=True))
     
+    kir_database = KirDatabase(kir_dict)
+
     total_schools = len(kir_df)
-    total_cities = len(kir_dict)
+    total_cities = len(kir_database)
     log.info(f"Loaded {total_schools} schools from {total_cities} cities in KIR database")
+    log.info(f"Kept {len(candidates_df)} distinct school/facility names as match candidates")
     
-    return kir_dict
+    return kir_database
 
 
 def load_school_mapping(config) -> Dict[Tuple[str, str], dict]:
@@ -149,145 +243,624 @@ def normalize_city(city: str) -> str:
     return normalized
 
 
-def _calculate_best_match_score(our_name: str, candidate: pd.Series) -> float:
-    """Calculate best fuzzy match score across both name columns."""
-    scores = []
-    for column in ['Intézmény megnevezése', 'A feladatellátási hely megnevezése']:
-        if pd.notna(candidate.get(column)):
-            kir_name = candidate[column]
-            score = fuzz.token_set_ratio(our_name, kir_name)
-            scores.append(score)
-    return max(scores) if scores else 0
+def _kth_largest(scores: np.ndarray, keep: int) -> np.ndarray:
+    """The keep-th largest score of each row (last axis), 0 for rows with fewer scores."""
+    if scores.shape[-1] < keep:
+        return np.zeros(scores.shape[:-1])
+    return np.partition(scores, scores.shape[-1] - keep, axis=-1)[..., scores.shape[-1] - keep]
+
+
+def _facility_cutoffs(institution_scores: np.ndarray, keep: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score cutoff and candidate limit of the facility name column, per school.
+
+    A facility name scoring below the school's keep-th best institution
+    name score cannot change the keep best scores or which candidates reach
+    them first, so it is scored with that cutoff. Once keep institution
+    names score 100, only candidates before the last of them can still win
+    a tie, so the search stops there.
+
+    Args:
+        institution_scores: (schools, candidates) institution name scores
+        keep: Number of best candidates that must stay exact
+
+    Returns:
+        tuple: (cutoffs, limits) per school; facility names are scored only
+        for candidates before the limit
+    """
+    candidate_count = institution_scores.shape[1]
+    if candidate_count == 0:
+        return np.zeros(len(institution_scores)), np.zeros(len(institution_scores), dtype=np.int64)
+    cutoffs = _kth_largest(institution_scores, keep)
+    perfect_counts = np.cumsum(institution_scores >= 100, axis=1)
+    limits = np.where(perfect_counts[:, -1] >= keep, np.argmax(perfect_counts >= keep, axis=1), candidate_count)
+    return cutoffs, limits
+
+
+def _score_matrix(
+    our_names: List[str],
+    candidates_df: pd.DataFrame,
+    workers: int = 1,
+    score_cutoff: bool = False,
+    scorer: Optional[Scorer] = None,
+    keep: int = 1
+) -> np.ndarray:
+    """
+    Score our school names against all candidates in one batch per name column.
+
+    Args:
+        our_names: School names from the competition data
+        candidates_df: KIR rows of one city
+        workers: Threads used by rapidfuzz to score the rows (-1: all cores)
+        score_cutoff: Score facility names only where they can beat the best
+            institution name score (see _facility_cutoffs), and let weighted
+            scorers skip hopeless candidates; the keep best scores and
+            candidates stay the same, but lower scores may be understated
+        scorer: Scorer from get_scorer (default: token_set_ratio)
+        keep: Number of best candidates per school that must stay exact
+
+    Returns:
+        np.ndarray: (len(our_names), len(candidates_df)) best score across
+        both name columns; 0 where a candidate has no name
+    """
+    if scorer is None:
+        scorer = get_scorer(DEFAULT_ALGORITHM)
+    queries = ['' if pd.isna(name) else name for name in our_names]
+    scores = np.zeros((len(queries), len(candidates_df)))
+    for column in NAME_COLUMNS:
+        names = candidates_df[column]
+        present = names.notna().to_numpy()
+        if not present.any():
+            continue
+        if score_cutoff and column != NAME_COLUMNS[0]:
+            _score_facilities(queries, names.to_numpy(), present, scores, workers, scorer, keep)
+            continue
+        column_scores = scorer.matrix(queries, names[present].tolist(), workers, 0 if score_cutoff else None, keep)
+        scores[:, present] = np.maximum(scores[:, present], column_scores)
+    return scores
+
+
+def score_candidates(
+    our_names: List[str],
+    candidates_df: pd.DataFrame,
+    scorer: Optional[Scorer] = None,
+    score_cutoff: bool = True,
+    workers: int = 1
+) -> np.ndarray:
+    """
+    Score school names against the KIR rows of one city, as the matcher does.
+
+    Args:
+        our_names: School names from the competition data
+        candidates_df: KIR rows of one city
+        scorer: Scorer from get_scorer (default: token_set_ratio)
+        score_cutoff: Skip facility names that cannot beat the best
+            institution name score; the best score and candidate stay the same
+        workers: Threads used by rapidfuzz (-1: all cores)
+
+    Returns:
+        np.ndarray: (len(our_names), len(candidates_df)) scores
+    """
+    return _score_matrix(our_names, candidates_df, workers=workers, score_cutoff=score_cutoff, scorer=scorer)
+
+
+def count_facility_comparisons(
+    our_names: List[str],
+    candidates_df: pd.DataFrame,
+    scorer: Optional[Scorer] = None
+) -> Tuple[int, int, int]:
+    """
+    Facility name comparisons of one city saved by the score cutoff.
+
+    Args:
+        our_names: School names from the competition data
+        candidates_df: KIR rows of one city
+        scorer: Scorer from get_scorer (default: token_set_ratio)
+
+    Returns:
+        tuple: (total, skipped, pruned) facility name comparisons: all of
+        them, those skipped after a perfect institution name score, and
+        those skipped or scored below the cutoff
+    """
+    if scorer is None:
+        scorer = get_scorer(DEFAULT_ALGORITHM)
+    queries = ['' if pd.isna(name) else name for name in our_names]
+
+    def column_scores(column):
+        names = candidates_df[column]
+        present = names.notna().to_numpy()
+        scores = np.zeros((len(queries), len(candidates_df)))
+        if present.any():
+            scores[:, present] = scorer.matrix(queries, names[present].tolist())
+        return scores, present
+
+    institution_scores, _ = column_scores(NAME_COLUMNS[0])
+    facility_scores, present = column_scores(NAME_COLUMNS[1])
+    cutoffs, limits = _facility_cutoffs(institution_scores)
+
+    after_limit = np.arange(len(candidates_df)) >= limits[:, None]
+    skipped = present & after_limit
+    pruned = present & (after_limit | (facility_scores < cutoffs[:, None]))
+    return int(present.sum()) * len(queries), int(skipped.sum()), int(pruned.sum())
+
+
+def _score_facilities(
+    queries: List[str],
+    names: np.ndarray,
+    present: np.ndarray,
+    scores: np.ndarray,
+    workers: int,
+    scorer: Scorer,
+    keep: int = 1
+) -> None:
+    """Add facility name scores to scores, school by school with a running cutoff."""
+    cutoffs, limits = _facility_cutoffs(scores, keep)
+    for row, query in enumerate(queries):
+        positions = np.flatnonzero(present[:limits[row]])
+        if len(positions) == 0:
+            continue
+        column_scores = scorer.matrix(
+            [query], names[positions].tolist(), workers, max(cutoffs[row] - _SCORE_CUTOFF_MARGIN, 0), keep
+        )[0]
+        scores[row, positions] = np.maximum(scores[row, positions], column_scores)
 
 
-def match_school(
+def _pruned_scores(
     our_name: str,
-    our_city: str,
-    kir_dict: Dict[str, pd.DataFrame],
-    manual_mapping: Dict,
-    config
-) -> dict:
-    """Find best match for a school in KIR database."""
-    key = (our_name, our_city)
-    if key in manual_mapping:
-        manual_entry = manual_mapping[key]
-        corrected_name = manual_entry['corrected_school_name']
-
-        if corrected_name == 'DROP':
-            return {
-                'matched_school_name': None,
-                'matched_city': None,
-                'matched_county': None,
-                'matched_region': None,
-                'confidence_score': None,
-                'match_method': 'MANUAL_DROP',
-                'comment': manual_entry['comment']
-            }
-
-        # Search for manual match across all cities
-        for city_df in kir_dict.values():
-            kir_match = city_df[city_df['Intézmény megnevezése'] == corrected_name]
-            if len(kir_match) > 0:
-                kir_row = kir_match.iloc[0]
-                return {
-                    'matched_school_name': kir_row['Intézmény megnevezése'],
-                    'matched_city': kir_row['A feladatellátási hely települése'],
-                    'matched_county': kir_row['A feladatellátási hely vármegyéje'],
-                    'matched_region': kir_row['A feladatellátási hely régiója'],
-                    'confidence_score': None,
-                    'match_method': 'MANUAL',
-                    'comment': manual_entry['comment']
-                }
-        
-        log.warning(f"Manual mapping references non-existent KIR school: {corrected_name}")
-        return {
-            'matched_school_name': None,
-            'matched_city': None,
-            'matched_county': None,
-            'matched_region': None,
-            'confidence_score': None,
-            'match_method': 'NO_MATCH',
-            'comment': 'Manual mapping references non-existent KIR school'
-        }
+    candidates_df: pd.DataFrame,
+    indexes: Dict[str, CandidateIndex],
+    workers: int = 1,
+    score_cutoff: bool = False,
+    keep: int = 1
+) -> np.ndarray:
+    """
+    Score one school name against a large candidate set through token indexes.
+
+    The shortlist of each name column is scored first. Every other name is
+    scored only if its upper bound reaches the best score so far, so the
+    best score and the first candidate reaching it are the same as with
+    _score_matrix; scores of pruned candidates, all below the best, are 0.
+
+    Args:
+        our_name: School name from the competition data
+        candidates_df: KIR rows of one city
+        indexes: CandidateIndex of each name column of candidates_df
+        workers: Threads used by rapidfuzz
+        score_cutoff: Score the names outside the shortlists with the best
+            shortlist score as cutoff, so those below it are rejected early
+        keep: Number of best candidates that must stay exact; the keep-th
+            best shortlist score takes the place of the best score
+
+    Returns:
+        np.ndarray: Best token_set_ratio per candidate across both name columns
+    """
+    query = '' if pd.isna(our_name) else our_name
+    scores = np.zeros(len(candidates_df))
+    scored = {}
+
+    def score(column, positions, cutoff=None):
+        if len(positions) == 0:
+            return
+        names = candidates_df[column].to_numpy()[positions].tolist()
+        column_scores = process.cdist(
+            [query], names, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=workers, score_cutoff=cutoff
+        )[0]
+        scores[positions] = np.maximum(scores[positions], column_scores)
+
+    for column, index in indexes.items():
+        scored[column] = index.shortlist(query, SHORTLIST_SIZE)
+        score(column, scored[column])
+
+    best_score = float(_kth_largest(scores, keep))
+    for column, index in indexes.items():
+        reachable = index.upper_bounds(query) >= best_score - _BOUND_TOLERANCE
+        reachable[scored[column]] = False
+        score(column, np.flatnonzero(reachable), max(best_score - _SCORE_CUTOFF_MARGIN, 0) if score_cutoff else None)
+
+    return scores
+
+
+def _unmatched_result(match_method: str, comment: str) -> dict:
+    return {
+        'matched_school_name': None,
+        'matched_city': None,
+        'matched_county': None,
+        'matched_region': None,
+        'confidence_score': None,
+        'match_method': match_method,
+        'comment': comment
+    }
 
-    # Lookup candidates by normalized city
-    normalized_city = normalize_city(our_city)
-    candidates_df = kir_dict.get(normalized_city, pd.DataFrame())
 
-    if candidates_df.empty:
-        return {
-            'matched_school_name': None,
-            'matched_city': None,
-            'matched_county': None,
-            'matched_region': None,
-            'confidence_score': None,
-            'match_method': 'NO_MATCH',
-            'comment': 'No schools found in this city in KIR database'
+def _kir_result(kir_row, confidence_score, match_method: str, comment: str) -> dict:
+    return {
+        'matched_school_name': kir_row['Intézmény megnevezése'],
+        'matched_city': kir_row['A feladatellátási hely települése'],
+        'matched_county': kir_row['A feladatellátási hely vármegyéje'],
+        'matched_region': kir_row['A feladatellátási hely régiója'],
+        'confidence_score': confidence_score,
+        'match_method': match_method,
+        'comment': comment
+    }
+
+
+def find_dangling_mappings(manual_mapping: Dict, name_index: Dict[str, dict]) -> List[Tuple[str, str]]:
+    """
+    Manual mappings whose corrected_school_name is not a KIR institution.
+
+    All of them are reported in a single warning.
+
+    Args:
+        manual_mapping: Manual school mapping from load_school_mapping
+        name_index: Institution name index from build_name_index
+
+    Returns:
+        list: (school_name, city) keys of the dangling mappings
+    """
+    dangling = [
+        key for key, entry in manual_mapping.items()
+        if entry['corrected_school_name'] != 'DROP' and entry['corrected_school_name'] not in name_index
+    ]
+    if dangling:
+        details = ", ".join(f"{key} -> {manual_mapping[key]['corrected_school_name']}" for key in dangling)
+        log.warning(f"{len(dangling)} manual mapping(s) reference non-existent KIR schools: {details}")
+    return dangling
+
+
+def _manual_match(key: Tuple[str, str], name_index: Dict[str, dict], manual_mapping: Dict) -> Optional[dict]:
+    """Result of the manual mapping for a school, or None if it has no manual entry."""
+    if key not in manual_mapping:
+        return None
+
+    manual_entry = manual_mapping[key]
+    corrected_name = manual_entry['corrected_school_name']
+
+    if corrected_name == 'DROP':
+        return _unmatched_result('MANUAL_DROP', manual_entry['comment'])
+
+    kir_row = name_index.get(corrected_name)
+    if kir_row is not None:
+        return _kir_result(kir_row, None, 'MANUAL', manual_entry['comment'])
+
+    return _unmatched_result('NO_MATCH', 'Manual mapping references non-existent KIR school')
+
+
+def _top_candidates(scores: np.ndarray, candidates_df: pd.DataFrame, top_k: int) -> List[dict]:
+    """The top_k best scoring candidates with a positive score, best first; ties in KIR order."""
+    best_positions = np.argsort(-scores, kind='stable')[:top_k]
+    return [
+        {
+            'school_name': candidates_df['Intézmény megnevezése'].iloc[position],
+            'facility_name': candidates_df['A feladatellátási hely megnevezése'].iloc[position],
+            'city': candidates_df['A feladatellátási hely települése'].iloc[position],
+            'score': float(scores[position])
         }
+        for position in best_positions if scores[position] > 0
+    ]
+
 
-    best_match = None
-    best_score = 0
+def _fuzzy_result(scores: np.ndarray, candidates_df: pd.DataFrame, config) -> dict:
+    """
+    Classify the best scoring candidate; ties go to the first candidate, as in KIR order.
 
-    for _, candidate in candidates_df.iterrows():
-        score = _calculate_best_match_score(our_name, candidate)
-        if score > best_score:
-            best_score = score
-            best_match = candidate
+    With matching.review_top_k set, the best candidates are listed under
+    'candidates' for the review file.
+    """
+    best_index = int(np.argmax(scores))
+    best_score = float(scores[best_index])
 
     medium_threshold = config['matching']['medium_confidence_threshold']
     high_threshold = config['matching']['high_confidence_threshold']
+    top_k = config['matching'].get('review_top_k', 0)
+    candidates = {'candidates': _top_candidates(scores, candidates_df, top_k)} if top_k else {}
 
     if best_score < medium_threshold:
-        return {
-            'matched_school_name': best_match['Intézmény megnevezése'],
-            'matched_city': best_match['A feladatellátási hely települése'],
-            'matched_county': best_match['A feladatellátási hely vármegyéje'],
-            'matched_region': best_match['A feladatellátási hely régiója'],
-            'confidence_score': best_score,
-            'match_method': 'DROPPED',
-            'comment': f'Low confidence (score < {medium_threshold}) - needs manual review'
-        }
+        comment = f'Low confidence (score < {medium_threshold}) - needs manual review'
+        if best_score == 0:
+            return {**_unmatched_result('DROPPED', comment), 'confidence_score': best_score, **candidates}
+        return {**_kir_result(candidates_df.iloc[best_index], best_score, 'DROPPED', comment), **candidates}
 
     match_method = 'AUTO_HIGH' if best_score >= high_threshold else 'AUTO_MEDIUM'
+    return {**_kir_result(candidates_df.iloc[best_index], best_score, match_method, ''), **candidates}
+
+
+class MatchCache:
+    """
+    Fuzzy match results of (school name, city) pairs, persisted across runs.
+
+    The cache is only valid for one fingerprint, which should cover the KIR
+    release, the matching settings and the matching code; a different
+    fingerprint starts an empty cache. Manual mappings are always resolved
+    fresh and never stored, so editing the mapping file needs no
+    invalidation.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        """
+        Args:
+            path: Pickle file holding the cache
+            fingerprint: Identifies the KIR data, settings and code the results depend on
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[Tuple[str, str], dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                stored = pickle.load(f)
+        except Exception as e:
+            log.warning(f"Failed to read school match cache {self.path}, starting empty: {e}")
+            return {}
+        if stored.get('fingerprint') != self.fingerprint:
+            log.info("School match cache is outdated (KIR data, settings or code changed), starting empty")
+            return {}
+        return stored['entries']
+
+    def get(self, key: Tuple[str, str]) -> Optional[dict]:
+        """Cached result of a pair, counting the lookup as a hit or a miss."""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: Tuple[str, str], result: dict) -> None:
+        self.entries[key] = result
+
+    def save(self) -> None:
+        """Write the cache to disk atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'fingerprint': self.fingerprint, 'entries': self.entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.path)
+
+    def log_summary(self) -> None:
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        log.info(f"School match cache: {self.hits}/{lookups} pairs reused ({rate:.0f}%), {self.misses} scored")
+
+
+def district_hint(school_name: str) -> Optional[str]:
+    """
+    Normalized Budapest district key named in a school name, e.g. 'budapest xii.'.
+
+    Returns None when the name mentions no valid district.
+    """
+    if pd.isna(school_name):
+        return None
+    for match in _DISTRICT_HINT_RE.finditer(school_name):
+        numeral = match.group(1) or match.group(2)
+        if numeral in BUDAPEST_DISTRICTS:
+            return f"{BUDAPEST} {numeral.lower()}."
+    return None
+
+
+def _canonical_index(candidates_df: pd.DataFrame) -> Dict[str, Optional[int]]:
+    """
+    Map the canonical keys of both name columns to the first KIR row carrying them.
+
+    Keys shared by different institutions map to None, as they do not
+    identify a single school.
+    """
+    canonical_index = {}
+    institution_names = candidates_df['Intézmény megnevezése'].tolist()
+    for column in NAME_COLUMNS:
+        for position, name in enumerate(candidates_df[column].tolist()):
+            key = canonicalize_school_name(name)
+            if not key:
+                continue
+            if key not in canonical_index:
+                canonical_index[key] = position
+            elif canonical_index[key] is not None and institution_names[canonical_index[key]] != institution_names[position]:
+                canonical_index[key] = None
+    return canonical_index
+
+
+def _match_group(our_names: List[str], candidates_df: pd.DataFrame, config) -> List[dict]:
+    """
+    Match school names against the KIR rows of one city group.
+
+    Names whose canonical key identifies a single KIR institution are
+    matched as AUTO_HIGH with score 100 without fuzzy scoring
+    (matching.canonical_fast_path); the rest are fuzzy matched.
+    """
+    if candidates_df.empty:
+        return [_unmatched_result('NO_MATCH', NO_CITY_MATCH_COMMENT) for _ in our_names]
+
+    match_results = [None] * len(our_names)
+    if config['matching'].get('canonical_fast_path', True):
+        canonical_index = _canonical_index(candidates_df)
+        for position, name in enumerate(our_names):
+            kir_position = canonical_index.get(canonicalize_school_name(name))
+            if kir_position is not None:
+                match_results[position] = _kir_result(
+                    candidates_df.iloc[kir_position], 100.0, 'AUTO_HIGH', CANONICAL_MATCH_COMMENT
+                )
+
+    remaining = [position for position, match_result in enumerate(match_results) if match_result is None]
+    if not remaining:
+        return match_results
+    remaining_names = [our_names[position] for position in remaining]
+
+    workers = config['matching'].get('workers', -1)
+    pruning_min_size = config['matching'].get('candidate_pruning_min_size', 0)
+    score_cutoff = config['matching'].get('score_cutoff', True)
+    scorer = get_scorer(config['matching'].get('algorithm'))
+    keep = max(config['matching'].get('review_top_k', 0), 1)
+
+    if pruning_min_size and len(candidates_df) >= pruning_min_size and scorer.is_token_set_ratio:
+        indexes = {column: CandidateIndex(candidates_df[column].tolist()) for column in NAME_COLUMNS}
+        scores = [_pruned_scores(name, candidates_df, indexes, workers, score_cutoff, keep) for name in remaining_names]
+    else:
+        scores = _score_matrix(remaining_names, candidates_df, workers, score_cutoff, scorer, keep)
+    for position, school_scores in zip(remaining, scores):
+        match_results[position] = _fuzzy_result(school_scores, candidates_df, config)
+    return match_results
+
+
+def _global_fallback(our_names: List[str], kir_dict: Dict[str, pd.DataFrame], config) -> List[dict]:
+    """
+    Suggest KIR schools of other cities for the schools of a city missing from KIR.
+
+    The GLOBAL_SHORTLIST_SIZE schools most similar by character n-grams
+    are scored with the configured scorer. If exactly one of them reaches
+    the best score, and that score is at least
+    matching.global_fallback_threshold, the school is marked AUTO_GLOBAL;
+    otherwise it stays NO_MATCH. Either way the shortlist is kept as review
+    candidates. AUTO_GLOBAL is a suggestion only and is never applied:
+    subset-friendly scorers such as token_set_ratio give 100 to a name
+    contained in another, and a school of the same name may exist in
+    several cities.
+    """
+    global_df, ngram_index = _global_index(kir_dict)
+    scorer = get_scorer(config['matching'].get('algorithm'))
+    threshold = config['matching'].get('global_fallback_threshold', 95)
+    top_k = config['matching'].get('review_top_k', 0)
+
+    match_results = []
+    for our_name in our_names:
+        positions, _ = ngram_index.nearest(our_name, GLOBAL_SHORTLIST_SIZE)
+        if len(positions) == 0:
+            match_results.append(_unmatched_result('NO_MATCH', NO_CITY_MATCH_COMMENT))
+            continue
 
-    return {
-        'matched_school_name': best_match['Intézmény megnevezése'],
-        'matched_city': best_match['A feladatellátási hely települése'],
-        'matched_county': best_match['A feladatellátási hely vármegyéje'],
-        'matched_region': best_match['A feladatellátási hely régiója'],
-        'confidence_score': best_score,
-        'match_method': match_method,
-        'comment': ''
-    }
+        shortlist_df = global_df.iloc[positions]
+        query = '' if pd.isna(our_name) else our_name
+        scores = scorer.matrix([query], shortlist_df['Intézmény megnevezése'].tolist())[0]
+        candidates = {'candidates': _top_candidates(scores, shortlist_df, top_k)} if top_k else {}
+
+        best_index = int(np.argmax(scores))
+        if scores[best_index] >= threshold and np.count_nonzero(scores >= scores[best_index]) == 1:
+            match_result = _kir_result(
+                shortlist_df.iloc[best_index], float(scores[best_index]), 'AUTO_GLOBAL', GLOBAL_MATCH_COMMENT
+            )
+        else:
+            match_result = _unmatched_result('NO_MATCH', NO_CITY_MATCH_COMMENT)
+        match_results.append({**match_result, **candidates})
+    return match_results
+
+
+def _match_city(city: str, our_names: List[str], kir_dict: Dict[str, pd.DataFrame], config) -> List[dict]:
+    """
+    Fuzzy match school names of one normalized city.
+
+    Schools listed under Budapest without a district are first matched
+    against the district named in the school name, if any; only those that
+    do not reach the medium confidence threshold there are matched against
+    the whole city. Disabled with matching.district_hints: False.
+    Schools of cities without KIR rows are searched nationwide
+    (see _global_fallback), unless matching.global_fallback is False.
+    """
+    if city not in kir_dict and config['matching'].get('global_fallback', True):
+        return _global_fallback(our_names, kir_dict, config)
+
+    if city != BUDAPEST or not config['matching'].get('district_hints', True):
+        return _match_group(our_names, kir_dict.get(city, pd.DataFrame()), config)
+
+    match_results = [None] * len(our_names)
+    positions_by_district = {}
+    for position, name in enumerate(our_names):
+        district = district_hint(name)
+        if district in kir_dict:
+            positions_by_district.setdefault(district, []).append(position)
+
+    for district, positions in positions_by_district.items():
+        district_results = _match_group([our_names[position] for position in positions], kir_dict[district], config)
+        for position, match_result in zip(positions, district_results):
+            if match_result['match_method'] in ('AUTO_HIGH', 'AUTO_MEDIUM'):
+                match_results[position] = match_result
+
+    remaining = [position for position, match_result in enumerate(match_results) if match_result is None]
+    log.info(f"District hints resolved {len(our_names) - len(remaining)} of {len(our_names)} Budapest schools")
+
+    city_results = _match_group([our_names[position] for position in remaining], kir_dict.get(city, pd.DataFrame()), config)
+    for position, match_result in zip(remaining, city_results):
+        match_results[position] = match_result
+    return match_results
+
+
+def match_school(
+    our_name: str,
+    our_city: str,
+    kir_dict: Dict[str, pd.DataFrame],
+    manual_mapping: Dict,
+    config
+) -> dict:
+    """Find best match for a school in KIR database."""
+    key = (our_name, our_city)
+    if key in manual_mapping:
+        name_index = _name_index(kir_dict)
+        find_dangling_mappings({key: manual_mapping[key]}, name_index)
+        return _manual_match(key, name_index, manual_mapping)
+
+    # Lookup candidates by normalized city
+    return _match_city(normalize_city(our_city), [our_name], kir_dict, config)[0]
 
 
 def match_all_schools(
     our_df: pd.DataFrame,
     kir_dict: Dict[str, pd.DataFrame],
     manual_mapping: Dict,
-    config
+    config,
+    match_cache: Optional[MatchCache] = None
 ) -> pd.DataFrame:
-    """Match all unique schools in competition data to KIR."""
-    # Collect unique normalized cities from competition data
-    unique_cities = set(our_df['varos'].apply(normalize_city).unique())
-    
-    # Filter KIR dict to only cities in competition data
-    original_city_count = len(kir_dict)
-    filtered_kir_dict = {city: df for city, df in kir_dict.items() if city in unique_cities}
-    filtered_city_count = len(filtered_kir_dict)
-    
-    log.info(f"Filtered KIR to {filtered_city_count} cities (from {original_city_count} total)")
-    
+    """
+    Match all unique schools in competition data to KIR.
+
+    Manual mappings are resolved through the KIR name index, in any city;
+    mappings to names missing from KIR are reported together up front.
+    Schools without a manual mapping are grouped by normalized city, and each
+    city's schools are scored against all of its KIR candidates in one batch,
+    with the scorer selected by matching.algorithm (see get_scorer).
+    The rows of a batch are scored on matching.workers threads (default: all
+    cores); results do not depend on the worker count. With token_set_ratio,
+    cities with at least matching.candidate_pruning_min_size KIR rows (e.g.
+    the merged Budapest entry) are scored school by school through token
+    indexes, which skip candidates that provably cannot be the best match. Budapest schools
+    without a district are searched in the district their name mentions
+    before the whole city. With a match_cache,
+    only pairs missing from it are scored, and their results are added to it.
+    """
     unique_schools = our_df[['iskola_nev', 'varos']].drop_duplicates()
+    school_names = unique_schools['iskola_nev'].tolist()
+    school_cities = unique_schools['varos'].tolist()
+
+    name_index = _name_index(kir_dict)
+    find_dangling_mappings(manual_mapping, name_index)
+
+    match_results = [None] * len(school_names)
+    positions_by_city = {}
+    for position, key in enumerate(zip(school_names, school_cities)):
+        manual_result = _manual_match(key, name_index, manual_mapping)
+        cached_result = None if manual_result is not None or match_cache is None else match_cache.get(key)
+        if manual_result is not None:
+            match_results[position] = manual_result
+        elif cached_result is not None:
+            match_results[position] = cached_result
+        else:
+            positions_by_city.setdefault(normalize_city(key[1]), []).append(position)
 
-    results = []
-    for _, row in unique_schools.iterrows():
-        school_name = row['iskola_nev']
-        city = row['varos']
+    for city, positions in positions_by_city.items():
+        city_results = _match_city(city, [school_names[position] for position in positions], kir_dict, config)
+        for position, match_result in zip(positions, city_results):
+            match_results[position] = match_result
 
-        match_result = match_school(school_name, city, filtered_kir_dict, manual_mapping, config)
+    if match_cache is not None:
+        for positions in positions_by_city.values():
+            for position in positions:
+                match_cache.put((school_names[position], school_cities[position]), match_results[position])
+        match_cache.log_summary()
 
-        status = 'APPLIED' if match_result['match_method'] in ['MANUAL', 'AUTO_HIGH', 'AUTO_MEDIUM'] else 'NOT_APPLIED'
+    results = []
+    for school_name, city, match_result in zip(school_names, school_cities, match_results):
+        status = 'APPLIED' if match_result['match_method'] in APPLIED_METHODS else 'NOT_APPLIED'
 
         results.append({
             'our_school_name': school_name,
@@ -299,10 +872,14 @@ def match_all_schools(
             'confidence_score': match_result['confidence_score'],
             'match_method': match_result['match_method'],
             'status': status,
-            'comment': match_result['comment']
+            'comment': match_result['comment'],
+            'candidates': match_result.get('candidates', [])
         })
 
-    results_df = pd.DataFrame(results)
+    results_df = apply_schema(pd.DataFrame(results), MATCH_RESULT_CATEGORY_COLUMNS, {})
+
+    canonical_count = int((results_df['comment'] == CANONICAL_MATCH_COMMENT).sum())
+    log.info(f"{canonical_count} schools matched exactly after name normalization, without fuzzy scoring")
 
     manual_count = len(results_df[results_df['match_method'] == 'MANUAL'])
     manual_drop_count = len(results_df[results_df['match_method'] == 'MANUAL_DROP'])
@@ -310,11 +887,12 @@ def match_all_schools(
     auto_medium_count = len(results_df[results_df['match_method'] == 'AUTO_MEDIUM'])
     dropped_count = len(results_df[results_df['match_method'] == 'DROPPED'])
     no_match_count = len(results_df[results_df['match_method'] == 'NO_MATCH'])
+    auto_global_count = len(results_df[results_df['match_method'] == 'AUTO_GLOBAL'])
 
     log.info(
         f"Matched {len(results_df)} schools: "
         f"{manual_count} manual, {auto_high_count} high-conf, "
-        f"{auto_medium_count} medium-conf, {dropped_count} dropped, "
+        f"{auto_medium_count} medium-conf, {auto_global_count} nationwide, {dropped_count} dropped, "
         f"{no_match_count} no-match, {manual_drop_count} manual-drop"
     )
 
@@ -323,7 +901,8 @@ def match_all_schools(
 
 def apply_matches(our_df: pd.DataFrame, match_results: pd.DataFrame) -> pd.DataFrame:
     """Apply school matches to competition DataFrame."""
-    result_df = our_df.copy()
+    # Matched names replace the originals, so edit as plain objects and re-apply the schema at the end
+    result_df = our_df.astype({col: object for col in ['iskola_nev', 'varos'] if col in our_df.columns})
 
     result_df['varmegye'] = None
     result_df['regio'] = None
@@ -351,7 +930,7 @@ def apply_matches(our_df: pd.DataFrame, match_results: pd.DataFrame) -> pd.DataF
             result_df.at[idx, 'regio'] = match['matched_region']
             rows_to_keep.append(idx)
 
-    result_df = result_df.loc[rows_to_keep]
+    result_df = apply_schema(result_df.loc[rows_to_keep])
 
     applied_count = len(match_results[match_results['status'] == 'APPLIED'])
     dropped_count = len(match_results[match_results['status'] == 'NOT_APPLIED'])
@@ -363,7 +942,7 @@ def apply_matches(our_df: pd.DataFrame, match_results: pd.DataFrame) -> pd.DataF
 
 def generate_audit_file(match_results: pd.DataFrame, output_path: Path) -> None:
     """Generate audit CSV file from match results."""
-    audit_df = match_results.copy()
+    audit_df = match_results.drop(columns=['candidates'], errors='ignore')
     audit_df = audit_df.sort_values(by=['match_method', 'our_school_name'])
     audit_df.to_csv(output_path, sep=';', encoding='utf-8', index=False)
 
@@ -371,3 +950,48 @@ def generate_audit_file(match_results: pd.DataFrame, output_path: Path) -> None:
     dropped_count = len(audit_df[audit_df['status'] == 'NOT_APPLIED'])
 
     log.info(f"Generated audit file: {len(audit_df)} schools, {applied_count} applied, {dropped_count} dropped")
+
+
+def generate_review_file(match_results: pd.DataFrame, output_path: Path) -> None:
+    """
+    Write the best KIR candidates of the schools needing review to a CSV file.
+
+    Schools matched with medium confidence, dropped for low confidence or
+    without KIR candidates in their city get one row per candidate (see
+    matching.review_top_k), ranked from 1, with the candidate's institution
+    name as it should appear in config/school_mapping.csv. Schools without
+    candidates get a single row with empty candidate columns.
+
+    Args:
+        match_results: Results of match_all_schools
+        output_path: Output CSV path
+    """
+    review_df = match_results[match_results['match_method'].isin(REVIEW_METHODS)]
+    rows = []
+    for school in review_df.itertuples(index=False):
+        school_columns = {
+            'our_school_name': school.our_school_name,
+            'our_city': school.our_city,
+            'match_method': school.match_method,
+            'confidence_score': school.confidence_score
+        }
+        candidates = getattr(school, 'candidates', None) or [{}]
+        for rank, candidate in enumerate(candidates, start=1):
+            rows.append({
+                **school_columns,
+                'rank': rank if candidate else None,
+                'candidate_school_name': candidate.get('school_name'),
+                'candidate_facility_name': candidate.get('facility_name'),
+                'candidate_city': candidate.get('city'),
+                'candidate_score': candidate.get('score')
+            })
+
+    columns = [
+        'our_school_name', 'our_city', 'match_method', 'confidence_score',
+        'rank', 'candidate_school_name', 'candidate_facility_name', 'candidate_city', 'candidate_score'
+    ]
+    review_rows = pd.DataFrame(rows, columns=columns).astype({'rank': 'Int64'})
+    review_rows = review_rows.sort_values(by=['match_method', 'our_school_name', 'our_city', 'rank'], kind='stable')
+    review_rows.to_csv(output_path, sep=';', encoding='utf-8', index=False)
+
+    log.info(f"Generated review file: {len(review_df)} schools, {review_rows['rank'].notna().sum()} candidates")
@@ -0,0 +1,148 @@
+"""Name similarity scorers selectable through matching.algorithm."""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+SCORERS = {
+    'ratio': fuzz.ratio,
+    'partial_ratio': fuzz.partial_ratio,
+    'token_sort_ratio': fuzz.token_sort_ratio,
+    'token_set_ratio': fuzz.token_set_ratio,
+    'partial_token_set_ratio': fuzz.partial_token_set_ratio,
+    'WRatio': fuzz.WRatio,
+    'QRatio': fuzz.QRatio,
+}
+
+DEFAULT_ALGORITHM = 'token_set_ratio'
+
+# Margin below a score bound, against float rounding in weighted sums
+_BOUND_MARGIN = 0.01
+
+
+class Scorer:
+    """
+    Weighted combination of rapidfuzz scorers, scoring name lists in matrix form.
+
+    A single scorer has weight 1. Weights are normalized to sum to 1, so
+    scores stay on the 0-100 scale the confidence thresholds use.
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        """
+        Args:
+            weights: Scorer name (a key of SCORERS) -> positive weight
+
+        Raises:
+            ValueError: For unknown scorers or non-positive weights
+        """
+        unknown = [name for name in weights if name not in SCORERS]
+        if unknown:
+            raise ValueError(f"Unknown matching algorithm(s) {unknown}, expected one of {list(SCORERS)}")
+        if not weights or any(weight <= 0 for weight in weights.values()):
+            raise ValueError(f"Matching algorithm weights must be positive: {weights}")
+
+        total = sum(weights.values())
+        # Heaviest scorer first: it alone bounds the weighted score most tightly
+        self.weights = sorted(
+            ((name, weight / total) for name, weight in weights.items()), key=lambda item: -item[1]
+        )
+        if len(self.weights) == 1:
+            self.name = self.weights[0][0]
+        else:
+            self.name = ' + '.join(f"{weight:g}*{name}" for name, weight in self.weights)
+
+    @property
+    def is_token_set_ratio(self) -> bool:
+        """True for plain token_set_ratio, the scorer CandidateIndex bounds."""
+        return [name for name, _ in self.weights] == ['token_set_ratio']
+
+    def matrix(
+        self,
+        queries: List[str],
+        names: List[str],
+        workers: int = 1,
+        score_cutoff: Optional[float] = None,
+        keep: int = 1
+    ) -> np.ndarray:
+        """
+        Score every query against every name.
+
+        Args:
+            queries: Names to match
+            names: Candidate names
+            workers: Threads used by rapidfuzz (-1: all cores)
+            score_cutoff: Scores below this are returned as 0, as in
+                rapidfuzz. For weighted scorers it also lets the secondary
+                scorers skip candidates that cannot reach the cutoff or the
+                keep-th best weighted score among the query's keep best
+                primary candidates, so only the keep best scores are exact;
+                None scores everything.
+            keep: Number of best scores per query that must stay exact
+
+        Returns:
+            np.ndarray: (len(queries), len(names)) scores
+        """
+        primary, primary_weight = self.weights[0]
+        primary_scores = process.cdist(
+            queries, names, scorer=SCORERS[primary], dtype=np.float64, workers=workers,
+            score_cutoff=score_cutoff if len(self.weights) == 1 else None
+        )
+        if len(self.weights) == 1:
+            return primary_scores
+
+        if score_cutoff is None:
+            scores = primary_weight * primary_scores
+            for name, weight in self.weights[1:]:
+                scores += weight * process.cdist(queries, names, scorer=SCORERS[name], dtype=np.float64, workers=workers)
+            return scores
+
+        scores = np.zeros(primary_scores.shape)
+        bounds = primary_weight * primary_scores + (1 - primary_weight) * 100
+        for row, query in enumerate(queries):
+            if not names:
+                break
+            lower = score_cutoff
+            if len(names) >= keep:
+                best = np.argsort(-primary_scores[row], kind='stable')[:keep]
+                weighted = [self._weighted(query, names[position], primary_scores[row, position]) for position in best]
+                lower = max(lower, min(weighted))
+            positions = np.flatnonzero(bounds[row] >= lower - _BOUND_MARGIN)
+            row_scores = primary_weight * primary_scores[row, positions]
+            candidates = [names[position] for position in positions]
+            for name, weight in self.weights[1:]:
+                row_scores += weight * process.cdist(
+                    [query], candidates, scorer=SCORERS[name], dtype=np.float64, workers=workers
+                )[0]
+            scores[row, positions] = np.where(row_scores >= score_cutoff, row_scores, 0)
+        return scores
+
+    def _weighted(self, query: str, name: str, primary_score: float) -> float:
+        """Weighted score of one pair, given its primary score."""
+        score = self.weights[0][1] * primary_score
+        for scorer_name, weight in self.weights[1:]:
+            score += weight * SCORERS[scorer_name](query, name)
+        return score
+
+
+def get_scorer(algorithm: Union[str, Dict[str, float], None]) -> Scorer:
+    """
+    Scorer for a matching.algorithm setting.
+
+    Args:
+        algorithm: A scorer name, e.g. "token_set_ratio", or scorer weights,
+            e.g. {"token_set_ratio": 0.6, "partial_ratio": 0.2, "WRatio": 0.2};
+            None selects DEFAULT_ALGORITHM
+
+    Returns:
+        Scorer
+
+    Raises:
+        ValueError: For unknown scorers or invalid weights
+    """
+    if algorithm is None:
+        algorithm = DEFAULT_ALGORITHM
+    if isinstance(algorithm, str):
+        return Scorer({algorithm: 1})
+    return Scorer(dict(algorithm))
@@ -0,0 +1,131 @@
+"""Re-classification of stored school match scores under other thresholds."""
+
+import logging
+from itertools import product
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from tanulmanyi_versenyek.validation.school_matcher import (
+    BUDAPEST,
+    CANONICAL_MATCH_COMMENT,
+    district_hint,
+    normalize_city
+)
+
+log = logging.getLogger(__name__.split('.')[-1])
+
+MATCH_METHODS = ['MANUAL', 'MANUAL_DROP', 'AUTO_HIGH', 'AUTO_MEDIUM', 'DROPPED', 'NO_MATCH', 'AUTO_GLOBAL']
+
+# Methods decided by fuzzy scores alone, which new thresholds can change
+FUZZY_METHODS = ['AUTO_HIGH', 'AUTO_MEDIUM', 'DROPPED']
+
+
+def save_match_scores(match_results: pd.DataFrame, path: Path, config) -> None:
+    """
+    Store the best score and match method of every school in a compact .npz file.
+
+    Schools matched manually, without KIR candidates, nationwide or exactly
+    after name normalization are marked fixed, as thresholds do not affect
+    them.
+    Budapest schools with a district hint are marked too: their district
+    result is kept only above the medium threshold, so crossing it would
+    change which KIR rows are searched.
+
+    Args:
+        match_results: Results of match_all_schools
+        path: Output .npz file
+        config: Configuration with the matching thresholds used
+    """
+    methods = match_results['match_method'].astype(str).to_numpy()
+    names = match_results['our_school_name'].astype(str).to_numpy()
+    cities = match_results['our_city'].astype(str).to_numpy()
+    fixed = ~np.isin(methods, FUZZY_METHODS) | (match_results['comment'] == CANONICAL_MATCH_COMMENT).to_numpy()
+
+    if config['matching'].get('district_hints', True):
+        district_hinted = np.array([
+            normalize_city(city) == BUDAPEST and district_hint(name) is not None
+            for name, city in zip(names, cities)
+        ], dtype=bool)
+    else:
+        district_hinted = np.zeros(len(names), dtype=bool)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            school_names=names.astype(str),
+            cities=cities.astype(str),
+            scores=pd.to_numeric(match_results['confidence_score']).to_numpy(dtype=np.float32, na_value=np.nan),
+            methods=np.array([MATCH_METHODS.index(method) for method in methods], dtype=np.int8),
+            fixed=fixed,
+            district_hinted=district_hinted,
+            thresholds=np.array([
+                config['matching']['high_confidence_threshold'], config['matching']['medium_confidence_threshold']
+            ], dtype=np.float32)
+        )
+    log.info(f"Saved match scores of {len(methods)} schools to {path}")
+
+
+def load_match_scores(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Load a file written by save_match_scores.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Match scores file not found: {path}. Run 04_merger_and_excel.py first.")
+    with np.load(path) as stored:
+        return {name: stored[name] for name in stored.files}
+
+
+def classify(scores: Dict[str, np.ndarray], high: float, medium: float) -> np.ndarray:
+    """
+    Match method code (index into MATCH_METHODS) of every school under new thresholds.
+
+    Scores are classified as in school_matcher: below medium DROPPED, from
+    high AUTO_HIGH, AUTO_MEDIUM in between. Fixed schools keep their method.
+    """
+    new_methods = np.where(
+        scores['scores'] < medium,
+        MATCH_METHODS.index('DROPPED'),
+        np.where(scores['scores'] >= high, MATCH_METHODS.index('AUTO_HIGH'), MATCH_METHODS.index('AUTO_MEDIUM'))
+    ).astype(np.int8)
+    return np.where(scores['fixed'], scores['methods'], new_methods)
+
+
+def sweep(scores: Dict[str, np.ndarray], highs: Iterable[float], mediums: Iterable[float]) -> List[dict]:
+    """
+    Method counts for every combination of thresholds.
+
+    Args:
+        scores: Stored match scores from load_match_scores
+        highs: High confidence thresholds to try
+        mediums: Medium confidence thresholds to try
+
+    Returns:
+        list: One dict per (high, medium) pair with medium <= high: the
+        thresholds, the count of each method, the number of schools whose
+        method changes, and the number of those that are district-hinted
+        Budapest schools crossing the medium threshold, whose exact result
+        needs a rerun of the matching
+    """
+    accepted = np.isin(scores['methods'], [MATCH_METHODS.index('AUTO_HIGH'), MATCH_METHODS.index('AUTO_MEDIUM')])
+    rows = []
+    for high, medium in product(highs, mediums):
+        if medium > high:
+            continue
+        methods = classify(scores, high, medium)
+        now_accepted = np.isin(methods, [MATCH_METHODS.index('AUTO_HIGH'), MATCH_METHODS.index('AUTO_MEDIUM')])
+        counts = np.bincount(methods, minlength=len(MATCH_METHODS))
+        rows.append({
+            'high': high,
+            'medium': medium,
+            **{method: int(count) for method, count in zip(MATCH_METHODS, counts)},
+            'changed': int((methods != scores['methods']).sum()),
+            'rerun_needed': int((scores['district_hinted'] & (accepted != now_accepted)).sum())
+        })
+    return rows
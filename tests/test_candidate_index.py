@@ -0,0 +1,85 @@
+"""Tests for the candidate pruning token index."""
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.validation.candidate_index import CandidateIndex
+from tanulmanyi_versenyek.validation.school_matcher import (
+    NAME_COLUMNS,
+    _pruned_scores,
+    _score_matrix,
+    load_kir_database,
+    match_all_schools
+)
+
+NAMES = [
+    'Budapest XI. Kerületi Domokos Pál Péter Általános Iskola',
+    'Általános Iskola',
+    'Petőfi Sándor Gimnázium',
+    'Petőfi   Sándor  Gimnázium és Kollégium',
+    None,
+    'Kossuth Lajos Általános Iskola és Alapfokú Művészeti Iskola',
+    'Iskola Iskola'
+]
+
+QUERIES = [
+    'Domokos Pál Péter Ált. Isk.',
+    'Petőfi Sándor Gimn.',
+    'Általános Iskola',
+    'Kossuth Lajos Iskola',
+    'Zzz',
+    'Iskola',
+    ''
+]
+
+
+def test_upper_bounds_never_below_scores():
+    index = CandidateIndex(NAMES)
+    choices = ['' if name is None else name for name in NAMES]
+
+    for query in QUERIES + [name for name in NAMES if name]:
+        exact = process.cdist([query], choices, scorer=fuzz.token_set_ratio, dtype=np.float64)[0]
+        assert (index.upper_bounds(query) >= exact - 1e-9).all(), query
+
+
+def test_shortlist_prefers_rare_tokens():
+    index = CandidateIndex(NAMES)
+
+    shortlist = index.shortlist('Domokos Iskola', 1)
+
+    assert list(shortlist) == [0]
+    assert len(index.shortlist('Zzz', 5)) == 0
+
+
+def test_pruned_scores_keep_best_match(tmp_path):
+    config = get_config()
+    config['kir']['locations_file'] = 'tests/fixtures/kir_sample.xlsx'
+    config['paths']['cache_dir'] = str(tmp_path / 'cache')
+    candidates_df = load_kir_database(config)['budapest']
+    indexes = {column: CandidateIndex(candidates_df[column].tolist()) for column in NAME_COLUMNS}
+    queries = list(candidates_df['Intézmény megnevezése'].head(10)) + QUERIES
+
+    for query, full in zip(queries, _score_matrix(queries, candidates_df)):
+        pruned = _pruned_scores(query, candidates_df, indexes)
+        assert pruned.max() == full.max()
+        assert np.argmax(pruned) == np.argmax(full)
+
+
+def test_match_all_schools_same_with_pruning(tmp_path):
+    config = get_config()
+    config['kir']['locations_file'] = 'tests/fixtures/kir_sample.xlsx'
+    config['paths']['cache_dir'] = str(tmp_path / 'cache')
+    kir_dict = load_kir_database(config)
+    our_df = pd.DataFrame({
+        'iskola_nev': list(kir_dict['budapest']['Intézmény megnevezése'].head(5)) + QUERIES,
+        'varos': 'Budapest'
+    })
+
+    config['matching']['candidate_pruning_min_size'] = 0
+    full = match_all_schools(our_df, kir_dict, {}, config)
+    config['matching']['candidate_pruning_min_size'] = 1
+    pruned = match_all_schools(our_df, kir_dict, {}, config)
+
+    pd.testing.assert_frame_equal(full, pruned)
@@ -4,6 +4,7 @@ import pandas as pd
 import pytest
 
 from tanulmanyi_versenyek.validation.city_checker import (
+    CityMapping,
     _parse_mapping_csv,
     load_city_mapping,
     apply_city_mapping
@@ -83,6 +84,74 @@ City2;City2Fixed;Valid correction"""
         assert 'City1' not in mapping
 
 
+    def test_parse_match_types(self, tmp_path):
+        csv_content = """original_city;corrected_city;comment;match_type
+CITY1;City1;Exact rule;
+miskolc;Miskolc;Any case and spacing;normalized
+Debrecen-;Debrecen;Suburbs;prefix
+Budapest ([IVX]+)\\. ?ker(ület|\\.)?;Budapest \\1.;District spellings;regex
+Broken(;X;Invalid regex;regex
+City9;City9;Unknown type;fuzzy"""
+        csv_file = tmp_path / "mapping.csv"
+        csv_file.write_text(csv_content, encoding='utf-8')
+
+        mapping = _parse_mapping_csv(csv_file)
+
+        assert mapping == {'CITY1': 'City1'}
+        assert mapping.rule_count() == 4
+        assert mapping.get('MISKOLC ') == 'Miskolc'
+        assert mapping.get('Debrecen-Józsa') == 'Debrecen'
+        assert mapping.get('Budapest XI. kerület') == 'Budapest XI.'
+        assert mapping.get('Budapest XI.ker.') == 'Budapest XI.'
+        assert mapping.get('Broken(') is None
+        assert mapping.get('City9') is None
+
+
+class TestCityMapping:
+    """Tests for CityMapping rule resolution."""
+
+    def test_rule_precedence(self):
+        mapping = CityMapping(
+            exact={'Budapest XI.': 'Exact'},
+            normalized={'budapest xi.': 'Normalized'},
+            prefixes=[('Budapest', 'Short prefix'), ('Budapest X', 'Long prefix')],
+            regexes=[('Budapest.*', 'Regex')]
+        )
+
+        assert mapping.get('Budapest XI.') == 'Exact'
+        assert mapping.get('BUDAPEST  XI.') == 'Normalized'
+        assert mapping.get('Budapest XII.') == 'Long prefix'
+        assert mapping.get('Budapest V.') == 'Short prefix'
+        assert mapping.get('Debrecen') is None
+
+    def test_regex_rules_in_file_order(self):
+        mapping = CityMapping(regexes=[(r'(\w+)-Józsa', r'\1'), (r'.*-Józsa', 'Second')])
+
+        assert mapping.get('Debrecen-Józsa') == 'Debrecen'
+        assert mapping.get('Debrecen-Józsa-x') is None
+
+    def test_regex_rules_with_clashing_group_names(self):
+        mapping = CityMapping(regexes=[(r'(?P<city>\w+)-Józsa', r'\g<city>'), (r'(?P<city>\w+) \(Józsa\)', r'\g<city>')])
+
+        assert mapping.get('Debrecen-Józsa') == 'Debrecen'
+        assert mapping.get('Debrecen (Józsa)') == 'Debrecen'
+
+    def test_backreference_rule_after_other_rules(self):
+        mapping = CityMapping(regexes=[
+            (r'Szeged-.*', 'Szeged'),
+            (r'(\w+)-\1', r'\1'),
+            (r'.*-.*', 'Catch-all')
+        ])
+
+        assert mapping.get('Szeged-Tápé') == 'Szeged'
+        assert mapping.get('Gyula-Gyula') == 'Gyula'
+        assert mapping.get('Gyula-Eger') == 'Catch-all'
+
+    def test_empty_mapping_is_falsy(self):
+        assert not CityMapping()
+        assert CityMapping(regexes=[('a', 'b')])
+
+
 class TestLoadCityMapping:
     """Tests for load_city_mapping function."""
 
@@ -199,3 +268,52 @@ class TestApplyCityMapping:
         assert stats['dropped'] == 1
         assert len(corrected_df) == 3
         assert 'School B' not in corrected_df['iskola_nev'].values
+
+    def test_apply_drop_uses_original_city(self):
+        df = pd.DataFrame({
+            'iskola_nev': ['School A', 'School B'],
+            'varos': ['CITY1', 'City1']
+        })
+        mapping = {'CITY1': 'City1', 'City1': 'DROP'}
+
+        corrected_df, stats = apply_city_mapping(df, mapping)
+
+        assert stats == {'corrected': 1, 'dropped': 1}
+        assert list(corrected_df['varos']) == ['City1']
+        assert list(corrected_df['iskola_nev']) == ['School A']
+
+    def test_apply_categorical_column(self):
+        df = pd.DataFrame({
+            'iskola_nev': ['School A', 'School B', 'School C', 'School D'],
+            'varos': pd.Categorical(['CITY1', 'City2', 'City1', 'City3'])
+        })
+        mapping = {'CITY1': 'City1', 'City2': 'DROP'}
+
+        corrected_df, stats = apply_city_mapping(df, mapping)
+
+        assert stats == {'corrected': 1, 'dropped': 1}
+        assert corrected_df['varos'].dtype == 'category'
+        assert list(corrected_df['varos']) == ['City1', 'City1', 'City3']
+        assert sorted(corrected_df['varos'].cat.categories) == ['City1', 'City3']
+
+    def test_apply_without_copy(self, sample_dataframe, sample_mapping):
+        corrected_df, stats = apply_city_mapping(sample_dataframe, sample_mapping, copy=False)
+
+        assert stats['corrected'] == 2
+        assert corrected_df is sample_dataframe
+        assert sample_dataframe.loc[0, 'varos'] == 'City1'
+
+    def test_apply_pattern_rules(self):
+        df = pd.DataFrame({
+            'iskola_nev': ['School A', 'School B', 'School C', 'School D'],
+            'varos': ['Budapest XI. ker.', 'Budapest XI. kerület', 'Tasnád-Sárd', 'Szeged']
+        })
+        mapping = CityMapping(
+            prefixes=[('Tasnád', 'DROP')],
+            regexes=[(r'Budapest ([IVX]+)\. ?ker(ület|\.)?', r'Budapest \1.')]
+        )
+
+        corrected_df, stats = apply_city_mapping(df, mapping)
+
+        assert stats == {'corrected': 2, 'dropped': 1}
+        assert list(corrected_df['varos']) == ['Budapest XI.', 'Budapest XI.', 'Szeged']
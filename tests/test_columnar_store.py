@@ -0,0 +1,32 @@
+"""Tests for the memory-mapped columnar store."""
+
+import pandas as pd
+
+from tanulmanyi_versenyek.common.columnar_store import load_columns, save_columns
+
+
+def _sample_df():
+    return pd.DataFrame({
+        'name': ['Ábel Iskola', None, 'Ábel Iskola'],
+        'city': ['Budapest', 'Szeged', 'Szeged']
+    })
+
+
+def test_round_trip(tmp_path):
+    save_columns(_sample_df(), tmp_path, 'abc')
+
+    df = load_columns(tmp_path, 'abc')
+
+    assert df['city'].dtype == 'category'
+    pd.testing.assert_frame_equal(df.astype(object).where(df.notna(), None), _sample_df())
+
+
+def test_missing_or_replaced_key(tmp_path):
+    assert load_columns(tmp_path, 'abc') is None
+
+    save_columns(_sample_df(), tmp_path, 'abc')
+    save_columns(_sample_df().head(1), tmp_path, 'def')
+
+    assert load_columns(tmp_path, 'abc') is None
+    assert len(load_columns(tmp_path, 'def')) == 1
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,178 @@
+"""Tests for the streaming Excel writer."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from tanulmanyi_versenyek.merger.excel_writer import TemplateWorkbookWriter, column_letter, write_sheet_rows
+from tanulmanyi_versenyek.merger.data_merger import generate_excel_report, generate_excel_report_from_csv
+
+TEMPLATE_PATH = Path('templates/report_template.xlsx')
+
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame({
+        'ev': ['2023-24', '2024-25'],
+        'targy': ['Anyanyelv', 'Anyanyelv'],
+        'iskola_nev': ['Kölcsey & Társai <Iskola>', ' Szóközös Iskola '],
+        'varos': ['Budapest', 'Debrecen'],
+        'varmegye': ['Budapest', None],
+        'regio': ['Közép-Magyarország', 'Észak-Alföld'],
+        'helyezes': [1, 2],
+        'evfolyam': [8, 7]
+    })
+
+
+def test_column_letter():
+    assert column_letter(1) == 'A'
+    assert column_letter(8) == 'H'
+    assert column_letter(26) == 'Z'
+    assert column_letter(27) == 'AA'
+
+
+def test_write_sheet_rows_values_and_types(tmp_path, sample_df):
+    output_path = tmp_path / 'report.xlsx'
+    rows = sample_df.itertuples(index=False, name=None)
+
+    row_count = write_sheet_rows(TEMPLATE_PATH, output_path, 'Data', rows, len(sample_df.columns))
+
+    assert row_count == 2
+    ws = load_workbook(output_path)['Data']
+    assert [cell.value for cell in ws[1]] == list(sample_df.columns)
+    assert [cell.value for cell in ws[2]] == ['2023-24', 'Anyanyelv', 'Kölcsey & Társai <Iskola>', 'Budapest',
+                                              'Budapest', 'Közép-Magyarország', 1, 8]
+    assert ws['C3'].value == ' Szóközös Iskola '
+    assert ws['E3'].value is None
+    assert ws.max_row == 3
+
+
+def test_write_sheet_rows_preserves_template_sheets(tmp_path, sample_df):
+    output_path = tmp_path / 'report.xlsx'
+    rows = sample_df.itertuples(index=False, name=None)
+
+    write_sheet_rows(TEMPLATE_PATH, output_path, 'Data', rows, len(sample_df.columns))
+
+    template_wb = load_workbook(TEMPLATE_PATH)
+    wb = load_workbook(output_path)
+    assert wb.sheetnames == template_wb.sheetnames
+    assert len(wb['Iskolák rangsora']._pivots) == len(template_wb['Iskolák rangsora']._pivots)
+    assert wb['Data'].column_dimensions['C'].width == template_wb['Data'].column_dimensions['C'].width
+    assert wb['Data'].auto_filter.ref == 'A1:H3'
+
+
+def test_write_sheet_rows_unknown_sheet(tmp_path):
+    with pytest.raises(ValueError, match="not found in template"):
+        write_sheet_rows(TEMPLATE_PATH, tmp_path / 'report.xlsx', 'Missing', [], 8)
+
+
+def test_generate_excel_report(tmp_path, sample_df):
+    cfg = {
+        'paths': {
+            'template_file': str(TEMPLATE_PATH),
+            'report_dir': str(tmp_path)
+        }
+    }
+
+    generate_excel_report(sample_df, cfg)
+
+    ws = load_workbook(tmp_path / 'Bolyai_Analysis_Report.xlsx')['Data']
+    assert ws.max_row == len(sample_df) + 1
+    assert ws['C2'].value == 'Kölcsey & Társai <Iskola>'
+
+
+def test_add_sheet_like_template_and_plain(tmp_path, sample_df):
+    output_path = tmp_path / 'report.xlsx'
+
+    with TemplateWorkbookWriter(TEMPLATE_PATH, output_path) as writer:
+        writer.fill_sheet('Data', sample_df.itertuples(index=False, name=None), 8)
+        writer.add_sheet('Data_2', sample_df.itertuples(index=False, name=None), 8, like='Data')
+        writer.add_sheet('Index', [('Data', 2)], 2, header=['sheet', 'rows'])
+
+    wb = load_workbook(output_path)
+    assert wb.sheetnames[-2:] == ['Data_2', 'Index']
+    assert [cell.value for cell in wb['Data_2'][1]] == list(sample_df.columns)
+    assert wb['Data_2'].max_row == 3
+    assert wb['Data_2'].column_dimensions['C'].width == wb['Data'].column_dimensions['C'].width
+    assert [cell.value for cell in wb['Index'][2]] == ['Data', 2]
+
+
+def test_generate_excel_report_shards_by_year(tmp_path):
+    df = pd.DataFrame({
+        'ev': ['2015-16'] * 5 + ['2016-17'] * 2 + ['2017-18'] * 4,
+        'targy': ['Anyanyelv'] * 11,
+        'iskola_nev': [f'Iskola {i}' for i in range(11)],
+        'varos': ['Budapest'] * 11,
+        'varmegye': ['Budapest'] * 11,
+        'regio': ['Közép-Magyarország'] * 11,
+        'helyezes': list(range(1, 12)),
+        'evfolyam': [8] * 11
+    })
+    cfg = {
+        'paths': {'template_file': str(TEMPLATE_PATH), 'report_dir': str(tmp_path)},
+        'report': {'max_rows_per_sheet': 8, 'shard_column': 'ev'}
+    }
+
+    generate_excel_report(df, cfg)
+
+    wb = load_workbook(tmp_path / 'Bolyai_Analysis_Report.xlsx')
+    index_rows = list(wb['Data_Index'].iter_rows(min_row=2, values_only=True))
+    assert index_rows == [
+        ('Data', '2015-16', '2016-17', 7),
+        ('Data_2', '2017-18', '2017-18', 4)
+    ]
+    assert wb['Data'].max_row == 8
+    assert wb['Data_2'].max_row == 5
+
+
+def test_generate_excel_report_splits_oversized_year(tmp_path, sample_df):
+    df = pd.concat([sample_df] * 3, ignore_index=True)
+    df['ev'] = '2024-25'
+    cfg = {
+        'paths': {'template_file': str(TEMPLATE_PATH), 'report_dir': str(tmp_path)},
+        'report': {'max_rows_per_sheet': 5}
+    }
+
+    generate_excel_report(df, cfg)
+
+    wb = load_workbook(tmp_path / 'Bolyai_Analysis_Report.xlsx')
+    index_rows = list(wb['Data_Index'].iter_rows(min_row=2, values_only=True))
+    assert [row[3] for row in index_rows] == [4, 2]
+    assert sum(row[3] for row in index_rows) == len(df)
+
+
+def test_generate_excel_report_ranking_sheets(tmp_path, sample_df):
+    cfg = {
+        'paths': {'template_file': str(TEMPLATE_PATH), 'report_dir': str(tmp_path)},
+        'report': {'ranking_top_x': 3}
+    }
+
+    generate_excel_report(sample_df, cfg)
+
+    wb = load_workbook(tmp_path / 'Bolyai_Analysis_Report.xlsx')
+    ws = wb['Iskolák - súlyozott TOP3']
+    assert [cell.value for cell in ws[1]] == ['Iskola', 'Város', 'Súlyozott pontszám']
+    assert [cell.value for cell in ws[2]] == ['Kölcsey & Társai <Iskola>', 'Budapest', 3]
+    assert 'Régiók - darabszám TOP3' in wb.sheetnames
+
+
+def test_generate_excel_report_from_csv_matches_in_memory(tmp_path, sample_df):
+    df = pd.concat([sample_df] * 3, ignore_index=True).sort_values('ev', kind='stable')
+    csv_path = tmp_path / 'master.csv'
+    df.to_csv(csv_path, sep=';', encoding='utf-8', index=False)
+    memory_dir, csv_dir = tmp_path / 'memory', tmp_path / 'csv'
+    report = {'max_rows_per_sheet': 5, 'ranking_top_x': 3}
+
+    generate_excel_report(df, {'paths': {'template_file': str(TEMPLATE_PATH), 'report_dir': str(memory_dir)},
+                               'report': report})
+    generate_excel_report_from_csv(csv_path, {'paths': {'template_file': str(TEMPLATE_PATH),
+                                                        'report_dir': str(csv_dir)}, 'report': report},
+                                   [('2023-24', 3), ('2024-25', 3)], chunk_rows=2)
+
+    expected = load_workbook(memory_dir / 'Bolyai_Analysis_Report.xlsx')
+    actual = load_workbook(csv_dir / 'Bolyai_Analysis_Report.xlsx')
+    assert actual.sheetnames == expected.sheetnames
+    for name in ['Data', 'Data_2', 'Data_Index', 'Iskolák - súlyozott TOP3', 'Városok - darabszám TOP3']:
+        assert list(actual[name].values) == list(expected[name].values)
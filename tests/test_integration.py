@@ -83,8 +83,8 @@ def test_end_to_end_download_and_parse(downloaded_html, config):
     assert list(df.columns) == expected_columns, f"Unexpected columns: {list(df.columns)}"
     
     # Verify data types
-    assert df['helyezes'].dtype == 'int64', f"helyezes should be int64, got {df['helyezes'].dtype}"
-    assert df['evfolyam'].dtype == 'int64', f"evfolyam should be int64, got {df['evfolyam'].dtype}"
+    assert df['helyezes'].dtype == 'int16', f"helyezes should be int16, got {df['helyezes'].dtype}"
+    assert df['evfolyam'].dtype == 'int8', f"evfolyam should be int8, got {df['evfolyam'].dtype}"
     
     # Verify no nulls
     null_counts = df.isnull().sum()
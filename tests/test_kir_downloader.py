@@ -1,4 +1,8 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
+import requests
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
@@ -7,8 +11,10 @@ from tanulmanyi_versenyek.kir_downloader.kir_scraper import (
     get_latest_kir_url,
     download_kir_file,
     clear_helper_data_dir,
-    download_latest_kir_data
+    download_latest_kir_data,
+    create_session
 )
+from tanulmanyi_versenyek.validation.school_matcher import load_kir_database
 
 
 class TestGetLatestKirUrl:
@@ -66,20 +72,157 @@ class TestGetLatestKirUrl:
             )
 
 
+class KirServer:
+    """Local stand-in for the KIR site supporting ETag, Last-Modified and Range requests."""
+
+    def __init__(self):
+        self.files = {}
+        self.etag = '"v1"'
+        self.last_modified = 'Sun, 15 Dec 2024 10:00:00 GMT'
+        self.truncate_next = None
+        self.requests = []
+        self.index_html = ''
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                if self.path == '/index':
+                    body = server.index_html.encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                content = server.files.get(self.path)
+                if content is None:
+                    self.send_error(404)
+                    return
+                if self.headers.get('If-None-Match') == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+
+                start = 0
+                range_header = self.headers.get('Range')
+                if range_header and self.headers.get('If-Range', server.etag) in (server.etag, server.last_modified):
+                    start = int(range_header.split('=')[1].rstrip('-'))
+                body = content[start:]
+
+                self.send_response(206 if start else 200)
+                if start:
+                    self.send_header('Content-Range', f'bytes {start}-{len(content) - 1}/{len(content)}')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', server.etag)
+                self.send_header('Last-Modified', server.last_modified)
+                self.end_headers()
+                if server.truncate_next is not None:
+                    body, server.truncate_next = body[:server.truncate_next], None
+                    self.close_connection = True
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def file_requests(self):
+        return [headers for path, headers in self.requests if path != '/index']
+
+
+@pytest.fixture
+def kir_server():
+    server = KirServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def kir_config(kir_server, tmp_path):
+    file_path = '/kir_mukodo_feladatellatasi_helyek_2024_12_15.xlsx'
+    kir_server.files[file_path] = Path('tests/fixtures/kir_sample.xlsx').read_bytes()
+    kir_server.index_html = f'<html><a href="{kir_server.url}{file_path}">File</a></html>'
+    return {
+        'paths': {'helper_data_dir': str(tmp_path / 'helper'), 'cache_dir': str(tmp_path / 'cache')},
+        'kir': {
+            'index_url': f'{kir_server.url}/index',
+            'locations_filename_pattern': 'kir_mukodo_feladatellatasi_helyek_{date}.xlsx',
+            'locations_file': str(tmp_path / 'helper' / 'kir.xlsx')
+        }
+    }
+
+
 class TestDownloadKirFile:
-    @patch('tanulmanyi_versenyek.kir_downloader.kir_scraper.requests.get')
-    def test_downloads_file(self, mock_get, tmp_path):
-        mock_response = Mock()
-        mock_response.iter_content = Mock(return_value=[b'test', b'data'])
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
+    def test_downloads_file(self, kir_server, tmp_path):
+        kir_server.files['/file.xlsx'] = b'testdata'
+
+        output_path = tmp_path / "test.xlsx"
+        assert download_kir_file(f'{kir_server.url}/file.xlsx', output_path)
+
+        assert output_path.read_bytes() == b'testdata'
+        assert not output_path.with_name('test.xlsx.part').exists()
 
+    def test_skips_unchanged_file(self, kir_server, tmp_path):
+        kir_server.files['/file.xlsx'] = b'testdata'
+        url = f'{kir_server.url}/file.xlsx'
         output_path = tmp_path / "test.xlsx"
-        download_kir_file('https://example.com/file.xlsx', output_path)
 
-        assert output_path.exists()
+        download_kir_file(url, output_path)
+        assert not download_kir_file(url, output_path)
+
+        assert kir_server.file_requests()[-1]['If-None-Match'] == '"v1"'
         assert output_path.read_bytes() == b'testdata'
 
+    def test_downloads_changed_file(self, kir_server, tmp_path):
+        kir_server.files['/file.xlsx'] = b'testdata'
+        url = f'{kir_server.url}/file.xlsx'
+        output_path = tmp_path / "test.xlsx"
+
+        download_kir_file(url, output_path)
+        kir_server.files['/file.xlsx'], kir_server.etag = b'newdata', '"v2"'
+
+        assert download_kir_file(url, output_path)
+        assert output_path.read_bytes() == b'newdata'
+
+    def test_resumes_interrupted_download(self, kir_server, tmp_path, monkeypatch):
+        monkeypatch.setattr('tanulmanyi_versenyek.kir_downloader.kir_scraper.DOWNLOAD_CHUNK_SIZE', 100)
+        content = bytes(range(256)) * 100
+        kir_server.files['/file.xlsx'] = content
+        url = f'{kir_server.url}/file.xlsx'
+        output_path = tmp_path / "test.xlsx"
+        output_path.write_bytes(b'previous release')
+        kir_server.truncate_next = 1000
+
+        with pytest.raises((IOError, requests.exceptions.RequestException)):
+            download_kir_file(url, output_path)
+
+        assert output_path.read_bytes() == b'previous release'
+        partial_size = output_path.with_name('test.xlsx.part').stat().st_size
+        assert 0 < partial_size <= 1000
+
+        assert download_kir_file(url, output_path)
+        assert kir_server.file_requests()[-1]['Range'] == f'bytes={partial_size}-'
+        assert output_path.read_bytes() == content
+
+    def test_restarts_when_partial_file_is_stale(self, kir_server, tmp_path):
+        kir_server.files['/file.xlsx'] = b'0123456789'
+        url = f'{kir_server.url}/file.xlsx'
+        output_path = tmp_path / "test.xlsx"
+        kir_server.truncate_next = 4
+
+        with pytest.raises((IOError, requests.exceptions.RequestException)):
+            download_kir_file(url, output_path)
+        kir_server.files['/file.xlsx'], kir_server.etag = b'abcdefghij', '"v2"'
+
+        assert download_kir_file(url, output_path, create_session())
+        assert output_path.read_bytes() == b'abcdefghij'
+
 
 class TestClearHelperDataDir:
     def test_removes_files(self, tmp_path):
@@ -94,36 +237,50 @@ class TestClearHelperDataDir:
         assert not (tmp_path / "file2.txt").exists()
         assert subdir.exists()
 
+    def test_keeps_listed_files(self, tmp_path):
+        (tmp_path / "old.xlsx").write_text("old")
+        (tmp_path / "kir.xlsx").write_text("new")
+
+        clear_helper_data_dir(tmp_path, keep=[tmp_path / "kir.xlsx"])
+
+        assert not (tmp_path / "old.xlsx").exists()
+        assert (tmp_path / "kir.xlsx").exists()
+
     def test_handles_nonexistent_directory(self, tmp_path):
         nonexistent = tmp_path / "nonexistent"
         clear_helper_data_dir(nonexistent)
 
 
 class TestDownloadLatestKirData:
-    @patch('tanulmanyi_versenyek.kir_downloader.kir_scraper.requests.get')
-    def test_downloads_kir_file_to_correct_location(self, mock_get, tmp_path):
-        config = {
-            'paths': {'helper_data_dir': str(tmp_path)},
-            'kir': {
-                'index_url': 'https://kir.oktatas.hu/kirpub/index',
-                'locations_filename_pattern': 'kir_mukodo_feladatellatasi_helyek_{date}.xlsx',
-                'locations_file': str(tmp_path / 'kir.xlsx')
-            }
-        }
+    def test_downloads_kir_file_to_correct_location(self, kir_config, kir_server):
+        (Path(kir_config['paths']['helper_data_dir'])).mkdir()
+        old_release = Path(kir_config['paths']['helper_data_dir']) / 'old_release.xlsx'
+        old_release.write_bytes(b'old')
+
+        result = download_latest_kir_data(kir_config)
+
+        assert result == Path(kir_config['kir']['locations_file'])
+        assert result.read_bytes() == Path('tests/fixtures/kir_sample.xlsx').read_bytes()
+        assert not old_release.exists()
+
+    def test_failed_download_keeps_current_file(self, kir_config, kir_server):
+        download_latest_kir_data(kir_config)
+        kir_server.etag = '"v2"'
+        kir_server.truncate_next = 10
+
+        with pytest.raises((IOError, requests.exceptions.RequestException)):
+            download_latest_kir_data(kir_config)
 
-        html = '<html><a href="https://example.com/kir_mukodo_feladatellatasi_helyek_2024_12_15.xlsx">File</a></html>'
-        mock_index_response = Mock()
-        mock_index_response.content = html.encode('utf-8')
-        mock_index_response.raise_for_status = Mock()
+        result = Path(kir_config['kir']['locations_file'])
+        assert result.read_bytes() == Path('tests/fixtures/kir_sample.xlsx').read_bytes()
 
-        mock_file_response = Mock()
-        mock_file_response.iter_content = Mock(return_value=[b'test', b'data'])
-        mock_file_response.raise_for_status = Mock()
+    def test_converts_kir_file_after_download(self, kir_config, kir_server):
+        kir_config['kir']['convert_on_download'] = True
 
-        mock_get.side_effect = [mock_index_response, mock_file_response]
+        download_latest_kir_data(kir_config)
 
-        result = download_latest_kir_data(config)
+        with patch('tanulmanyi_versenyek.common.kir_table._read_kir_excel') as mock_read:
+            kir_dict = load_kir_database(kir_config)
 
-        assert result == Path(tmp_path / 'kir.xlsx')
-        assert result.exists()
-        assert result.read_bytes() == b'testdata'
+        mock_read.assert_not_called()
+        assert len(kir_dict) > 0
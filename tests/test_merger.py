@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 from pathlib import Path
-from tanulmanyi_versenyek.merger.data_merger import merge_processed_data
+from tanulmanyi_versenyek.merger.data_merger import iter_year_batches, merge_processed_data
 
 def test_merge_with_sample_data():
     """
@@ -34,3 +34,24 @@ def test_merge_with_sample_data():
 
     duplicate_check = result_df.duplicated(subset=['ev', 'evfolyam', 'iskola_nev', 'helyezes'])
     assert not duplicate_check.any(), "Found duplicates after deduplication"
+
+
+def test_iter_year_batches_matches_full_merge():
+    """Year batches together hold the same rows and duplicate count as the full merge."""
+    test_data_dir = Path(__file__).parent / 'test_data' / 'sample_processed_csvs'
+    test_config = {'paths': {'processed_csv_dir': str(test_data_dir)}}
+
+    full_df, full_duplicates = merge_processed_data(test_config)
+    batches = list(iter_year_batches(test_config))
+
+    years = [year for year, _, _ in batches]
+    assert years == sorted(years)
+    assert all((batch_df['ev'] == year).all() for year, batch_df, _ in batches)
+    assert sum(removed for _, _, removed in batches) == full_duplicates
+
+    batched_df = pd.concat([batch_df.astype(object) for _, batch_df, _ in batches], ignore_index=True)
+    columns = list(full_df.columns)
+    pd.testing.assert_frame_equal(
+        batched_df.sort_values(columns).reset_index(drop=True),
+        full_df.astype(object).sort_values(columns).reset_index(drop=True)
+    )
@@ -0,0 +1,23 @@
+"""Tests for canonical school name keys."""
+
+from tanulmanyi_versenyek.validation.name_canonicalizer import canonicalize_school_name
+
+
+def test_abbreviations_case_and_punctuation():
+    assert canonicalize_school_name('Petőfi Ált. Isk. és Gimn.') == canonicalize_school_name(
+        'PETŐFI ÁLTALÁNOS ISKOLA, GIMNÁZIUM'
+    )
+    assert canonicalize_school_name('Petőfi Ált.Isk.') == 'petofi altalanos iskola'
+
+
+def test_whitespace_accents_and_stopwords():
+    assert canonicalize_school_name('  Szent  István   Ref. Ált. Isk. és AMI ') == (
+        'szent istvan reformatus altalanos iskola alapfoku muveszeti iskola'
+    )
+    assert canonicalize_school_name('Kossuth Lajos Gimnázium') != canonicalize_school_name('Kossuth Lajos Gimnázium és Kollégium')
+
+
+def test_missing_names():
+    assert canonicalize_school_name(None) == ''
+    assert canonicalize_school_name(float('nan')) == ''
+    assert canonicalize_school_name('és a') == ''
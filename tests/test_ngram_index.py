@@ -0,0 +1,62 @@
+"""Tests for the character n-gram TF-IDF index."""
+
+import numpy as np
+
+from tanulmanyi_versenyek.validation.ngram_index import NGRAM_SIZE, NgramIndex, _padded
+
+NAMES = [
+    'Petőfi Sándor Általános Iskola',
+    'Petőfi Sándor Gimnázium',
+    'Kossuth Lajos Általános Iskola',
+    None,
+    'Bolyai János Gimnázium és Kollégium',
+    'Petőfi Sándor Általános Iskola',
+]
+
+
+def _dense_similarities(names, query):
+    """Brute-force cosine similarities of sublinear tf-idf n-gram vectors."""
+    def ngrams(name):
+        text = _padded(name)
+        return [text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)]
+
+    documents = [ngrams(name) for name in names]
+    vocabulary = sorted({gram for document in documents for gram in document})
+    counts = np.array([[document.count(gram) for gram in vocabulary] for document in documents], dtype=float)
+    idf = np.log((1 + len(names)) / (1 + (counts > 0).sum(axis=0))) + 1
+
+    def vector(row):
+        weights = np.where(row > 0, 1 + np.log(np.maximum(row, 1)), 0) * idf
+        norm = np.linalg.norm(weights)
+        return weights / norm if norm else weights
+
+    matrix = np.array([vector(row) for row in counts])
+    query_ngrams = ngrams(query)
+    return matrix @ vector(np.array([query_ngrams.count(gram) for gram in vocabulary], dtype=float))
+
+
+def test_similarities_match_dense_cosine():
+    index = NgramIndex(NAMES)
+
+    for query in ['Petőfi Ált. Isk.', 'Bolyai Gimn.', 'Kossuth', 'xyz qqq']:
+        np.testing.assert_allclose(index.similarities(query), _dense_similarities(NAMES, query), atol=1e-12)
+
+
+def test_nearest_best_first():
+    index = NgramIndex(NAMES)
+
+    positions, similarities = index.nearest('Petőfi Sándor Ált. Isk.', 3)
+
+    assert list(positions[:2]) == [0, 5]
+    assert positions[2] == 1
+    assert np.all(np.diff(similarities) <= 0)
+    assert similarities[0] > 0.99
+
+
+def test_nearest_skips_unrelated_and_missing_names():
+    index = NgramIndex(NAMES)
+
+    positions, _ = index.nearest('Bolyai', 10)
+    assert 3 not in positions
+    assert len(index.nearest('qqqq', 10)[0]) == 0
+    assert index.similarities(None).sum() == 0
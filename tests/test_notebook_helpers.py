@@ -83,22 +83,22 @@ def calculate_count_ranking(df, top_x, group_by):
 
     if group_by == 'iskola_nev':
         # Count by school only
-        result = top_df.groupby('iskola_nev').size().reset_index(name='Count')
+        result = top_df.groupby('iskola_nev', observed=True).size().reset_index(name='Count')
         # Add most common city for each school
-        city_map = top_df.groupby('iskola_nev')['varos'].agg(lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0])
+        city_map = top_df.groupby('iskola_nev', observed=True)['varos'].agg(lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0])
         result['varos'] = result['iskola_nev'].map(city_map)
         result = result[['iskola_nev', 'varos', 'Count']]
         result = result.sort_values(
             ['Count', 'iskola_nev'],
             ascending=[False, True],
-            key=lambda col: col.map(hungarian_sort_key) if col.name == 'iskola_nev' else col
+            key=lambda col: col.astype(object).map(hungarian_sort_key) if col.name == 'iskola_nev' else col
         ).reset_index(drop=True)
     else:  # group_by == 'varos'
-        result = top_df.groupby('varos').size().reset_index(name='Count')
+        result = top_df.groupby('varos', observed=True).size().reset_index(name='Count')
         result = result.sort_values(
             ['Count', 'varos'],
             ascending=[False, True],
-            key=lambda col: col.map(hungarian_sort_key) if col.name == 'varos' else col
+            key=lambda col: col.astype(object).map(hungarian_sort_key) if col.name == 'varos' else col
         ).reset_index(drop=True)
 
     return result
@@ -112,22 +112,22 @@ def calculate_weighted_ranking(df, top_x, group_by):
 
     if group_by == 'iskola_nev':
         # Sum points by school only
-        result = scored_df.groupby('iskola_nev')['points'].sum().reset_index(name='Weighted Score')
+        result = scored_df.groupby('iskola_nev', observed=True)['points'].sum().reset_index(name='Weighted Score')
         # Add most common city for each school
-        city_map = scored_df.groupby('iskola_nev')['varos'].agg(lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0])
+        city_map = scored_df.groupby('iskola_nev', observed=True)['varos'].agg(lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0])
         result['varos'] = result['iskola_nev'].map(city_map)
         result = result[['iskola_nev', 'varos', 'Weighted Score']]
         result = result.sort_values(
             ['Weighted Score', 'iskola_nev'],
             ascending=[False, True],
-            key=lambda col: col.map(hungarian_sort_key) if col.name == 'iskola_nev' else col
+            key=lambda col: col.astype(object).map(hungarian_sort_key) if col.name == 'iskola_nev' else col
         ).reset_index(drop=True)
     else:  # group_by == 'varos'
-        result = scored_df.groupby('varos')['points'].sum().reset_index(name='Weighted Score')
+        result = scored_df.groupby('varos', observed=True)['points'].sum().reset_index(name='Weighted Score')
         result = result.sort_values(
             ['Weighted Score', 'varos'],
             ascending=[False, True],
-            key=lambda col: col.map(hungarian_sort_key) if col.name == 'varos' else col
+            key=lambda col: col.astype(object).map(hungarian_sort_key) if col.name == 'varos' else col
         ).reset_index(drop=True)
 
     return result
@@ -459,6 +459,23 @@ def test_count_ranking_hungarian_alphabetical_order():
     assert result.iloc[3]['varos'] == 'Veszprém'
 
 
+def test_count_ranking_categorical_columns():
+    """Test rankings on data loaded with categorical dtypes: Hungarian order, no unobserved groups."""
+    df = pd.DataFrame({
+        'ev': ['2023-24'] * 5,
+        'targy': ['Anyanyelv'] * 5,
+        'iskola_nev': ['School A', 'School B', 'School C', 'School D', 'School E'],
+        'varos': ['Veszprém', 'Valahol', 'Vác', 'Veresegyház', 'Zalaegerszeg'],
+        'megye': [''] * 5,
+        'helyezes': [1, 1, 1, 1, 9],
+        'evfolyam': [8] * 5
+    }).astype({'iskola_nev': 'category', 'varos': 'category', 'helyezes': 'int16', 'evfolyam': 'int8'})
+
+    result = calculate_count_ranking(df, 3, 'varos')
+
+    assert list(result['varos']) == ['Vác', 'Valahol', 'Veresegyház', 'Veszprém']
+
+
 def test_weighted_ranking_hungarian_alphabetical_order():
     """Test Hungarian sorting in weighted rankings."""
     df = pd.DataFrame({
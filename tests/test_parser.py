@@ -136,8 +136,9 @@ def test_parse_with_committed_fixture(config):
         assert list(df.columns) == expected_columns
         
         # Verify data types
-        assert df['helyezes'].dtype == 'int64'
-        assert df['evfolyam'].dtype == 'int64'
+        assert df['helyezes'].dtype == 'int16'
+        assert df['evfolyam'].dtype == 'int8'
+        assert df['iskola_nev'].dtype == 'category'
         
         # Verify no nulls
         assert df.isnull().sum().sum() == 0
@@ -0,0 +1,211 @@
+"""Tests for the DAG pipeline runner."""
+
+import copy
+import importlib.util
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.pipeline.dag import PipelineRunner, Stage
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def _touch(path, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('x')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _recording_stage(name, calls, outputs=(), inputs=(), depends_on=()):
+    def run(cfg):
+        calls.append(name)
+        for output in outputs:
+            _touch(output)
+    return Stage(name, run, inputs=inputs, outputs=outputs, depends_on=depends_on)
+
+
+def test_runs_in_dependency_order(tmp_path):
+    calls = []
+    stages = [
+        _recording_stage('report', calls, outputs=[tmp_path / 'report'], depends_on=['parse']),
+        _recording_stage('parse', calls, outputs=[tmp_path / 'parsed'], depends_on=['download']),
+        _recording_stage('download', calls, outputs=[tmp_path / 'raw'])
+    ]
+
+    status = PipelineRunner(stages, max_workers=1).run({})
+
+    assert calls == ['download', 'parse', 'report']
+    assert set(status.values()) == {'built'}
+
+
+def test_skips_up_to_date_stages(tmp_path):
+    raw, parsed = tmp_path / 'raw.txt', tmp_path / 'parsed.txt'
+    _touch(raw, mtime=1000)
+    _touch(parsed, mtime=2000)
+    calls = []
+    stages = [
+        _recording_stage('download', calls, outputs=[raw]),
+        _recording_stage('parse', calls, inputs=[raw], outputs=[parsed], depends_on=['download'])
+    ]
+
+    status = PipelineRunner(stages).run({})
+
+    assert calls == []
+    assert status == {'download': 'up-to-date', 'parse': 'up-to-date'}
+
+
+def test_rebuilds_when_input_is_newer(tmp_path):
+    raw, parsed = tmp_path / 'raw.txt', tmp_path / 'parsed.txt'
+    _touch(raw, mtime=3000)
+    _touch(parsed, mtime=2000)
+    calls = []
+    stages = [
+        _recording_stage('download', calls, outputs=[raw]),
+        _recording_stage('parse', calls, inputs=[raw], outputs=[parsed], depends_on=['download'])
+    ]
+
+    status = PipelineRunner(stages).run({})
+
+    assert calls == ['parse']
+    assert status == {'download': 'up-to-date', 'parse': 'built'}
+
+
+def test_forced_stage_rebuilds_dependents(tmp_path):
+    raw, parsed = tmp_path / 'raw.txt', tmp_path / 'parsed.txt'
+    _touch(raw, mtime=1000)
+    _touch(parsed, mtime=2000)
+    calls = []
+    stages = [
+        _recording_stage('download', calls, outputs=[raw]),
+        _recording_stage('parse', calls, inputs=[raw], outputs=[parsed], depends_on=['download'])
+    ]
+
+    PipelineRunner(stages).run({}, force=['download'])
+
+    assert calls == ['download', 'parse']
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run(cfg):
+        barrier.wait()
+
+    stages = [
+        Stage('crawl', run, outputs=[tmp_path / 'missing_a']),
+        Stage('kir', run, outputs=[tmp_path / 'missing_b'])
+    ]
+
+    status = PipelineRunner(stages, max_workers=2).run({})
+
+    assert status == {'crawl': 'built', 'kir': 'built'}
+
+
+def test_failure_skips_dependents_but_not_independent_stages(tmp_path):
+    calls = []
+
+    def fail(cfg):
+        time.sleep(0.01)
+        raise RuntimeError("download failed")
+
+    stages = [
+        Stage('download', fail, outputs=[tmp_path / 'raw']),
+        _recording_stage('parse', calls, outputs=[tmp_path / 'parsed'], depends_on=['download']),
+        _recording_stage('kir', calls, outputs=[tmp_path / 'kir'])
+    ]
+
+    status = PipelineRunner(stages).run({})
+
+    assert status == {'download': 'failed', 'parse': 'skipped', 'kir': 'built'}
+    assert calls == ['kir']
+
+
+def test_always_run_stage_does_not_rebuild_unchanged_dependents(tmp_path):
+    calls = []
+    stages = [
+        Stage('download', lambda cfg: calls.append('download'), outputs=[tmp_path / 'raw'], always_run=True),
+        _recording_stage('parse', calls, outputs=[tmp_path / 'parsed'], inputs=[tmp_path / 'raw'], depends_on=['download'])
+    ]
+    _touch(tmp_path / 'raw' / 'page.html', mtime=1000)
+    _touch(tmp_path / 'parsed', mtime=2000)
+
+    status = PipelineRunner(stages).run({})
+
+    assert calls == ['download']
+    assert status == {'download': 'built', 'parse': 'up-to-date'}
+
+
+def test_dry_run_does_not_execute(tmp_path):
+    calls = []
+    stages = [_recording_stage('download', calls, outputs=[tmp_path / 'raw'])]
+
+    status = PipelineRunner(stages).run({}, dry_run=True)
+
+    assert calls == []
+    assert status == {'download': 'built'}
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    noop = lambda cfg: None
+    with pytest.raises(ValueError, match="cycle"):
+        PipelineRunner([Stage('a', noop, depends_on=['b']), Stage('b', noop, depends_on=['a'])])
+    with pytest.raises(ValueError, match="unknown stages"):
+        PipelineRunner([Stage('a', noop, depends_on=['missing'])])
+
+
+@pytest.mark.parametrize('script', sorted(REPO_ROOT.glob('[0-9][0-9]_*.py')), ids=lambda path: path.name)
+def test_stage_scripts_import(script):
+    spec = importlib.util.spec_from_file_location(script.stem, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert callable(module.run)
+
+
+def _load_run_pipeline():
+    spec = importlib.util.spec_from_file_location('run_pipeline', REPO_ROOT / 'run_pipeline.py')
+    run_pipeline = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_pipeline)
+    return run_pipeline
+
+
+def test_build_stages_imports_every_stage():
+    stages = _load_run_pipeline().build_stages(get_config())
+
+    assert all(callable(stage.run) for stage in stages)
+
+
+
+def test_second_pipeline_run_still_downloads(tmp_path):
+    cfg = copy.deepcopy(get_config())
+    for key in cfg['paths']:
+        cfg['paths'][key] = str(tmp_path / key)
+    cfg['kir']['locations_file'] = str(tmp_path / 'kir.xlsx')
+    for key in ('city_mapping_file', 'school_mapping_file'):
+        cfg['validation'][key] = str(tmp_path / key)
+
+    def fake_run(stage):
+        # Like the real stages, only write outputs that are missing
+        def run(cfg):
+            calls.append(stage.name)
+            for output in stage.outputs:
+                if not output.exists():
+                    _touch(output)
+        return run
+
+    calls = []
+    stages = _load_run_pipeline().build_stages(cfg)
+    for stage in stages:
+        stage.run = fake_run(stage)
+
+    PipelineRunner(stages, max_workers=1).run(cfg)
+    calls.clear()
+    PipelineRunner(stages, max_workers=1).run(cfg)
+
+    assert sorted(calls) == ['download_kir', 'download_results']
@@ -0,0 +1,61 @@
+"""Tests for the report ranking aggregations."""
+
+import pandas as pd
+import pytest
+
+from tanulmanyi_versenyek.merger.rankings import (
+    build_ranking_sheets,
+    calculate_count_ranking,
+    calculate_weighted_ranking,
+    hungarian_sort_key
+)
+
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame({
+        'iskola_nev': ['Alfa Iskola', 'Alfa Iskola', 'Béta Iskola', 'Béta Iskola', 'Gamma Iskola', 'Alfa Iskola'],
+        'varos': ['Budapest', 'Budapest', 'Debrecen', 'Debrecen', 'Szeged', 'Érd'],
+        'varmegye': ['Budapest', 'Budapest', 'Hajdú-Bihar', 'Hajdú-Bihar', 'Csongrád-Csanád', 'Pest'],
+        'regio': ['Közép-Magyarország', 'Közép-Magyarország', 'Észak-Alföld', 'Észak-Alföld',
+                  'Dél-Alföld', 'Közép-Magyarország'],
+        'helyezes': [1, 3, 2, 10, 6, 4]
+    })
+
+
+def test_hungarian_sort_key():
+    assert hungarian_sort_key('Érd') == 'Erd'
+    assert hungarian_sort_key(None) is None
+
+
+def test_count_ranking_schools(sample_df):
+    ranking = calculate_count_ranking(sample_df, 6, 'iskola_nev')
+
+    assert list(ranking.columns) == ['iskola_nev', 'varos', 'Count']
+    assert ranking.iloc[0].tolist() == ['Alfa Iskola', 'Budapest', 3]
+    assert ranking['iskola_nev'].tolist() == ['Alfa Iskola', 'Béta Iskola', 'Gamma Iskola']
+
+
+def test_weighted_ranking_excludes_beyond_top_x(sample_df):
+    ranking = calculate_weighted_ranking(sample_df, 6, 'varos')
+
+    scores = dict(zip(ranking['varos'], ranking['Weighted Score']))
+    assert scores == {'Budapest': 10, 'Debrecen': 5, 'Érd': 3, 'Szeged': 1}
+    assert ranking['varos'].tolist()[:2] == ['Budapest', 'Debrecen']
+
+
+def test_count_ranking_ties_sorted_hungarian(sample_df):
+    ranking = calculate_count_ranking(sample_df, 6, 'regio')
+
+    assert ranking['regio'].tolist() == ['Közép-Magyarország', 'Dél-Alföld', 'Észak-Alföld']
+
+
+def test_build_ranking_sheets(sample_df):
+    sheets = build_ranking_sheets(sample_df, 6)
+
+    names = [name for name, _, _ in sheets]
+    assert len(sheets) == 8
+    assert 'Iskolák - darabszám TOP6' in names
+    assert all(len(name) <= 31 for name in names)
+    for _, header, ranking in sheets:
+        assert len(header) == len(ranking.columns)
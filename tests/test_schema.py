@@ -0,0 +1,59 @@
+"""Tests for the shared column dtypes."""
+
+import pandas as pd
+
+from tanulmanyi_versenyek.common.schema import apply_schema, iter_master_csv
+from tanulmanyi_versenyek.merger.rankings import calculate_weighted_ranking
+
+
+def _sample_df():
+    return pd.DataFrame({
+        'ev': ['2023-24', '2023-24', '2024-25'],
+        'targy': ['Anyanyelv'] * 3,
+        'iskola_nev': ['Zrínyi Iskola', 'Ábel Iskola', 'Zrínyi Iskola'],
+        'varos': ['Budapest', 'Debrecen', 'Budapest'],
+        'varmegye': ['Budapest', 'Hajdú-Bihar', 'Budapest'],
+        'regio': ['Közép-Magyarország', 'Észak-Alföld', 'Közép-Magyarország'],
+        'helyezes': [1, 2, 3],
+        'evfolyam': [8, 7, 8]
+    })
+
+
+def test_apply_schema_dtypes():
+    df = apply_schema(_sample_df())
+
+    assert all(df[col].dtype == 'category' for col in ['ev', 'targy', 'iskola_nev', 'varos', 'varmegye', 'regio'])
+    assert df['helyezes'].dtype == 'int16'
+    assert df['evfolyam'].dtype == 'int8'
+
+
+def test_apply_schema_missing_integers_and_columns():
+    df = apply_schema(pd.DataFrame({'helyezes': [1.0, None], 'other': ['a', 'b']}))
+
+    assert df['helyezes'].dtype == 'Int16'
+    assert df['other'].dtype == object
+
+
+def test_iter_master_csv_round_trip(tmp_path):
+    path = tmp_path / 'master.csv'
+    _sample_df().to_csv(path, sep=';', encoding='utf-8', index=False)
+
+    chunks = list(iter_master_csv(path, chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    df = apply_schema(pd.concat(chunks, ignore_index=True))
+    assert df['iskola_nev'].dtype == 'category'
+    assert df['helyezes'].dtype == 'int16'
+    pd.testing.assert_frame_equal(df.astype(_sample_df().dtypes), _sample_df())
+
+
+def test_rankings_unchanged_by_categorical_columns():
+    df = _sample_df()
+    df['iskola_nev'] = ['Béla Iskola', 'Ábel Iskola', 'Béla Iskola']
+    df['helyezes'] = [2, 1, 3]
+
+    plain = calculate_weighted_ranking(df, 3, 'iskola_nev')
+    compact = calculate_weighted_ranking(apply_schema(df), 3, 'iskola_nev')
+
+    assert list(compact['iskola_nev']) == ['Ábel Iskola', 'Béla Iskola']
+    pd.testing.assert_frame_equal(compact.astype(plain.dtypes), plain)
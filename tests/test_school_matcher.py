@@ -1,9 +1,11 @@
 """Tests for school_matcher module."""
 
+import numpy as np
 import pandas as pd
 import pytest
 from pathlib import Path
 
+from tanulmanyi_versenyek.common import kir_table
 from tanulmanyi_versenyek.common.config import get_config
 from tanulmanyi_versenyek.validation.school_matcher import (
     load_kir_database,
@@ -12,8 +14,14 @@ from tanulmanyi_versenyek.validation.school_matcher import (
     match_school,
     match_all_schools,
     apply_matches,
-    generate_audit_file
+    generate_audit_file,
+    generate_review_file,
+    find_dangling_mappings,
+    KirDatabase,
+    MatchCache,
+    district_hint
 )
+from tanulmanyi_versenyek.validation import school_matcher
 
 
 @pytest.fixture
@@ -22,6 +30,7 @@ def test_config(tmp_path):
     config = get_config()
     config['kir']['locations_file'] = 'tests/fixtures/kir_sample.xlsx'
     config['validation']['school_mapping_file'] = str(tmp_path / 'school_mapping.csv')
+    config['paths']['cache_dir'] = str(tmp_path / 'cache')
     return config
 
 
@@ -107,6 +116,27 @@ class TestKIRDatabase:
         with pytest.raises(FileNotFoundError):
             load_kir_database(test_config)
 
+    def test_load_kir_database_missing_columns(self, tmp_path, test_config):
+        test_file = tmp_path / 'test_kir.xlsx'
+        pd.DataFrame({'Intézmény megnevezése': ['School']}).to_excel(test_file, index=False)
+        test_config['kir']['locations_file'] = str(test_file)
+
+        with pytest.raises(ValueError, match="missing required columns"):
+            load_kir_database(test_config)
+
+    def test_load_kir_database_reuses_columnar_cache(self, test_config, monkeypatch):
+        first = load_kir_database(test_config)
+
+        def fail_read_kir_excel(*args, **kwargs):
+            raise AssertionError("KIR spreadsheet should not be re-read")
+
+        monkeypatch.setattr(kir_table, '_read_kir_excel', fail_read_kir_excel)
+        second = load_kir_database(test_config)
+
+        assert first.keys() == second.keys()
+        for city in first:
+            pd.testing.assert_frame_equal(first[city], second[city])
+
     def test_load_kir_database_normalizes_uppercase(self, tmp_path, test_config):
         # Create test Excel with FULL UPPERCASE names
         test_file = tmp_path / 'test_kir.xlsx'
@@ -145,6 +175,190 @@ class TestKIRDatabase:
         assert budapest_df.iloc[3]['Intézmény megnevezése'] == 'Budapest III. Sz. Iskola'
         assert budapest_df.iloc[4]['Intézmény megnevezése'] == 'Normal Case School'  # Unchanged
 
+    def test_load_kir_database_keeps_distinct_name_pairs(self, tmp_path, test_config):
+        test_file = tmp_path / 'test_kir.xlsx'
+        pd.DataFrame({
+            'Intézmény megnevezése': ['Petőfi Iskola', 'Petőfi Iskola', 'Petőfi Iskola', 'Petőfi Iskola'],
+            'A feladatellátási hely települése': ['Budapest I.', 'Budapest I.', 'Budapest I.', 'Budapest II.'],
+            'A feladatellátási hely vármegyéje': ['Budapest'] * 4,
+            'A feladatellátási hely régiója': ['Közép-Magyarország'] * 4,
+            'A feladatellátási hely megnevezése': ['Székhely', 'Székhely', 'Telephely', 'Székhely']
+        }).to_excel(test_file, index=False)
+        test_config['kir']['locations_file'] = str(test_file)
+
+        kir_dict = load_kir_database(test_config)
+
+        assert list(kir_dict['budapest i.']['A feladatellátási hely megnevezése']) == ['Székhely', 'Telephely']
+        assert len(kir_dict['budapest ii.']) == 1
+        # The first district's row represents a pair repeated across districts
+        assert list(kir_dict['budapest']['A feladatellátási hely települése']) == ['Budapest I.', 'Budapest I.']
+
+
+class TestDistrictHints:
+    """Tests for Budapest district narrowing."""
+
+    def _kir_dict(self):
+        def district(name, town):
+            return pd.DataFrame({
+                'Intézmény megnevezése': [name],
+                'A feladatellátási hely települése': [town],
+                'A feladatellátási hely vármegyéje': ['Budapest'],
+                'A feladatellátási hely régiója': ['Közép-Magyarország'],
+                'A feladatellátási hely megnevezése': [None]
+            })
+
+        first = district('Petőfi Sándor Általános Iskola', 'Budapest II. kerület')
+        second = district('Budapest XII. Kerületi Petőfi Sándor Általános Iskola', 'Budapest XII. kerület')
+        return {
+            'budapest ii.': first,
+            'budapest xii.': second,
+            'budapest': pd.concat([first, second], ignore_index=True)
+        }
+
+    def test_district_hint(self):
+        assert district_hint('Budapest XII. Kerületi Petőfi Iskola') == 'budapest xii.'
+        assert district_hint('Bp. III. Szent Iskola') == 'budapest iii.'
+        assert district_hint('Petőfi Iskola (XXI. ker.)') == 'budapest xxi.'
+        assert district_hint('II. Rákóczi Ferenc Általános Iskola') is None
+        assert district_hint('Budapest XXX. Iskola') is None
+        assert district_hint(None) is None
+
+    def test_hinted_district_searched_first(self, test_config):
+        kir_dict = self._kir_dict()
+
+        hinted = match_school('Budapest XII. Petőfi Sándor Általános Iskola', 'Budapest', kir_dict, {}, test_config)
+        test_config['matching']['district_hints'] = False
+        whole_city = match_school('Budapest XII. Petőfi Sándor Általános Iskola', 'Budapest', kir_dict, {}, test_config)
+
+        assert hinted['matched_city'] == 'Budapest XII. kerület'
+        assert whole_city['matched_city'] == 'Budapest II. kerület'
+
+    def test_widens_to_whole_city_below_threshold(self, test_config):
+        kir_dict = self._kir_dict()
+        kir_dict['budapest xii.'] = kir_dict['budapest xii.'].assign(**{'Intézmény megnevezése': 'Egészen Más Gimnázium'})
+
+        result = match_school('Petőfi Sándor Általános Iskola (XII. ker.)', 'Budapest', kir_dict, {}, test_config)
+
+        assert result['matched_city'] == 'Budapest II. kerület'
+        assert result['match_method'] == 'AUTO_HIGH'
+
+
+class TestCanonicalFastPath:
+    """Tests for exact matching of normalized names."""
+
+    def _kir_dict(self, names):
+        return {
+            'szeged': pd.DataFrame({
+                'Intézmény megnevezése': names,
+                'A feladatellátási hely települése': ['Szeged'] * len(names),
+                'A feladatellátási hely vármegyéje': ['Csongrád-Csanád'] * len(names),
+                'A feladatellátási hely régiója': ['Dél-Alföld'] * len(names),
+                'A feladatellátási hely megnevezése': [None] * len(names)
+            })
+        }
+
+    def test_canonical_match_is_auto_high(self, test_config):
+        kir_dict = self._kir_dict(['Jókai Mór Gimnázium', 'Jókai Mór Általános Iskola és Gimnázium'])
+
+        result = match_school('Jókai Mór Ált. Isk. és Gimn.', 'Szeged', kir_dict, {}, test_config)
+
+        assert result['matched_school_name'] == 'Jókai Mór Általános Iskola és Gimnázium'
+        assert result['match_method'] == 'AUTO_HIGH'
+        assert result['confidence_score'] == 100
+        assert result['comment'] == 'Exact match after name normalization'
+
+    def test_ambiguous_canonical_key_falls_back_to_fuzzy(self, test_config):
+        kir_dict = self._kir_dict(['Jókai Mór Gimnázium', 'JÓKAI MÓR GIMNÁZIUM.'])
+
+        result = match_school('Jókai Mór Gimn.', 'Szeged', kir_dict, {}, test_config)
+
+        assert result['comment'] != 'Exact match after name normalization'
+
+    def test_fast_path_can_be_disabled(self, test_config):
+        kir_dict = self._kir_dict(['Jókai Mór Általános Iskola és Gimnázium'])
+        test_config['matching']['canonical_fast_path'] = False
+
+        result = match_school('Jókai Mór Ált. Isk. és Gimn.', 'Szeged', kir_dict, {}, test_config)
+
+        assert result['comment'] != 'Exact match after name normalization'
+
+
+class TestGlobalFallback:
+    """Tests for nationwide suggestions for schools in cities missing from KIR."""
+
+    def _kir_dict(self, rows=None):
+        rows = rows or [
+            ('Radnóti Miklós Kísérleti Gimnázium', 'Szeged'),
+            ('Tömörkény István Gimnázium', 'Szeged')
+        ]
+        city_frames = {}
+        for name, town in rows:
+            city_frames.setdefault(normalize_city(town), []).append({
+                'Intézmény megnevezése': name,
+                'A feladatellátási hely települése': town,
+                'A feladatellátási hely vármegyéje': 'Megye',
+                'A feladatellátási hely régiója': 'Régió',
+                'A feladatellátási hely megnevezése': None
+            })
+        return KirDatabase({city: pd.DataFrame(frame) for city, frame in city_frames.items()})
+
+    def test_school_in_unknown_city_suggested_nationwide(self, test_config):
+        result = match_school('Radnóti Miklós Kísérleti Gimnázium', 'Szegedd', self._kir_dict(), {}, test_config)
+
+        assert result['match_method'] == 'AUTO_GLOBAL'
+        assert result['matched_school_name'] == 'Radnóti Miklós Kísérleti Gimnázium'
+        assert result['matched_city'] == 'Szeged'
+        assert result['confidence_score'] >= test_config['matching']['global_fallback_threshold']
+        assert result['comment'] == school_matcher.GLOBAL_MATCH_COMMENT
+
+    def test_below_threshold_stays_no_match_with_candidates(self, test_config, monkeypatch):
+        monkeypatch.setitem(test_config['matching'], 'review_top_k', 2)
+
+        result = match_school('Radnóti Általános Iskola', 'Szegedd', self._kir_dict(), {}, test_config)
+
+        assert result['match_method'] == 'NO_MATCH'
+        assert result['confidence_score'] is None
+        assert 'No schools found in this city' in result['comment']
+        assert result['candidates'][0]['school_name'] == 'Radnóti Miklós Kísérleti Gimnázium'
+
+    def test_suggestion_is_reviewed_but_not_applied(self, test_config):
+        school_df = pd.DataFrame({'iskola_nev': ['Radnóti Miklós Kísérleti Gimnázium'], 'varos': ['Szegedd']})
+
+        results_df = match_all_schools(school_df, self._kir_dict(), {}, test_config)
+
+        assert results_df['match_method'].tolist() == ['AUTO_GLOBAL']
+        assert results_df['status'].tolist() == ['NOT_APPLIED']
+        assert 'AUTO_GLOBAL' in school_matcher.REVIEW_METHODS
+        assert apply_matches(school_df, results_df).empty
+
+    def test_same_name_in_two_cities_not_matched(self, test_config, monkeypatch):
+        monkeypatch.setitem(test_config['matching'], 'review_top_k', 5)
+        kir_dict = self._kir_dict([
+            ('Petőfi Sándor Általános Iskola', 'Debrecen'),
+            ('Petőfi Sándor Általános Iskola', 'Hajdúszoboszló')
+        ])
+        school_df = pd.DataFrame({'iskola_nev': ['Petőfi Sándor Általános Iskola'], 'varos': ['Hajdúnánás']})
+
+        results_df = match_all_schools(school_df, kir_dict, {}, test_config)
+
+        assert results_df['match_method'].tolist() == ['NO_MATCH']
+        assert results_df['status'].tolist() == ['NOT_APPLIED']
+        assert [candidate['city'] for candidate in results_df['candidates'].iloc[0]] == ['Debrecen', 'Hajdúszoboszló']
+
+    def test_subset_names_not_matched(self, test_config):
+        kir_dict = self._kir_dict([('Petőfi Iskola', 'Pécs'), ('Kossuth Gimnázium', 'Pécs')])
+
+        result = match_school('Kossuth Petőfi Iskola Gimnázium', 'Miskolc', kir_dict, {}, test_config)
+
+        assert result['match_method'] == 'NO_MATCH'
+
+    def test_fallback_can_be_disabled(self, test_config, monkeypatch):
+        monkeypatch.setitem(test_config['matching'], 'global_fallback', False)
+
+        result = match_school('Radnóti Miklós Kísérleti Gimnázium', 'Szegedd', self._kir_dict(), {}, test_config)
+
+        assert result['match_method'] == 'NO_MATCH'
+
 
 class TestSchoolMatching:
     """Tests for school matching logic."""
@@ -170,6 +384,42 @@ class TestSchoolMatching:
         assert result['confidence_score'] is None
         assert result['comment'] == 'Manual test'
 
+    def test_manual_mapping_resolves_across_cities(self, kir_dict, test_config):
+        assert isinstance(kir_dict, KirDatabase)
+        other_city = next(city for city in kir_dict if not city.startswith('budapest'))
+        kir_row = kir_dict[other_city].iloc[0]
+        our_df = pd.DataFrame({'iskola_nev': ['Renamed School'], 'varos': ['Budapest']})
+        manual_mapping = {
+            ('Renamed School', 'Budapest'): {
+                'corrected_school_name': kir_row['Intézmény megnevezése'],
+                'comment': 'Moved'
+            }
+        }
+
+        results = match_all_schools(our_df, kir_dict, manual_mapping, test_config)
+
+        assert results.iloc[0]['match_method'] == 'MANUAL'
+        assert results.iloc[0]['matched_city'] == kir_row['A feladatellátási hely települése']
+
+    def test_dangling_mappings_reported_together(self, kir_dict, test_config, caplog):
+        manual_mapping = {
+            ('A', 'Budapest'): {'corrected_school_name': 'Missing One', 'comment': ''},
+            ('B', 'Budapest'): {'corrected_school_name': 'Missing Two', 'comment': ''},
+            ('C', 'Budapest'): {'corrected_school_name': 'DROP', 'comment': ''}
+        }
+        our_df = pd.DataFrame({'iskola_nev': ['A', 'B', 'C'], 'varos': ['Budapest'] * 3})
+
+        dangling = find_dangling_mappings(manual_mapping, kir_dict.name_index)
+        caplog.clear()
+        with caplog.at_level('WARNING'):
+            results = match_all_schools(our_df, kir_dict, manual_mapping, test_config)
+
+        assert dangling == [('A', 'Budapest'), ('B', 'Budapest')]
+        warnings = [r.message for r in caplog.records if r.levelname == 'WARNING']
+        assert len(warnings) == 1
+        assert 'Missing One' in warnings[0] and 'Missing Two' in warnings[0]
+        assert list(results['match_method']) == ['NO_MATCH', 'NO_MATCH', 'MANUAL_DROP']
+
     def test_match_school_high_confidence(self, kir_dict, test_config):
         # Use exact school name from KIR
         first_city_df = next(iter(kir_dict.values()))
@@ -400,6 +650,46 @@ class TestAuditGeneration:
         dropped_row = audit_df[audit_df['match_method'] == 'DROPPED'].iloc[0]
         assert 'Low confidence' in dropped_row['comment']
 
+    def test_generate_review_file(self, tmp_path):
+        match_results = pd.DataFrame({
+            'our_school_name': ['School A', 'School B', 'School C'],
+            'our_city': ['Budapest', 'Debrecen', 'Szeged'],
+            'confidence_score': [95.0, 60.0, None],
+            'match_method': ['AUTO_HIGH', 'DROPPED', 'NO_MATCH'],
+            'status': ['APPLIED', 'NOT_APPLIED', 'NOT_APPLIED'],
+            'comment': ['', 'Low confidence', 'No schools found'],
+            'candidates': [
+                [{'school_name': 'Official A', 'facility_name': None, 'city': 'Budapest', 'score': 95.0}],
+                [
+                    {'school_name': 'Official B', 'facility_name': 'Telephely', 'city': 'Debrecen', 'score': 60.0},
+                    {'school_name': 'Other B', 'facility_name': None, 'city': 'Debrecen', 'score': 55.0}
+                ],
+                []
+            ]
+        })
+
+        output_path = tmp_path / 'review.csv'
+        generate_review_file(match_results, output_path)
+
+        review_df = pd.read_csv(output_path, sep=';', encoding='utf-8')
+        assert list(review_df['our_school_name']) == ['School B', 'School B', 'School C']
+        assert list(review_df['candidate_school_name'].iloc[:2]) == ['Official B', 'Other B']
+        assert list(review_df['rank'].iloc[:2]) == [1, 2]
+        assert pd.isna(review_df['rank'].iloc[2]) and pd.isna(review_df['candidate_school_name'].iloc[2])
+
+    def test_generate_audit_file_omits_candidates(self, tmp_path):
+        match_results = pd.DataFrame({
+            'our_school_name': ['School A'],
+            'match_method': ['DROPPED'],
+            'status': ['NOT_APPLIED'],
+            'candidates': [[{'school_name': 'Official A', 'score': 60.0}]]
+        })
+
+        output_path = tmp_path / 'audit.csv'
+        generate_audit_file(match_results, output_path)
+
+        assert 'candidates' not in pd.read_csv(output_path, sep=';', encoding='utf-8').columns
+
 
 class TestBatchMatching:
     """Tests for batch school matching."""
@@ -418,3 +708,152 @@ class TestBatchMatching:
         assert len(results) == 2
         assert results.iloc[0]['status'] == 'APPLIED'
         assert results.iloc[1]['status'] == 'NOT_APPLIED'
+
+    def test_match_all_schools_same_as_single_matches(self, kir_dict, test_config):
+        budapest_df = kir_dict['budapest']
+        our_df = pd.DataFrame({
+            'iskola_nev': [budapest_df.iloc[0]['Intézmény megnevezése'], 'Általános Iskola', 'Xyz', 'Q'],
+            'varos': ['Budapest'] * 4
+        })
+
+        results = match_all_schools(our_df, kir_dict, {}, test_config)
+
+        for _, row in results.iterrows():
+            single = match_school(row['our_school_name'], row['our_city'], kir_dict, {}, test_config)
+            assert row['match_method'] == single['match_method']
+            assert row['matched_school_name'] == single['matched_school_name']
+            assert row['confidence_score'] == single['confidence_score']
+
+    def test_match_all_schools_independent_of_workers(self, kir_dict, test_config):
+        our_df = pd.DataFrame({
+            'iskola_nev': list(kir_dict['budapest']['Intézmény megnevezése'].head(5)) + ['Általános Iskola'],
+            'varos': 'Budapest'
+        })
+
+        test_config['matching']['workers'] = 1
+        single = match_all_schools(our_df, kir_dict, {}, test_config)
+        test_config['matching']['workers'] = 4
+        parallel = match_all_schools(our_df, kir_dict, {}, test_config)
+
+        pd.testing.assert_frame_equal(single, parallel)
+
+    def test_score_cutoff_keeps_best_candidates(self, test_config):
+        candidates_df = pd.DataFrame({
+            'Intézmény megnevezése': ['Petőfi Sándor Iskola', 'Kossuth Gimnázium', 'Kossuth Lajos Gimnázium', 'Arany Iskola'],
+            'A feladatellátási hely megnevezése': ['Kossuth Lajos Gimnázium', None, 'Telephely', 'Petőfi Sándor Iskola']
+        })
+        names = ['Kossuth Lajos Gimnázium', 'Petőfi Sándor Iskola', 'Arany János Iskola', None]
+
+        full = school_matcher._score_matrix(names, candidates_df)
+        cut = school_matcher._score_matrix(names, candidates_df, score_cutoff=True)
+
+        np.testing.assert_array_equal(full.max(axis=1), cut.max(axis=1))
+        np.testing.assert_array_equal(full.argmax(axis=1), cut.argmax(axis=1))
+        # Facility names after the first perfect institution name are not scored
+        assert full[1, 3] == 100 and cut[1, 3] < 100
+
+    def test_count_facility_comparisons(self):
+        candidates_df = pd.DataFrame({
+            'Intézmény megnevezése': ['Kossuth Gimnázium', 'Petőfi Sándor Iskola', 'Arany Iskola'],
+            'A feladatellátási hely megnevezése': ['Telephely', None, 'Petőfi Sándor Iskola']
+        })
+
+        total, skipped, pruned = school_matcher.count_facility_comparisons(['Petőfi Sándor Iskola'], candidates_df)
+
+        # The facility name after the perfect institution name is skipped, "Telephely" is below the cutoff
+        assert (total, skipped, pruned) == (2, 1, 2)
+
+    def test_top_candidates_same_with_and_without_cutoff(self, kir_dict, test_config):
+        names = ['Móra Ferenc Gimnázium', 'Általános Iskola', 'Kossuth Lajos Iskola']
+        our_df = pd.DataFrame({'iskola_nev': names, 'varos': ['Szeged'] * len(names)})
+        test_config['matching']['canonical_fast_path'] = False
+        test_config['matching']['review_top_k'] = 3
+
+        test_config['matching']['score_cutoff'] = True
+        cut = match_all_schools(our_df, kir_dict, {}, test_config)
+        test_config['matching']['score_cutoff'] = False
+        full = match_all_schools(our_df, kir_dict, {}, test_config)
+
+        pd.testing.assert_frame_equal(cut, full)
+        for candidates in full['candidates']:
+            scores = [candidate['score'] for candidate in candidates]
+            assert 0 < len(candidates) <= 3
+            assert scores == sorted(scores, reverse=True)
+        assert full['candidates'].iloc[0][0]['school_name'] == full['matched_school_name'].iloc[0]
+
+    def test_facility_cutoffs_keep_top_k(self):
+        institution_scores = np.array([[100.0, 50.0, 100.0, 100.0], [40.0, 90.0, 70.0, 10.0]])
+
+        cutoffs, limits = school_matcher._facility_cutoffs(institution_scores, keep=2)
+
+        assert list(cutoffs) == [100.0, 70.0]
+        assert list(limits) == [2, 4]
+
+    def test_match_school_ties_and_missing_names(self, test_config):
+        kir_dict = {
+            'szeged': pd.DataFrame({
+                'Intézmény megnevezése': ['Other', 'Alpha School', 'Alpha School'],
+                'A feladatellátási hely megnevezése': [None, None, 'Alpha School Site'],
+                'A feladatellátási hely települése': ['Szeged'] * 3,
+                'A feladatellátási hely vármegyéje': ['Csongrád-Csanád'] * 3,
+                'A feladatellátási hely régiója': ['Dél-Alföld', 'First', 'Second']
+            })
+        }
+
+        tie = match_school('Alpha School', 'Szeged', kir_dict, {}, test_config)
+        no_overlap = match_school('Qqq', 'Szeged', kir_dict, {}, test_config)
+
+        assert tie['confidence_score'] == 100
+        assert tie['matched_region'] == 'First'
+        assert no_overlap['match_method'] == 'DROPPED'
+        assert no_overlap['matched_school_name'] is None
+
+
+class TestMatchCache:
+    """Tests for the persistent per-pair match cache."""
+
+    def _our_df(self, kir_dict, count):
+        names = list(kir_dict['budapest']['Intézmény megnevezése'].head(count))
+        return pd.DataFrame({'iskola_nev': names, 'varos': ['Budapest'] * count})
+
+    def test_only_new_pairs_are_scored(self, kir_dict, test_config, tmp_path, monkeypatch):
+        test_config['matching']['candidate_pruning_min_size'] = 0
+        cache_path = tmp_path / 'matches.pkl'
+        first_cache = MatchCache(cache_path, 'fp')
+        first = match_all_schools(self._our_df(kir_dict, 2), kir_dict, {}, test_config, first_cache)
+        first_cache.save()
+
+        scored = []
+        original_score_matrix = school_matcher._score_matrix
+
+        def counting_score_matrix(our_names, candidates_df, *args):
+            scored.extend(our_names)
+            return original_score_matrix(our_names, candidates_df, *args)
+
+        monkeypatch.setattr(school_matcher, '_score_matrix', counting_score_matrix)
+        second_cache = MatchCache(cache_path, 'fp')
+        second = match_all_schools(self._our_df(kir_dict, 3), kir_dict, {}, test_config, second_cache)
+
+        assert scored == [self._our_df(kir_dict, 3)['iskola_nev'].iloc[2]]
+        assert (second_cache.hits, second_cache.misses) == (2, 1)
+        pd.testing.assert_frame_equal(second.head(2), first)
+
+    def test_fingerprint_change_starts_empty(self, kir_dict, test_config, tmp_path):
+        cache_path = tmp_path / 'matches.pkl'
+        match_cache = MatchCache(cache_path, 'fp1')
+        match_all_schools(self._our_df(kir_dict, 2), kir_dict, {}, test_config, match_cache)
+        match_cache.save()
+
+        assert len(MatchCache(cache_path, 'fp1').entries) == 2
+        assert MatchCache(cache_path, 'fp2').entries == {}
+
+    def test_manual_mappings_bypass_cache(self, kir_dict, test_config, tmp_path):
+        our_df = self._our_df(kir_dict, 1)
+        key = (our_df['iskola_nev'].iloc[0], 'Budapest')
+        match_cache = MatchCache(tmp_path / 'matches.pkl', 'fp')
+        match_all_schools(our_df, kir_dict, {}, test_config, match_cache)
+
+        manual_mapping = {key: {'corrected_school_name': 'DROP', 'comment': 'Closed'}}
+        results = match_all_schools(our_df, kir_dict, manual_mapping, test_config, match_cache)
+
+        assert results.iloc[0]['match_method'] == 'MANUAL_DROP'
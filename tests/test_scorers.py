@@ -0,0 +1,91 @@
+"""Tests for the matching scorer registry."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz
+
+from tanulmanyi_versenyek.common.config import get_config
+from tanulmanyi_versenyek.validation.school_matcher import load_kir_database, match_all_schools
+from tanulmanyi_versenyek.validation.scorers import get_scorer
+
+QUERIES = ['Petőfi Sándor Általános Iskola', 'Kossuth Gimnázium', 'Bolyai Iskola', '']
+NAMES = [
+    'Petőfi Sándor Általános Iskola és Gimnázium',
+    'Kossuth Lajos Gimnázium',
+    'Bolyai János Általános Iskola',
+    'Petőfi Iskola',
+    'Kossuth Gimnázium Telephely'
+]
+COMPOSITE = {'token_set_ratio': 3, 'partial_ratio': 1, 'WRatio': 1}
+
+
+def test_single_scorer_matrix():
+    scores = get_scorer('ratio').matrix(QUERIES, NAMES)
+
+    assert scores.shape == (len(QUERIES), len(NAMES))
+    assert scores[1, 1] == fuzz.ratio(QUERIES[1], NAMES[1])
+
+
+def test_default_scorer_is_token_set_ratio():
+    scorer = get_scorer(None)
+
+    assert scorer.name == 'token_set_ratio'
+    assert scorer.is_token_set_ratio
+
+
+def test_composite_weights_are_normalized():
+    scorer = get_scorer(COMPOSITE)
+    scores = scorer.matrix(QUERIES, NAMES)
+
+    expected = (
+        0.6 * fuzz.token_set_ratio(QUERIES[0], NAMES[3])
+        + 0.2 * fuzz.partial_ratio(QUERIES[0], NAMES[3])
+        + 0.2 * fuzz.WRatio(QUERIES[0], NAMES[3])
+    )
+    assert scorer.name == '0.6*token_set_ratio + 0.2*partial_ratio + 0.2*WRatio'
+    assert not scorer.is_token_set_ratio
+    assert scores[0, 3] == pytest.approx(expected)
+    assert scores.max() <= 100
+
+
+def test_composite_cutoff_keeps_best_scores():
+    scorer = get_scorer(COMPOSITE)
+
+    full = scorer.matrix(QUERIES, NAMES)
+    cut = scorer.matrix(QUERIES, NAMES, score_cutoff=0)
+
+    np.testing.assert_array_equal(full.max(axis=1), cut.max(axis=1))
+    np.testing.assert_array_equal(full.argmax(axis=1), cut.argmax(axis=1))
+    assert (cut <= full + 1e-9).all()
+
+
+def test_composite_cutoff_keeps_top_scores():
+    scorer = get_scorer(COMPOSITE)
+
+    full = scorer.matrix(QUERIES[:3], NAMES)
+    cut = scorer.matrix(QUERIES[:3], NAMES, score_cutoff=0, keep=3)
+
+    np.testing.assert_array_equal(np.sort(full)[:, -3:], np.sort(cut)[:, -3:])
+
+
+@pytest.mark.parametrize('algorithm', ['Unknown', {'token_set_ratio': 1, 'fuzzy': 1}, {'ratio': 0}, {}])
+def test_invalid_algorithm(algorithm):
+    with pytest.raises(ValueError):
+        get_scorer(algorithm)
+
+
+def test_match_all_schools_honors_algorithm(tmp_path):
+    config = get_config()
+    config['kir']['locations_file'] = 'tests/fixtures/kir_sample.xlsx'
+    config['paths']['cache_dir'] = str(tmp_path / 'cache')
+    config['matching']['canonical_fast_path'] = False
+    kir_dict = load_kir_database(config)
+    our_df = pd.DataFrame({'iskola_nev': ['Móra Ferenc Gimnázium'], 'varos': ['Szeged']})
+
+    results = {}
+    for algorithm in ['token_set_ratio', 'ratio', COMPOSITE]:
+        config['matching']['algorithm'] = algorithm
+        results[str(algorithm)] = match_all_schools(our_df, kir_dict, {}, config)['confidence_score'].iloc[0]
+
+    assert len(set(results.values())) == 3
@@ -0,0 +1,62 @@
+"""Tests for the content-addressed stage cache."""
+
+import pandas as pd
+
+from tanulmanyi_versenyek.common.stage_cache import StageCache, file_digest
+from tanulmanyi_versenyek.validation import city_checker, school_matcher
+
+
+def test_file_digest_missing_file(tmp_path):
+    assert file_digest(tmp_path / 'missing.csv') == 'missing'
+
+
+def test_key_depends_on_inputs_config_code_and_upstream(tmp_path):
+    input_file = tmp_path / 'input.csv'
+    input_file.write_text('a;b\n1;2\n', encoding='utf-8')
+    cache = StageCache(tmp_path / 'cache')
+
+    base = cache.key('step', inputs=[input_file], config_section={'x': 1}, code=[city_checker], upstream=['u'])
+
+    assert base == cache.key('step', inputs=[input_file], config_section={'x': 1}, code=[city_checker], upstream=['u'])
+    assert base != cache.key('step', inputs=[input_file], config_section={'x': 2}, code=[city_checker], upstream=['u'])
+    assert base != cache.key('step', inputs=[input_file], config_section={'x': 1}, code=[school_matcher], upstream=['u'])
+    assert base != cache.key('step', inputs=[input_file], config_section={'x': 1}, code=[city_checker], upstream=['v'])
+
+    input_file.write_text('a;b\n1;3\n', encoding='utf-8')
+    assert base != cache.key('step', inputs=[input_file], config_section={'x': 1}, code=[city_checker], upstream=['u'])
+
+
+def test_get_or_compute_hit_and_miss(tmp_path):
+    cache = StageCache(tmp_path / 'cache')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return pd.DataFrame({'a': [1, 2]}), 3
+
+    first_df, first_count = cache.get_or_compute('merge', 'k1', compute)
+    second_df, second_count = cache.get_or_compute('merge', 'k1', compute)
+
+    assert len(calls) == 1
+    assert second_count == first_count == 3
+    pd.testing.assert_frame_equal(first_df, second_df)
+    assert cache.hits == ['merge']
+    assert cache.misses == ['merge']
+
+
+def test_get_or_compute_replaces_stale_entries(tmp_path):
+    cache = StageCache(tmp_path / 'cache')
+
+    cache.get_or_compute('merge', 'k1', lambda: 1)
+    cache.get_or_compute('merge', 'k2', lambda: 2)
+
+    assert len(list((tmp_path / 'cache').glob('merge-*.pkl'))) == 1
+    assert cache.get_or_compute('merge', 'k2', lambda: 3) == 2
+
+
+def test_disabled_cache_always_computes(tmp_path):
+    cache = StageCache(tmp_path / 'cache', enabled=False)
+
+    assert cache.get_or_compute('merge', 'k1', lambda: 1) == 1
+    assert cache.get_or_compute('merge', 'k1', lambda: 2) == 2
+    assert not (tmp_path / 'cache').exists()
@@ -0,0 +1,61 @@
+"""Tests for re-classifying stored match scores."""
+
+import pandas as pd
+import pytest
+
+from tanulmanyi_versenyek.validation.threshold_sweep import (
+    MATCH_METHODS,
+    classify,
+    load_match_scores,
+    save_match_scores,
+    sweep
+)
+
+
+def _match_results():
+    return pd.DataFrame({
+        'our_school_name': ['A Iskola', 'B Iskola', 'C Iskola', 'D Iskola', 'E Iskola', 'F Iskola', 'Bp. XII. Iskola'],
+        'our_city': ['Szeged', 'Szeged', 'Szeged', 'Szeged', 'Pécs', 'Pécs', 'Budapest'],
+        'confidence_score': [95.0, 85.0, 70.0, 100.0, None, None, 82.0],
+        'match_method': ['AUTO_HIGH', 'AUTO_MEDIUM', 'DROPPED', 'AUTO_HIGH', 'MANUAL', 'NO_MATCH', 'AUTO_MEDIUM'],
+        'comment': ['', '', 'Low confidence', 'Exact match after name normalization', 'Manual', 'No schools', '']
+    })
+
+
+CONFIG = {'matching': {'high_confidence_threshold': 90, 'medium_confidence_threshold': 80, 'district_hints': True}}
+
+
+@pytest.fixture
+def scores(tmp_path):
+    path = tmp_path / 'scores.npz'
+    save_match_scores(_match_results(), path, CONFIG)
+    return load_match_scores(path)
+
+
+def test_round_trip(scores):
+    assert list(scores['school_names'][:2]) == ['A Iskola', 'B Iskola']
+    assert [MATCH_METHODS[code] for code in scores['methods']] == list(_match_results()['match_method'])
+    assert list(scores['fixed']) == [False, False, False, True, True, True, False]
+    assert list(scores['district_hinted']) == [False] * 6 + [True]
+    assert list(scores['thresholds']) == [90, 80]
+
+
+def test_same_thresholds_reproduce_methods(scores):
+    assert (classify(scores, 90, 80) == scores['methods']).all()
+
+
+def test_sweep_counts(scores):
+    rows = sweep(scores, [90, 99], [60, 95])
+
+    # medium above high is skipped
+    assert [(row['high'], row['medium']) for row in rows] == [(90, 60), (99, 60), (99, 95)]
+    assert rows[0]['AUTO_MEDIUM'] == 3 and rows[0]['DROPPED'] == 0 and rows[0]['changed'] == 1
+    # The exact normalized match and the manual mapping keep their method
+    assert rows[2]['AUTO_HIGH'] == 1 and rows[2]['MANUAL'] == 1 and rows[2]['NO_MATCH'] == 1
+    assert rows[2]['AUTO_MEDIUM'] == 1 and rows[2]['DROPPED'] == 3
+    assert rows[2]['rerun_needed'] == 1
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_match_scores(tmp_path / 'missing.npz')